@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from importlib import metadata
+
+import pandas as pd
+
+from merged_store import DATA_DIR
+from quellcode import lokale_module, quellcode_hash
+from star_schema import sternschema_aus_dateien
+from visualisation import plot_forelle_scenario_animated_lines, plot_scenario, write_animated_html
+
+
+AUSGABE_ORDNER = os.path.join(DATA_DIR, "..", "webstory_fisch", "img", "plots")
+MANIFEST_NAME = "manifest.json"
+# Bibliotheken, deren Version die erzeugten Grafiken beeinflusst
+BIBLIOTHEKEN = ("numpy", "pandas", "plotly")
+
+# Farben und Labels für die animierte Variante
+FARBEN = {"RCP26": "#2ca02c", "RCP45": "#ff9900", "RCP85": "#e41a1c"}
+LABELS = {"RCP26": "Optimistisches Szenario", "RCP45": "Mittleres Szenario", "RCP85": "Pessimistisches Szenario"}
+
+
+def dateiname(fisch: str, see: str, animiert: bool = False) -> str:
+    """Deterministischer Dateiname (ohne Endung) für ein Fisch-See-Paar."""
+    name = re.sub(r"[^\w-]+", "_", f"{fisch}_{see}").strip("_")
+    return f"plot_{name}_animated" if animiert else f"plot_{name}"
+
+
+def code_version(modul: str = "batch_render") -> str:
+    """
+    Hash des Plot-Codes: Quelltext von modul und aller Module aus src/, die es importiert
+    (visualisation, star_schema, merged_store, ...), sowie die Versionen aus BIBLIOTHEKEN.
+    Ändert sich davon etwas, werden alle Grafiken neu erzeugt.
+    """
+    h = hashlib.sha256()
+    for bibliothek in BIBLIOTHEKEN:
+        h.update(f"{bibliothek}=={metadata.version(bibliothek)}\0".encode())
+    return quellcode_hash(lokale_module(modul), h)
+
+
+def daten_hash(df: pd.DataFrame) -> str:
+    """Hash über den Inhalt eines DataFrames."""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def slice_hash(see_hash: str, fisch_hash: str, *parameter) -> str:
+    """Hash eines Fisch-See-Ausschnitts aus den Hashes seiner Teile und den Parametern."""
+    return hashlib.sha256(repr((see_hash, fisch_hash, parameter)).encode()).hexdigest()[:16]
+
+
+def _render_fisch(fisch: str, df_fisch: pd.DataFrame, seen: list, ordner: str,
+                  formate: tuple, window: int, animiert: bool) -> list:
+    """Erzeugt alle Grafiken eines Fisches (läuft im Worker-Prozess)."""
+    geschrieben = []
+    for see in seen:
+        if animiert:
+            # Daten nur einmal einbetten, die Linien werden im Browser aufgedeckt; HTML und JSON
+            # enthalten dieselbe Figur (vollständige Linien, Animation in layout.meta)
+            fig = plot_forelle_scenario_animated_lines(df_fisch, see, fisch, FARBEN, LABELS, window, modus="client")
+        else:
+            fig = plot_scenario(df_fisch, see, fisch, window)
+        basis = os.path.join(ordner, dateiname(fisch, see, animiert))
+        if "html" in formate and animiert:
+            write_animated_html(fig, f"{basis}.html")
+        elif "html" in formate:
+            fig.write_html(f"{basis}.html", include_plotlyjs="cdn")
+        if "json" in formate:
+            with open(f"{basis}.json", "w", encoding="utf-8") as f:
+                f.write(fig.to_json())
+        geschrieben.append((fisch, see))
+    return geschrieben
+
+
+def alle_grafiken_rendern(
+    ordner: str = AUSGABE_ORDNER,
+    formate=("html", "json"),
+    window: int = 10,
+    animiert: bool = False,
+    max_workers: int = None
+    ) -> int:
+    """
+    Erzeugt für jedes Fisch-See-Paar aus der Vorkommensmatrix (Fischdaten_final.csv)
+    die Grafik und verteilt die Arbeit auf einen Prozess-Pool. Paare, deren Datenausschnitt,
+    Parameter und Plot-Code sich seit dem letzten Lauf nicht geändert haben, werden übersprungen.
+
+    Parameters:
+        ordner (str): Zielordner.
+        formate (tuple): 'html' und/oder 'json'.
+        window (int): Fenster für die Glättung.
+        animiert (bool): plot_forelle_scenario_animated_lines statt plot_scenario verwenden.
+        max_workers (int): Anzahl Prozesse (Standard: Anzahl CPUs).
+
+    Returns:
+        int: Anzahl neu erzeugter Grafiken.
+    """
+    os.makedirs(ordner, exist_ok=True)
+    manifest_pfad = os.path.join(ordner, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_pfad):
+        with open(manifest_pfad, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    schema = sternschema_aus_dateien()
+    version = code_version()
+
+    # Der Ausschnitt eines Paares besteht aus den Temperaturen des Sees und der Zeile des Fisches
+    temperaturen = schema.temperaturen
+    see_hashes = {
+        see: daten_hash(gruppe) for see, gruppe in temperaturen.groupby("lake", observed=True, sort=False)
+    }
+    fisch_hashes = {fisch: daten_hash(schema.fische.loc[[fisch]]) for fisch in schema.fische.index}
+
+    # Geänderte Paare bestimmen, gruppiert nach Fisch
+    auftraege, neue_hashes = {}, {}
+    for fisch, seen in schema.paare().groupby("Fisch", sort=False)["lake"]:
+        for see in seen:
+            schluessel = dateiname(fisch, see, animiert)
+            h = slice_hash(see_hashes[see], fisch_hashes[fisch], version, window, tuple(formate))
+            if manifest.get(schluessel) == h and all(
+                os.path.exists(os.path.join(ordner, f"{schluessel}.{endung}")) for endung in formate
+            ):
+                continue
+            auftraege.setdefault(fisch, []).append(see)
+            neue_hashes[schluessel] = h
+
+    anzahl = 0
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(_render_fisch, fisch, schema.fisch_daten(fisch, seen), seen,
+                            ordner, tuple(formate), window, animiert)
+                for fisch, seen in auftraege.items()
+            ]
+            for future in as_completed(futures):
+                for fisch, see in future.result():
+                    schluessel = dateiname(fisch, see, animiert)
+                    manifest[schluessel] = neue_hashes[schluessel]
+                    anzahl += 1
+    finally:
+        # Auch bei einem Fehler festhalten, was bereits fertig ist
+        with open(manifest_pfad, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+    print(f"{anzahl} Grafiken erzeugt, {len(schema.paare()) - anzahl} unverändert")
+    return anzahl
+
+
+if __name__ == "__main__":
+    alle_grafiken_rendern()
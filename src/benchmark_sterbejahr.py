@@ -0,0 +1,69 @@
+import time
+
+import pandas as pd
+
+from visualisation import get_death_year, seen_mit_sterbejahr
+
+
+# Alte Variante: pro Fisch filtern und groupby().apply(get_death_year)
+def seen_mit_sterbejahr_alt(df_merged: pd.DataFrame, fisch_namen, szenarien=None) -> pd.DataFrame:
+    if szenarien is None:
+        szenarien = ['RCP26', 'RCP45', 'RCP85']
+
+    results = []
+    for fisch_name in fisch_namen:
+        df_fisch = df_merged[df_merged['Fisch'] == fisch_name]
+        df_sterbejahr = (
+            # Spaltenauswahl statt include_groups=False (erst ab pandas 2.2)
+            df_fisch.groupby(['lake', 'scenario'], observed=True)[['year', 'überlebt']]
+            .apply(get_death_year)
+            .unstack(fill_value=0)
+        )
+        result = pd.DataFrame({'Fisch': fisch_name, 'lake': df_fisch['lake'].unique()})
+        for szenario in szenarien:
+            colname = f"Aussterbejahr bei {szenario}"
+            if szenario in df_sterbejahr.columns:
+                result[colname] = result['lake'].map(df_sterbejahr[szenario])
+            else:
+                result[colname] = 0
+        results.append(result)
+
+    return pd.concat(results, ignore_index=True)
+
+
+def synthetisches_df_merged(df_merged: pd.DataFrame, faktor: int = 100) -> pd.DataFrame:
+    """
+    Vervielfacht df_merged, indem jede Fischart faktor-mal unter neuem Namen kopiert wird.
+    """
+    kopien = []
+    for i in range(faktor):
+        kopie = df_merged.copy()
+        kopie['Fisch'] = kopie['Fisch'] + f" #{i}"
+        kopien.append(kopie)
+    return pd.concat(kopien, ignore_index=True)
+
+
+def messen(funktion, *args, wiederholungen: int = 1):
+    """Gibt die beste Laufzeit in Sekunden über mehrere Wiederholungen und das Ergebnis zurück."""
+    zeiten = []
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        ergebnis = funktion(*args)
+        zeiten.append(time.perf_counter() - start)
+    return min(zeiten), ergebnis
+
+
+if __name__ == "__main__":
+    df_merged = pd.read_csv("../data/df_merged.csv").rename(columns={'See': 'lake'})
+
+    for faktor in [1, 100]:
+        df = synthetisches_df_merged(df_merged, faktor)
+        fische = list(df['Fisch'].unique())
+
+        zeit_alt, ergebnis_alt = messen(seen_mit_sterbejahr_alt, df, fische)
+        zeit_neu, ergebnis_neu = messen(seen_mit_sterbejahr, df, fische, wiederholungen=3)
+
+        # Beide Varianten müssen dasselbe Resultat liefern
+        pd.testing.assert_frame_equal(ergebnis_alt, ergebnis_neu, check_dtype=False)
+        print(f"{len(df):>9} Zeilen, {len(fische):>5} Fische: "
+              f"alt {zeit_alt:8.3f} s | neu {zeit_neu:8.3f} s | Speedup {zeit_alt / zeit_neu:6.1f}x")
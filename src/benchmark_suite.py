@@ -0,0 +1,320 @@
+import argparse
+import cProfile
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import pstats
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from json_stream import jahreswerte_cube
+from merged_store import CSV_PFAD, DATA_DIR, lade_df_merged, lade_df_merged_csv, schreibe_df_merged
+from star_schema import FISCH_SPALTEN, Sternschema, lade_jahreswerte_json, sternschema_aus_dateien
+from visualisation import plot_forelle_scenario_animated_lines, plot_scenario, seen_mit_sterbejahr, seen_mit_sterbejahr_single
+
+
+HISTORIE_PFAD = os.path.join(DATA_DIR, "benchmark_historie.jsonl")
+
+# 1 = echte Daten aus data/, sonst synthetisch vergrössert (Seen, Jahre und Fische je um faktor ** (1/3))
+FAKTOREN = (1, 10, 100, 1000)
+
+# Regression, wenn ein Messwert den Median der letzten VERGLEICHS_LAEUFE Läufe um mehr als diesen Faktor übersteigt
+SCHWELLEN = {"sekunden": 1.3, "peak_mb": 1.2, "ausgabe_bytes": 1.05}
+VERGLEICHS_LAEUFE = 5
+# Kürzere Laufzeiten schwanken zu stark für einen Vergleich
+MIN_SEKUNDEN = 0.005
+
+# Fälle, die df_merged (Fisch x See x Jahr) brauchen, ab dieser Zeilenzahl überspringen
+MAX_ZEILEN_DF_MERGED = 10_000_000
+
+# Grundtemperatur der Tiefen relativ zur Oberfläche (synthetische Daten)
+TIEFEN_VERSATZ = {"surface": 0.0, "bottom": -4.0}
+
+FARBEN = {"RCP26": "#2ca02c", "RCP45": "#ff9900", "RCP85": "#e41a1c"}
+LABELS = {"RCP26": "Optimistisches Szenario", "RCP45": "Mittleres Szenario", "RCP85": "Pessimistisches Szenario"}
+
+
+def synthetisches_schema(faktor: int, basis: Sternschema, seed: int = 0) -> Sternschema:
+    """
+    Erzeugt ein Sternschema mit ca. faktor-mal so vielen Datenpunkten wie basis:
+    Seen, Jahre und Fische wachsen je um faktor ** (1/3). Temperaturen folgen einem
+    linearen Trend pro Szenario mit Rauschen, die Vorkommensdichte entspricht basis.
+    """
+    rng = np.random.default_rng(seed)
+    skala = faktor ** (1 / 3)
+    szenarien = sorted(basis.temperaturen['scenario'].astype(str).unique())
+    tiefen = sorted(basis.temperaturen['depth'].astype(str).unique())
+    jahre_basis = np.sort(basis.temperaturen['year'].unique())
+
+    n_seen = max(1, round(len(basis.seen) * skala))
+    n_jahre = max(2, round(len(jahre_basis) * skala))
+    n_fische = max(1, round(len(basis.fische) * skala))
+    seen = pd.Index([f"See {i}" for i in range(n_seen)], name='lake')
+    jahre = np.arange(jahre_basis[0], jahre_basis[0] + n_jahre, dtype=np.int16)
+
+    # (See, Szenario, Tiefe, Jahr)
+    versatz = np.array([TIEFEN_VERSATZ.get(tiefe, 0.0) for tiefe in tiefen])
+    grund = rng.uniform(6, 20, size=(n_seen, 1, 1, 1)) + versatz.reshape(1, 1, -1, 1)
+    trend = np.linspace(0.005, 0.04, len(szenarien)).reshape(1, -1, 1, 1) * np.arange(n_jahre)
+    avg = (grund + trend + rng.normal(0, 0.6, size=(n_seen, len(szenarien), len(tiefen), n_jahre))).astype(np.float32)
+    spanne = rng.uniform(0.5, 3.0, size=avg.shape).astype(np.float32)
+
+    index = pd.MultiIndex.from_product([seen, szenarien, tiefen, jahre], names=['lake', 'scenario', 'depth', 'year'])
+    temperaturen = index.to_frame(index=False)
+    for spalte in ['lake', 'scenario', 'depth']:
+        temperaturen[spalte] = temperaturen[spalte].astype('category')
+    temperaturen['temperature_avg'] = avg.reshape(-1)
+    temperaturen['temperature_min'] = (avg - spanne).reshape(-1)
+    temperaturen['temperature_max'] = (avg + spanne).reshape(-1)
+
+    # Fische: Zeilen der echten Fisch-Dimension reihum wiederverwenden, kritische Temperatur variieren
+    vorlage = basis.fische.reset_index()
+    fische = vorlage.iloc[np.arange(n_fische) % len(vorlage)].reset_index(drop=True)
+    fische['Fisch'] = [f"{name} #{i}" for i, name in enumerate(fische['Fisch'])]
+    krit = pd.to_numeric(fische['Kritische Temperatur °C'], errors='coerce').astype(np.float64)
+    fische['Kritische Temperatur °C'] = (krit + rng.uniform(-2, 2, n_fische)).astype('Float32')
+    fische = fische[FISCH_SPALTEN].set_index('Fisch')
+
+    dichte = basis.vorkommen().mean()
+    vorkommen = rng.random((n_fische, n_seen)) < dichte
+    return Sternschema.aus_vorkommen(temperaturen, fische, seen, vorkommen)
+
+
+def json_dateien_schreiben(schema: Sternschema, ordner: str) -> None:
+    """Schreibt die Jahreswerte eines Schemas im Format von data/see_data_json (nur 'yearly')."""
+    for see, gruppe in schema.temperaturen.groupby('lake', observed=True):
+        yearly = {}
+        for (depth, scenario), reihe in gruppe.groupby(['depth', 'scenario'], observed=True):
+            yearly.setdefault(depth, {})[scenario] = {
+                "x": reihe['year'].tolist(),
+                "y_ave": reihe['temperature_avg'].round(2).tolist(),
+                "y_min": reihe['temperature_min'].round(2).tolist(),
+                "y_max": reihe['temperature_max'].round(2).tolist(),
+            }
+        with open(os.path.join(ordner, f"{see}.json"), "w") as f:
+            json.dump({"yearly": yearly}, f)
+
+
+def ausgabe_bytes(ergebnis) -> int:
+    """Grösse eines Ergebnisses: Plotly-JSON bei Figuren, Speicher bei Tabellen und Arrays."""
+    if hasattr(ergebnis, "to_json") and hasattr(ergebnis, "data"):
+        return len(ergebnis.to_json())
+    if isinstance(ergebnis, pd.DataFrame):
+        return int(ergebnis.memory_usage(deep=True).sum())
+    if isinstance(ergebnis, np.ndarray):
+        return int(ergebnis.nbytes)
+    if isinstance(ergebnis, tuple):
+        return sum(ausgabe_bytes(teil) for teil in ergebnis)
+    if isinstance(ergebnis, Sternschema):
+        return ausgabe_bytes(ergebnis.temperaturen) + ausgabe_bytes(ergebnis.fische)
+    return 0
+
+
+def messen(funktion, wiederholungen: int = 3) -> dict:
+    """
+    Beste Laufzeit über wiederholungen Läufe, danach ein Lauf unter tracemalloc für den
+    Spitzenverbrauch (getrennt, da tracemalloc die Laufzeit verfälscht) und die Grösse der Ausgabe.
+    """
+    zeiten = []
+    for _ in range(wiederholungen):
+        gc.collect()
+        start = time.perf_counter()
+        ergebnis = funktion()
+        zeiten.append(time.perf_counter() - start)
+    groesse = ausgabe_bytes(ergebnis)
+    del ergebnis
+
+    gc.collect()
+    tracemalloc.start()
+    funktion()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"sekunden": min(zeiten), "peak_mb": peak / 2**20, "ausgabe_bytes": groesse}
+
+
+def faelle(schema: Sternschema, faktor: int, ordner: str) -> dict:
+    """
+    Alle Messfälle für ein Schema: {Name: Funktion ohne Argumente oder None (übersprungen)}.
+    Bei faktor 1 lesen die Lader die echten Dateien, sonst werden synthetische Dateien in ordner geschrieben.
+    Fälle über df_merged entfallen oberhalb von MAX_ZEILEN_DF_MERGED. Die beiden Fälle "(ein Fisch)"
+    lesen dieselben Zeilen aus der CSV- und aus einer daraus geschriebenen Parquet-Datei.
+
+    Die Berechnungen über df_merged und über das Sternschema arbeiten auf denselben Paaren:
+    df_merged wird dafür aus dem Schema aufgebaut (data/df_merged.csv enthält nur 26 der 658 Paare
+    und wird nur im Fall lade_df_merged_csv gelesen).
+    """
+    paare = schema.paare()
+    fisch_namen = list(pd.unique(paare['Fisch']))
+    # Fisch mit den meisten Seen und dessen erster See
+    fisch = paare['Fisch'].value_counts().index[0]
+    see = paare.loc[paare['Fisch'] == fisch, 'lake'].iloc[0]
+    df_fisch = schema.fisch_daten(fisch, see)
+    zeilen_df_merged = len(paare) * len(schema.temperaturen) // max(1, len(schema.seen))
+    klein = zeilen_df_merged <= MAX_ZEILEN_DF_MERGED
+
+    df_merged = schema.zu_df_merged() if klein else None
+    if faktor == 1:
+        csv_pfad, json_ordner = CSV_PFAD, os.path.join(DATA_DIR, "see_data_json")
+    else:
+        csv_pfad, json_ordner = os.path.join(ordner, "df_merged.csv"), os.path.join(ordner, "see_data_json")
+        os.makedirs(json_ordner, exist_ok=True)
+        json_dateien_schreiben(schema, json_ordner)
+        if klein:
+            df_merged.to_csv(csv_pfad, index=False)
+    # Parquet mit denselben Zeilen wie csv_pfad, damit beide Lader dieselbe Abfrage beantworten
+    parquet_pfad = os.path.join(ordner, "df_merged.parquet")
+    if klein:
+        df_datei = lade_df_merged_csv(csv_pfad) if faktor == 1 else df_merged
+        schreibe_df_merged(df_datei, parquet_pfad)
+        fisch_datei = df_datei['Fisch'].iloc[len(df_datei) // 2]
+
+    return {
+        "seen_mit_sterbejahr": lambda: seen_mit_sterbejahr(None, fisch_namen, sterbejahre=schema.sterbejahre()),
+        "seen_mit_sterbejahr (df_merged)": (
+            lambda: seen_mit_sterbejahr(df_merged, fisch_namen)
+        ) if klein else None,
+        "seen_mit_sterbejahr_single": lambda: seen_mit_sterbejahr_single(None, fisch, sterbejahre=schema.sterbejahre(fisch)),
+        "plot_scenario": lambda: plot_scenario(df_fisch, see, fisch),
+        "plot_forelle_scenario_animated_lines (frames)": (
+            lambda: plot_forelle_scenario_animated_lines(df_fisch, see, fisch, FARBEN, LABELS, modus="frames")
+        ) if faktor <= 100 else None,
+        "plot_forelle_scenario_animated_lines (client)": lambda: plot_forelle_scenario_animated_lines(
+            df_fisch, see, fisch, FARBEN, LABELS
+        ),
+        "lade_df_merged_csv": (lambda: lade_df_merged_csv(csv_pfad)) if klein else None,
+        "lade_df_merged_csv (ein Fisch)": (
+            lambda: (df := lade_df_merged_csv(csv_pfad))[df['Fisch'] == fisch_datei]
+        ) if klein else None,
+        "lade_df_merged (parquet, ein Fisch)": (
+            lambda: lade_df_merged(parquet_pfad, fisch=fisch_datei)
+        ) if klein else None,
+        "lade_jahreswerte_json": lambda: lade_jahreswerte_json(json_ordner),
+        "jahreswerte_cube": lambda: jahreswerte_cube(json_ordner),
+        "sternschema_aus_dateien": (lambda: sternschema_aus_dateien()) if faktor == 1 else None,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def lade_historie(pfad: str = HISTORIE_PFAD) -> pd.DataFrame:
+    if not os.path.exists(pfad):
+        return pd.DataFrame(columns=["zeit", "commit", "fall", "faktor", *SCHWELLEN])
+    return pd.read_json(pfad, lines=True)
+
+
+def regressionen(ergebnisse: pd.DataFrame, historie: pd.DataFrame) -> list:
+    """
+    Vergleicht jede Messung mit dem Median der letzten VERGLEICHS_LAEUFE Läufe desselben Falls und Faktors.
+
+    Returns:
+        list: Meldungen für alle Messwerte über der Schwelle aus SCHWELLEN.
+    """
+    meldungen = []
+    for _, messung in ergebnisse.iterrows():
+        frueher = historie[(historie['fall'] == messung['fall']) & (historie['faktor'] == messung['faktor'])]
+        frueher = frueher.tail(VERGLEICHS_LAEUFE)
+        if frueher.empty:
+            continue
+        for wert, schwelle in SCHWELLEN.items():
+            referenz = frueher[wert].median()
+            if wert == "sekunden" and max(referenz, messung[wert]) < MIN_SEKUNDEN:
+                continue
+            if referenz > 0 and messung[wert] > referenz * schwelle:
+                meldungen.append(
+                    f"{messung['fall']} ({messung['faktor']}x): {wert} {messung[wert]:.4g} "
+                    f"statt {referenz:.4g} (+{(messung[wert] / referenz - 1) * 100:.0f} %)"
+                )
+    return meldungen
+
+
+def benchmarks_ausfuehren(
+    faktoren=FAKTOREN,
+    auswahl=None,
+    wiederholungen: int = 3,
+    historie_pfad: str = HISTORIE_PFAD,
+    speichern: bool = True
+    ) -> tuple:
+    """
+    Misst alle Fälle (oder nur die Namen in auswahl) für jeden Faktor und hängt die Ergebnisse
+    an die Historie an.
+
+    Returns:
+        tuple: (Ergebnisse als DataFrame, Liste der Regressionen gegenüber der Historie)
+    """
+    basis = sternschema_aus_dateien()
+    zeit = datetime.datetime.now().isoformat(timespec="seconds")
+    commit = git_commit()
+
+    zeilen = []
+    for faktor in faktoren:
+        schema = basis if faktor == 1 else synthetisches_schema(faktor, basis)
+        with tempfile.TemporaryDirectory() as ordner:
+            for name, funktion in faelle(schema, faktor, ordner).items():
+                if auswahl and name not in auswahl:
+                    continue
+                if funktion is None:
+                    print(f"{name:<48} {faktor:>5}x   übersprungen")
+                    continue
+                messung = messen(funktion, wiederholungen)
+                print(f"{name:<48} {faktor:>5}x {messung['sekunden']:10.4f} s {messung['peak_mb']:10.1f} MB "
+                      f"{messung['ausgabe_bytes'] / 1e6:10.2f} MB Ausgabe")
+                zeilen.append({"zeit": zeit, "commit": commit, "python": platform.python_version(),
+                               "fall": name, "faktor": faktor, **messung})
+
+    ergebnisse = pd.DataFrame(zeilen)
+    meldungen = regressionen(ergebnisse, lade_historie(historie_pfad)) if len(ergebnisse) else []
+    if speichern:
+        with open(historie_pfad, "a", encoding="utf-8") as f:
+            for zeile in zeilen:
+                f.write(json.dumps(zeile, ensure_ascii=False) + "\n")
+    return ergebnisse, meldungen
+
+
+def profil(name: str, faktor: int = 1, anzahl: int = 25) -> str:
+    """cProfile eines einzelnen Falls, die anzahl teuersten Funktionen nach kumulierter Zeit."""
+    basis = sternschema_aus_dateien()
+    schema = basis if faktor == 1 else synthetisches_schema(faktor, basis)
+    with tempfile.TemporaryDirectory() as ordner:
+        funktion = faelle(schema, faktor, ordner)[name]
+        if funktion is None:
+            return f"{name} ist für {faktor}x zu gross"
+        profiler = cProfile.Profile()
+        profiler.runcall(funktion)
+    ausgabe = io.StringIO()
+    pstats.Stats(profiler, stream=ausgabe).sort_stats("cumulative").print_stats(anzahl)
+    return ausgabe.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks für visualisation.py und die Lader.")
+    parser.add_argument("--faktoren", type=int, nargs="+", default=list(FAKTOREN))
+    parser.add_argument("--fall", action="append", help="Nur diesen Fall messen (mehrfach möglich)")
+    parser.add_argument("--wiederholungen", type=int, default=3)
+    parser.add_argument("--ohne-historie", action="store_true", help="Ergebnisse nicht in die Historie schreiben")
+    parser.add_argument("--profil", metavar="FALL", help="Statt zu messen einen Fall mit cProfile auswerten")
+    args = parser.parse_args()
+
+    if args.profil:
+        print(profil(args.profil, args.faktoren[0]))
+    else:
+        _, meldungen = benchmarks_ausfuehren(args.faktoren, args.fall, args.wiederholungen,
+                                             speichern=not args.ohne_historie)
+        for meldung in meldungen:
+            print(f"REGRESSION {meldung}")
+        raise SystemExit(1 if meldungen else 0)
@@ -0,0 +1,205 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+from quellcode import lokale_module, quellcode_hash
+
+
+# Nur Standardbibliothek beim Start: numpy, pandas, plotly und selenium werden erst im
+# jeweiligen Unterbefehl importiert (merged_store würde pandas laden, daher DATA_DIR hier)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+CACHE_PFAD = os.path.join(DATA_DIR, "cache", "sterbejahre.npz")
+FISCHDATEN_PFAD = os.path.join(DATA_DIR, "Fischdaten_final.csv")
+JSON_ORDNER = os.path.join(DATA_DIR, "see_data_json")
+SZENARIEN = ["RCP26", "RCP45", "RCP85"]
+# Module, mit denen cache_bauen rechnet; ihr Quelltext (samt lokaler Importe) gehört zum Stempel
+CACHE_MODULE = ("name_registry", "star_schema", "visualisation")
+
+
+def quellen_stempel(fischdaten_pfad: str = FISCHDATEN_PFAD, json_ordner: str = JSON_ORDNER) -> str:
+    """
+    Grösse und Änderungszeit aller Quelldateien sowie ein Hash über cli.py und den Code aus CACHE_MODULE;
+    ändert sich eines davon, wird der Cache neu gebaut.
+    """
+    stempel = [["code", quellcode_hash({"cli", *lokale_module(*CACHE_MODULE)})]]
+    for eintrag in [fischdaten_pfad, *sorted(e.path for e in os.scandir(json_ordner) if e.name.endswith(".json"))]:
+        info = os.stat(eintrag)
+        stempel.append([os.path.basename(eintrag), info.st_size, info.st_mtime_ns])
+    return json.dumps(stempel)
+
+
+def cache_bauen(pfad: str = CACHE_PFAD) -> None:
+    """
+    Berechnet die Aussterbejahre aller Fisch-See-Paare (wie seen_mit_sterbejahr, mit und ohne
+    Refugium) und schreibt sie zusammen mit den Namen und Aliasen als .npz.
+    """
+    import numpy as np
+
+    from name_registry import Register
+    from star_schema import sternschema_aus_dateien
+    from visualisation import sterbejahre_pro_szenario
+
+    schema = sternschema_aus_dateien()
+    register = Register.aus_sternschema(schema)
+    paare = schema.paare()
+
+    tabellen = {}
+    for name, refugium in [("sterbejahre", False), ("refugium", True)]:
+        sterbejahre = schema.sterbejahre(refugium=refugium)
+        tabellen[name] = sterbejahre_pro_szenario(sterbejahre, SZENARIEN).to_numpy(dtype=np.int16)
+
+    # Aliase wörtlich und als Schlüssel, damit die Abfrage name_registry nur bei Schreibvarianten braucht
+    namen = {
+        "seen": register.seen.namen.tolist(),
+        "fische": register.fische.namen.tolist(),
+        "szenarien": SZENARIEN,
+        "see_aliase": register.seen.tabelle(),
+        "fisch_aliase": register.fische.tabelle(),
+        "stempel": quellen_stempel(),
+    }
+
+    os.makedirs(os.path.dirname(pfad), exist_ok=True)
+    tmp = f"{pfad}.{os.getpid()}.tmp.npz"
+    np.savez(
+        tmp,
+        fisch=register.fische.ids(paare["Fisch"]).astype(np.int32),
+        see=register.seen.ids(paare["lake"]).astype(np.int32),
+        namen=np.array(json.dumps(namen, ensure_ascii=False)),
+        **tabellen,
+    )
+    os.replace(tmp, pfad)
+
+
+class Cache:
+    """Vorberechnete Aussterbejahre aus CACHE_PFAD; baut den Cache neu, wenn er fehlt oder veraltet ist."""
+
+    def __init__(self, pfad: str = CACHE_PFAD, neu_bauen: bool = False):
+        if neu_bauen or not self._laden(pfad) or self.namen["stempel"] != quellen_stempel():
+            cache_bauen(pfad)
+            self._laden(pfad)
+
+    def _laden(self, pfad: str) -> bool:
+        import numpy as np
+
+        if not os.path.exists(pfad):
+            return False
+        with np.load(pfad) as npz:
+            self.namen = json.loads(str(npz["namen"]))
+            self.fisch = npz["fisch"]
+            self.see = npz["see"]
+            self.tabellen = {"sterbejahre": npz["sterbejahre"], "refugium": npz["refugium"]}
+        return True
+
+    def _id(self, art: str, name: str) -> int:
+        tabelle = self.namen[art]
+        for kandidat in (name, name.strip()):
+            if kandidat in tabelle:
+                return tabelle[kandidat]
+        # Andere Schreibweise: erst jetzt name_registry (und damit pandas) laden
+        from name_registry import schluessel
+
+        if schluessel(name) in tabelle:
+            return tabelle[schluessel(name)]
+        raise SystemExit(f"Unbekannter Name: {name!r}")
+
+    def zeilen(self, fische=None, seen=None, szenarien=SZENARIEN, refugium: bool = False) -> list:
+        """Zeilen [Fisch, lake, Jahr pro Szenario] (0 = stirbt nie) in der Reihenfolge der Paare."""
+        import numpy as np
+
+        maske = np.ones(len(self.fisch), dtype=bool)
+        if fische:
+            maske &= np.isin(self.fisch, [self._id("fisch_aliase", f) for f in fische])
+        if seen:
+            maske &= np.isin(self.see, [self._id("see_aliase", s) for s in seen])
+        spalten = [self.namen["szenarien"].index(s) for s in szenarien]
+        werte = self.tabellen["refugium" if refugium else "sterbejahre"][maske][:, spalten]
+        fisch_namen, see_namen = self.namen["fische"], self.namen["seen"]
+        return [
+            [fisch_namen[f], see_namen[s], *map(int, w)]
+            for f, s, w in zip(self.fisch[maske], self.see[maske], werte)
+        ]
+
+
+def extinction_table(args) -> int:
+    cache = Cache(args.cache, neu_bauen=args.rebuild)
+    zeilen = cache.zeilen(args.fish, args.lake, args.scenario, args.refugium)
+    kopf = ["Fisch", "lake", *[f"Aussterbejahr bei {s}" for s in args.scenario]]
+    if args.format == "json":
+        json.dump([dict(zip(kopf, z)) for z in zeilen], sys.stdout, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        schreiber = csv.writer(sys.stdout, delimiter="\t" if args.format == "tsv" else ",", lineterminator="\n")
+        schreiber.writerow(kopf)
+        schreiber.writerows(zeilen)
+    return 0
+
+
+def render(args) -> int:
+    from batch_render import AUSGABE_ORDNER, alle_grafiken_rendern
+
+    anzahl = alle_grafiken_rendern(args.ordner or AUSGABE_ORDNER, args.formate, args.window, args.animiert, args.max_workers)
+    print(f"{anzahl} Grafiken geschrieben")
+    return 0
+
+
+def export(args) -> int:
+    from export_tiles import KACHEL_ORDNER, kacheln_exportieren
+
+    kacheln_exportieren(args.ordner or KACHEL_ORDNER, args.window)
+    return 0
+
+
+def scrape(args) -> int:
+    from z_image_scraper import fish_names, scrape_and_save_images
+
+    begriffe = args.begriffe or fish_names()
+    manifest = scrape_and_save_images(begriffe, num_images=args.num_images, drivers=args.drivers, force=args.force)
+    fehler = [b for b in begriffe if any(e.get("status") == "error" for e in manifest.get(b, []))]
+    return 1 if fehler else 0
+
+
+def parser_erstellen() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Werkzeuge für die Fisch-Datenstory.")
+    unter = parser.add_subparsers(dest="befehl", required=True)
+
+    p = unter.add_parser("extinction-table", help="Aussterbejahre pro Fisch und See (aus dem Cache)")
+    p.add_argument("--fish", action="append", help="Fisch (deutsch oder wissenschaftlich), mehrfach möglich")
+    p.add_argument("--lake", action="append", help="See (beliebiger Alias), mehrfach möglich")
+    p.add_argument("--scenario", nargs="+", default=SZENARIEN, choices=SZENARIEN)
+    p.add_argument("--refugium", action="store_true", help="Rückzug in die kühlste Tiefe erlauben")
+    p.add_argument("--format", choices=["csv", "tsv", "json"], default="csv")
+    p.add_argument("--cache", default=CACHE_PFAD)
+    p.add_argument("--rebuild", action="store_true", help="Cache neu bauen")
+    p.set_defaults(funktion=extinction_table)
+
+    p = unter.add_parser("render", help="Grafiken für alle Fisch-See-Paare rendern")
+    p.add_argument("--ordner")
+    p.add_argument("--formate", nargs="+", default=["html", "json"], choices=["html", "json"])
+    p.add_argument("--window", type=int, default=10)
+    p.add_argument("--animiert", action="store_true")
+    p.add_argument("--max-workers", type=int)
+    p.set_defaults(funktion=render)
+
+    p = unter.add_parser("export", help="Datenkacheln für die Webstory exportieren")
+    p.add_argument("--ordner")
+    p.add_argument("--window", type=int, default=10)
+    p.set_defaults(funktion=export)
+
+    p = unter.add_parser("scrape", help="Fischbilder sammeln")
+    p.add_argument("begriffe", nargs="*", help="Suchbegriffe (Standard: wissenschaftliche Namen aus Fischdaten.csv)")
+    p.add_argument("--num-images", type=int, default=1)
+    p.add_argument("--drivers", type=int, default=2)
+    p.add_argument("--force", action="store_true")
+    p.set_defaults(funktion=scrape)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = parser_erstellen().parse_args(argv)
+    return args.funktion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
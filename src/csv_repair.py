@@ -0,0 +1,160 @@
+import argparse
+import csv
+import io
+import re
+import warnings
+
+import pandas as pd
+
+
+# Werte, die für "keine Angabe" stehen (z.B. 'X' in Fischdaten.csv)
+NA_WERTE = ("X", "x", "-", "")
+TRENNZEICHEN = ",;\t|"
+
+# Meldung des C-Parsers bei on_bad_lines="warn"
+_VERWORFEN = re.compile(r"Skipping line (\d+): (.*)")
+
+
+def erkenne_format(pfad: str, encoding: str = "utf-8", stichprobe: int = 64 * 1024) -> dict:
+    """
+    Bestimmt anhand des Dateianfangs Trennzeichen, Kopfzeile und ob jede Zeile als Ganzes
+    in Anführungszeichen steht (ein Feld pro Zeile, innere Anführungszeichen verdoppelt,
+    wie in working_files/see_lat_lon.csv).
+
+    Returns:
+        dict: trennzeichen, verschachtelt (bool), kopf (Liste der Spaltennamen)
+    """
+    with open(pfad, "r", encoding=encoding, newline="") as f:
+        text = f.read(stichprobe)
+    trennzeichen = _trennzeichen(text)
+
+    # Ganze Zeile gequotet: die erste Zeile ergibt mit dem Trennzeichen ein einziges Feld, das es enthält
+    erste_zeile = next(csv.reader(io.StringIO(text), delimiter=trennzeichen))
+    verschachtelt = len(erste_zeile) == 1 and trennzeichen in erste_zeile[0]
+    if verschachtelt:
+        probe = "\n".join(zeile[0] for zeile in csv.reader(io.StringIO(text), delimiter=trennzeichen) if zeile)
+        trennzeichen = _trennzeichen(probe)
+
+    kopf_text = erste_zeile[0] if verschachtelt else text.splitlines()[0]
+    kopf = [name.strip() for name in next(csv.reader(io.StringIO(kopf_text), delimiter=trennzeichen))]
+    return {"trennzeichen": trennzeichen, "verschachtelt": verschachtelt, "kopf": kopf}
+
+
+def _trennzeichen(text: str) -> str:
+    try:
+        return csv.Sniffer().sniff("\n".join(text.splitlines()[:20]), delimiters=TRENNZEICHEN).delimiter
+    except csv.Error:
+        return ","
+
+
+def _verworfene_zeilen(meldungen, versatz: int = 0) -> list:
+    """Vom C-Parser übersprungene Zeilen als [{'zeile': Zeilennummer in der Datei, 'meldung': ...}]."""
+    verworfen = []
+    for meldung in meldungen:
+        for nummer, text in _VERWORFEN.findall(str(meldung.message)):
+            verworfen.append({"zeile": int(nummer) + versatz, "meldung": text.strip()})
+    return verworfen
+
+
+def _bereinigen(chunk: pd.DataFrame, kopf: list, na_werte) -> tuple:
+    """Leerzeichen und übrig gebliebene Anführungszeichen entfernen, wiederholte Kopfzeilen und Platzhalter entfernen."""
+    for spalte in chunk.columns:
+        chunk[spalte] = chunk[spalte].str.strip().str.strip('"').str.strip()
+    kopfzeile = (chunk == pd.Series(kopf, index=chunk.columns)).all(axis=1)
+    chunk = chunk[~kopfzeile]
+    return chunk.mask(chunk.isin(na_werte)), int(kopfzeile.sum())
+
+
+def _typen_bestimmen(chunk: pd.DataFrame) -> dict:
+    """Spalten, deren Werte (ohne NaN) alle Zahlen sind, werden numerisch."""
+    typen = {}
+    for spalte in chunk.columns:
+        werte = chunk[spalte].dropna()
+        zahlen = pd.to_numeric(werte, errors="coerce")
+        typen[spalte] = "zahl" if len(werte) and zahlen.notna().all() else "text"
+    return typen
+
+
+def repariere_csv(
+    eingabe: str,
+    ausgabe: str,
+    chunksize: int = 100_000,
+    na_werte=NA_WERTE,
+    encoding: str = "utf-8"
+    ) -> dict:
+    """
+    Repariert eine CSV-Datei blockweise:
+
+    - erkennt Zeilen, die als Ganzes gequotet sind, und parst deren Inhalt erneut mit dem C-Parser
+    - entfernt wiederholte Kopfzeilen, Leerzeichen und übrig gebliebene Anführungszeichen (vektorisiert)
+    - ersetzt Platzhalter wie 'X' durch NaN
+    - wandelt Spalten, die im ersten Block nur Zahlen enthalten, in Zahlen um
+
+    Parameters:
+        eingabe (str): Kaputte CSV-Datei.
+        ausgabe (str): Ziel (wird überschrieben).
+        chunksize (int): Zeilen pro Block.
+        na_werte (tuple): Werte, die als fehlend gelten.
+        encoding (str): Zeichenkodierung der Eingabe.
+
+    Returns:
+        dict: Format, Spaltentypen, Anzahl geschriebener Zeilen, entfernter Kopfzeilen
+              und nicht umwandelbarer Werte sowie die verworfenen Zeilen (falsche Anzahl Felder).
+    """
+    fmt = erkenne_format(eingabe, encoding)
+    kopf, trennzeichen = fmt["kopf"], fmt["trennzeichen"]
+    bericht = {**fmt, "zeilen": 0, "kopfzeilen_entfernt": 0, "nicht_umwandelbar": 0, "typen": None, "verworfen": []}
+
+    leser = pd.read_csv(
+        eingabe, header=None, skiprows=1, dtype=str, keep_default_na=False, encoding=encoding,
+        sep="\x1f" if fmt["verschachtelt"] else trennzeichen,
+        names=None if fmt["verschachtelt"] else kopf,
+        chunksize=chunksize, on_bad_lines="warn"
+    )
+    erster = True
+    gelesen = 0
+    while True:
+        with warnings.catch_warnings(record=True) as meldungen:
+            warnings.simplefilter("always", pd.errors.ParserWarning)
+            chunk = next(leser, None)
+        bericht["verworfen"] += _verworfene_zeilen(meldungen)
+        if chunk is None:
+            break
+        if fmt["verschachtelt"]:
+            # Innere Zeilen am Stück an den C-Parser geben, der die verdoppelten Anführungszeichen auflöst
+            with warnings.catch_warnings(record=True) as meldungen:
+                warnings.simplefilter("always", pd.errors.ParserWarning)
+                innen = pd.read_csv(
+                    io.StringIO("\n".join(chunk[0])), header=None, names=kopf, sep=trennzeichen,
+                    dtype=str, keep_default_na=False, on_bad_lines="warn"
+                )
+            # Zeile k des Blocks ist Zeile 1 + gelesen + k der Datei
+            bericht["verworfen"] += _verworfene_zeilen(meldungen, versatz=1 + gelesen)
+            gelesen += len(chunk)
+            chunk = innen
+        chunk, entfernt = _bereinigen(chunk, kopf, na_werte)
+        bericht["kopfzeilen_entfernt"] += entfernt
+
+        if bericht["typen"] is None:
+            bericht["typen"] = _typen_bestimmen(chunk)
+        for spalte, typ in bericht["typen"].items():
+            if typ == "zahl":
+                zahlen = pd.to_numeric(chunk[spalte], errors="coerce")
+                bericht["nicht_umwandelbar"] += int((zahlen.isna() & chunk[spalte].notna()).sum())
+                chunk[spalte] = zahlen
+
+        chunk.to_csv(ausgabe, mode="w" if erster else "a", header=erster, index=False)
+        bericht["zeilen"] += len(chunk)
+        erster = False
+
+    return bericht
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Repariert eine kaputte CSV-Datei.")
+    parser.add_argument("eingabe")
+    parser.add_argument("ausgabe")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--encoding", default="utf-8")
+    args = parser.parse_args()
+    print(repariere_csv(args.eingabe, args.ausgabe, args.chunksize, encoding=args.encoding))
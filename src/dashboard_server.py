@@ -0,0 +1,215 @@
+import argparse
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from aiohttp import web
+
+from impact_cube import Wirkungswuerfel
+from star_schema import Sternschema, sternschema_aus_dateien
+from visualisation import glaetten, plot_scenario_spec, seen_mit_sterbejahr_single
+
+
+SZENARIEN = ["RCP26", "RCP45", "RCP85"]
+STANDARD_WINDOW = 10
+MAX_FIGUREN = 1024
+# Kleine Antworten lohnen das Komprimieren nicht
+MIN_GZIP_BYTES = 512
+
+
+def etag_passt(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match: '*' oder eine kommagetrennte Liste von ETags; verglichen wird jedes exakt,
+    schwache ETags (W/"...") wie die starken (schwacher Vergleich, RFC 9110).
+    """
+    if if_none_match.strip() == "*":
+        return True
+    kandidaten = (teil.strip() for teil in if_none_match.split(","))
+    return any((k[2:] if k.startswith("W/") else k) == etag for k in kandidaten)
+
+
+class Antwort:
+    """Fertig serialisierte Antwort: JSON-Bytes, gzip-Variante und ETag werden einmal berechnet."""
+
+    def __init__(self, daten=None, json_text: str = None):
+        if json_text is None:
+            json_text = json.dumps(daten, ensure_ascii=False, separators=(",", ":"))
+        self.roh = json_text.encode("utf-8")
+        self.gzip = gzip.compress(self.roh, compresslevel=6) if len(self.roh) >= MIN_GZIP_BYTES else None
+        self.etag = f'"{hashlib.sha1(self.roh).hexdigest()[:20]}"'
+
+    def senden(self, request: web.Request) -> web.Response:
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+            "Access-Control-Allow-Origin": "*",
+        }
+        if etag_passt(request.headers.get("If-None-Match", ""), self.etag):
+            return web.Response(status=304, headers=headers)
+        if self.gzip is not None and "gzip" in request.headers.get("Accept-Encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return web.Response(body=self.gzip, content_type="application/json", headers=headers)
+        return web.Response(body=self.roh, content_type="application/json", headers=headers)
+
+
+class DashboardDaten:
+    """
+    Alles, was das Dashboard braucht, einmal beim Start berechnet:
+    die geglätteten Reihen aller Seen und Szenarien als Array (See, Szenario, Jahr),
+    die kritischen Temperaturen, die Aussterbetabellen pro Fisch und der Wirkungswürfel.
+    Anfragen lesen nur noch Zeilen aus diesen Arrays, es wird kein DataFrame gefiltert.
+    Mit vorberechnen=True liegen die Grafiken für window bereits fertig komprimiert vor.
+    """
+
+    def __init__(
+        self,
+        schema: Sternschema = None,
+        szenarien=SZENARIEN,
+        window: int = STANDARD_WINDOW,
+        vorberechnen: bool = True
+        ):
+        if schema is None:
+            schema = sternschema_aus_dateien()
+        self.schema = schema
+        self.szenarien = list(szenarien)
+
+        paare = schema.paare()
+        self.seen = sorted(paare["lake"].unique())
+        fische = schema.fische.loc[pd.unique(paare["Fisch"])]
+        self.fisch_namen = fische.index.tolist()
+        self.krit = dict(zip(self.fisch_namen, schema.kritische_temperaturen(self.fisch_namen)))
+        self.seen_pro_fisch = paare.groupby("Fisch", sort=False)["lake"].agg(list).to_dict()
+        self._reihen = {}
+        self._figuren = OrderedDict()
+        self.template = pio.templates["plotly_white"].to_plotly_json()
+        self.reihen(window)
+
+        self.seen_antwort = Antwort(self.seen)
+        self.fische_antwort = Antwort([
+            {
+                "fisch": fisch,
+                "name_wissenschaftlich": _text(zeile.get("Name wissenschaftlich")),
+                "gefaehrdungsstatus": _text(zeile.get("Gefährdungsstatus")),
+                "kritische_temperatur": _zahl(self.krit[fisch]),
+                "seen": self.seen_pro_fisch[fisch],
+            }
+            for fisch, zeile in fische.iterrows()
+        ])
+
+        # Alle Paare: dieselbe Tabelle dient den Aussterbetabellen und dem Wirkungswürfel
+        sterbejahre = schema.sterbejahre()
+        self.tabellen = {}
+        for fisch in self.fisch_namen:
+            tabelle = seen_mit_sterbejahr_single(None, fisch, self.szenarien, sterbejahre=sterbejahre)
+            self.tabellen[fisch] = Antwort({"spalten": tabelle.columns.tolist(), "zeilen": tabelle.values.tolist()})
+
+        jahre = np.sort(schema.temperaturen["year"].unique())
+        self.wirkung = Wirkungswuerfel.aus_sterbejahren(sterbejahre, schema.fische, jahre)
+        self.wirkung_antwort = Antwort(self.wirkung.als_json())
+
+        # Alle Grafiken für das Standardfenster vorab serialisieren (ca. 2 ms pro Paar)
+        if vorberechnen:
+            for fisch, seen in self.seen_pro_fisch.items():
+                for see in seen:
+                    self.figur(fisch, see, window)
+
+    def reihen(self, window: int) -> tuple:
+        """Geglättete Reihen für ein Fenster: (Zeile pro (See, Szenario), Jahre, Mittel, Std), einmal pro Fenster."""
+        if window not in self._reihen:
+            index, jahre, mean, std = glaetten(self.schema.temperaturen, window, schluessel=("lake", "scenario"))
+            zeilen = {schluessel: i for i, schluessel in enumerate(index)}
+            self._reihen[window] = (zeilen, jahre, mean, std)
+        return self._reihen[window]
+
+    def figur(self, fisch: str, see: str, window: int) -> Antwort:
+        """Plotly-JSON von plot_scenario für ein Paar; die zuletzt verwendeten MAX_FIGUREN bleiben serialisiert."""
+        schluessel = (fisch, see, window)
+        antwort = self._figuren.get(schluessel)
+        if antwort is None:
+            zeilen, jahre, mean, std = self.reihen(window)
+            szenarien = [s for s in self.szenarien if (see, s) in zeilen]
+            idx = [zeilen[(see, s)] for s in szenarien]
+            spec = plot_scenario_spec(see, fisch, self.krit[fisch], szenarien, jahre, mean[idx], std[idx])
+            # Ohne go.Figure: keine Validierung, das Template wird nur einmal aufgelöst
+            spec["layout"]["template"] = self.template
+            antwort = Antwort(json_text=pio.to_json(spec, validate=False))
+            self._figuren[schluessel] = antwort
+            if len(self._figuren) > MAX_FIGUREN:
+                self._figuren.popitem(last=False)
+        else:
+            self._figuren.move_to_end(schluessel)
+        return antwort
+
+
+def _text(wert):
+    return None if pd.isna(wert) else str(wert).strip()
+
+
+def _zahl(wert):
+    return None if wert is None or np.isnan(wert) else float(wert)
+
+
+def _window(request: web.Request) -> int:
+    try:
+        window = int(request.query.get("window", STANDARD_WINDOW))
+    except ValueError:
+        raise web.HTTPBadRequest(text="window muss eine ganze Zahl sein")
+    if not 1 <= window <= 50:
+        raise web.HTTPBadRequest(text="window muss zwischen 1 und 50 liegen")
+    return window
+
+
+async def seen_liste(request: web.Request) -> web.Response:
+    return request.app["daten"].seen_antwort.senden(request)
+
+
+async def fische_liste(request: web.Request) -> web.Response:
+    return request.app["daten"].fische_antwort.senden(request)
+
+
+async def sterbejahre(request: web.Request) -> web.Response:
+    daten = request.app["daten"]
+    fisch = request.match_info["fisch"]
+    if fisch not in daten.tabellen:
+        raise web.HTTPNotFound(text=f"Unbekannter Fisch: {fisch}")
+    return daten.tabellen[fisch].senden(request)
+
+
+async def plot(request: web.Request) -> web.Response:
+    daten = request.app["daten"]
+    fisch, see = request.query.get("fisch"), request.query.get("see")
+    if fisch not in daten.seen_pro_fisch or see not in daten.seen_pro_fisch[fisch]:
+        raise web.HTTPNotFound(text=f"Kein Vorkommen von {fisch} in {see}")
+    return daten.figur(fisch, see, _window(request)).senden(request)
+
+
+async def wirkung(request: web.Request) -> web.Response:
+    return request.app["daten"].wirkung_antwort.senden(request)
+
+
+def app_erstellen(daten: DashboardDaten = None) -> web.Application:
+    """
+    aiohttp-Anwendung mit den Endpunkten
+    /api/seen, /api/fische, /api/sterbejahre/{fisch}, /api/wirkung und /api/plot?fisch=...&see=...&window=10.
+    """
+    app = web.Application()
+    app["daten"] = daten if daten is not None else DashboardDaten()
+    app.router.add_get("/api/seen", seen_liste)
+    app.router.add_get("/api/fische", fische_liste)
+    app.router.add_get("/api/sterbejahre/{fisch}", sterbejahre)
+    app.router.add_get("/api/wirkung", wirkung)
+    app.router.add_get("/api/plot", plot)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokaler Server für das Dashboard.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    args = parser.parse_args()
+    web.run_app(app_erstellen(), host=args.host, port=args.port)
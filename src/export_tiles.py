@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from geo import kartenpunkte, lade_koordinaten
+from impact_cube import wirkungswuerfel
+from merged_store import DATA_DIR
+from star_schema import sternschema_aus_dateien
+from thermal_stress import stress_tabelle
+from visualisation import erste_ueberschreitung, glaetten, seen_mit_sterbejahr_single, sterbejahre_pro_szenario
+
+
+WEBSTORY_ORDNER = os.path.join(DATA_DIR, "..", "webstory_fisch")
+KACHEL_ORDNER = os.path.join(WEBSTORY_ORDNER, "data")
+INDEX_NAME = "index.json"
+# Versionsordner: die ersten 12 Hex-Zeichen des Inhalts-Hashes
+VERSION_MUSTER = re.compile(r"[0-9a-f]{12}")
+
+# Anzahl Nachkommastellen in den Kacheln (Rohdaten haben 2)
+NACHKOMMASTELLEN = 2
+
+
+def kachel_name(name: str) -> str:
+    """Dateiname (ohne Endung) für einen See oder Fisch."""
+    return re.sub(r"[^\w-]+", "_", name).strip("_")
+
+
+def _liste(werte: np.ndarray) -> list:
+    """Gerundete Liste für JSON, NaN wird zu null (erst beim Schreiben, siehe _dump)."""
+    werte = np.round(np.asarray(werte, dtype=np.float64), NACHKOMMASTELLEN)
+    return [None if np.isnan(w) else float(w) for w in werte]
+
+
+def _ganzzahl(wert):
+    """Ganze Zahl (Jahr, Anzahl Tage) als int, fehlend/NaN als None."""
+    return None if pd.isna(wert) else int(wert)
+
+
+def see_kacheln(temperaturen: pd.DataFrame, window: int = 10) -> dict:
+    """
+    Geglättete Reihen und Band (± 1 Std) pro See und Szenario, gemittelt über die Tiefen
+    wie in plot_scenario. Die Reihen bleiben ungerundete Arrays, damit fisch_kacheln die
+    Überschreitung mit denselben Werten wie plot_scenario bestimmt; gerundet wird in _dump.
+
+    Returns:
+        dict: {See: Kachel}
+    """
+    index, jahre, mean, std = glaetten(temperaturen, window, schluessel=("lake", "scenario"))
+    kacheln = {}
+    for i, (see, szenario) in enumerate(index):
+        kachel = kacheln.setdefault(see, {"see": see, "window": window, "jahre": jahre.tolist(), "szenarien": {}})
+        kachel["szenarien"][szenario] = {"mittel": mean[i], "std": std[i]}
+    return kacheln
+
+
+def fisch_kacheln(schema, see_kachel: dict, szenarien=("RCP26", "RCP45", "RCP85"), stress: pd.DataFrame = None) -> dict:
+    """
+    Pro Fisch: kritische Temperatur, Überschreitungsjahr der geglätteten Reihe pro See und Szenario
+    und die Aussterbetabelle aus seen_mit_sterbejahr_single. Optional aus thermal_stress.stress_tabelle
+    die Tage über der kritischen Temperatur pro See, Szenario und Periode (ungünstigste Tiefe).
+
+    Returns:
+        dict: {Fisch: Kachel}
+    """
+    sterbejahre = schema.sterbejahre()
+    paare = schema.paare()
+    krit_alle = pd.to_numeric(schema.fische["Kritische Temperatur °C"], errors="coerce").astype(np.float64)
+
+    hitzetage = {}
+    if stress is not None:
+        pro_periode = stress.groupby(["Fisch", "lake", "scenario", "period"], sort=False)["tage_ueber"].max()
+        for (fisch, see, szenario, periode), tage in pro_periode.items():
+            eintrag = hitzetage.setdefault(fisch, {}).setdefault(see, {}).setdefault(szenario, {})
+            eintrag[periode] = _ganzzahl(tage)
+
+    kacheln = {}
+    for fisch, seen in paare.groupby("Fisch", sort=False)["lake"]:
+        krit = krit_alle[fisch]
+        ueberschreitung = {}
+        for see in seen:
+            kachel = see_kachel[see]
+            jahre = kachel["jahre"]
+            reihen = kachel["szenarien"]
+            mittel = np.array([reihen[s]["mittel"] for s in reihen])
+            erste = erste_ueberschreitung(mittel, krit)
+            ueberschreitung[see] = {s: (jahre[k] if k >= 0 else None) for s, k in zip(reihen, erste)}
+
+        tabelle = seen_mit_sterbejahr_single(None, fisch, list(szenarien), sterbejahre=sterbejahre)
+        kacheln[fisch] = {
+            "fisch": fisch,
+            "name_wissenschaftlich": schema.fische.at[fisch, "Name wissenschaftlich"],
+            "gefaehrdungsstatus": schema.fische.at[fisch, "Gefährdungsstatus"],
+            "kritische_temperatur": None if np.isnan(krit) else float(krit),
+            "ueberschreitung": ueberschreitung,
+            "hitzetage": hitzetage.get(fisch, {}),
+            "sterbejahre": {
+                "spalten": list(tabelle.columns),
+                "zeilen": [[row[0], *(_ganzzahl(w) for w in row[1:])] for row in tabelle.itertuples(index=False)]
+            },
+        }
+    return kacheln
+
+
+def karten_kachel(schema, sterbejahre: pd.DataFrame, szenarien=("RCP26", "RCP45", "RCP85")) -> dict:
+    """
+    Punkte für die Kartenebene über Karte_Schweiz_ohne_hintergrund.png: pro See Koordinaten,
+    Pixelposition, Anzahl Fischarten und pro Szenario die Anzahl Arten, die bis 2099 aussterben.
+    """
+    pro_szenario = sterbejahre_pro_szenario(sterbejahre, list(szenarien))
+    ausgestorben = (pro_szenario > 0).groupby(level='lake').sum()
+    arten = pro_szenario.groupby(level='lake').size()
+
+    punkte = kartenpunkte(lade_koordinaten())
+    punkte = punkte[punkte['lake'].isin(schema.seen)]
+    return {
+        "seen": [
+            {
+                "see": zeile.lake,
+                "lat": zeile.Latitude,
+                "lon": zeile.Longitude,
+                "x": round(zeile.x, 1),
+                "y": round(zeile.y, 1),
+                "arten": int(arten.get(zeile.lake, 0)),
+                "ausgestorben": {s: int(ausgestorben[s].get(zeile.lake, 0)) for s in szenarien},
+            }
+            for zeile in punkte.itertuples(index=False)
+        ]
+    }
+
+
+def _dump(daten) -> bytes:
+    """Kompaktes JSON; numpy-Arrays werden dabei als gerundete Listen geschrieben."""
+    return json.dumps(daten, ensure_ascii=False, separators=(",", ":"), default=_liste).encode("utf-8")
+
+
+def _fruehere_versionen(ordner: str) -> set:
+    """Versionen (12 Hex-Zeichen), auf die der bestehende index.json in ordner verweist."""
+    pfad = os.path.join(ordner, INDEX_NAME)
+    if not os.path.exists(pfad):
+        return set()
+    with open(pfad, encoding="utf-8") as f:
+        index = json.load(f)
+    pfade = [index.get("karte"), index.get("wirkung"), *index.get("seen", {}).values(), *index.get("fische", {}).values()]
+    versionen = {index.get("version")} | {p.split("/", 1)[0] for p in pfade if isinstance(p, str)}
+    return {v for v in versionen if isinstance(v, str) and VERSION_MUSTER.fullmatch(v)}
+
+
+def kacheln_exportieren(ordner: str = KACHEL_ORDNER, window: int = 10) -> str:
+    """
+    Schreibt die Datenkacheln für die Webstory:
+
+    - <ordner>/<version>/seen/<See>.json
+    - <ordner>/<version>/fische/<Fisch>.json
+    - <ordner>/<version>/karte.json
+    - <ordner>/<version>/wirkung.json (Ereignisse des Wirkungswürfels, siehe impact_cube)
+    - <ordner>/index.json mit der aktuellen Version und den Pfaden aller Kacheln
+
+    Die Version ist ein Hash über den Inhalt aller Kacheln, die Dateien in einem Versionsordner
+    ändern sich also nie und dürfen vom Browser unbegrenzt gecacht werden. Nur index.json
+    wird bei jedem Export überschrieben. Der Versionsordner des bisherigen index.json wird gelöscht,
+    andere Ordner in ordner bleiben unberührt.
+
+    Returns:
+        str: Version der geschriebenen Kacheln.
+    """
+    schema = sternschema_aus_dateien()
+    seen = see_kacheln(schema.temperaturen, window)
+    fische = fisch_kacheln(schema, seen, stress=stress_tabelle(schema))
+
+    dateien = {f"seen/{kachel_name(see)}.json": _dump(kachel) for see, kachel in seen.items()}
+    dateien.update({f"fische/{kachel_name(fisch)}.json": _dump(kachel) for fisch, kachel in fische.items()})
+    dateien["karte.json"] = _dump(karten_kachel(schema, schema.sterbejahre()))
+    dateien["wirkung.json"] = _dump(wirkungswuerfel(schema).als_json())
+
+    h = hashlib.sha256()
+    for pfad in sorted(dateien):
+        h.update(pfad.encode())
+        h.update(dateien[pfad])
+    version = h.hexdigest()[:12]
+
+    versions_ordner = os.path.join(ordner, version)
+    for unterordner in ["seen", "fische"]:
+        os.makedirs(os.path.join(versions_ordner, unterordner), exist_ok=True)
+    for pfad, inhalt in dateien.items():
+        with open(os.path.join(versions_ordner, pfad), "wb") as f:
+            f.write(inhalt)
+
+    index = {
+        "version": version,
+        "seen": {see: f"{version}/seen/{kachel_name(see)}.json" for see in seen},
+        "fische": {fisch: f"{version}/fische/{kachel_name(fisch)}.json" for fisch in fische},
+        "karte": f"{version}/karte.json",
+        "wirkung": f"{version}/wirkung.json",
+    }
+    frueher = _fruehere_versionen(ordner)
+    with open(os.path.join(ordner, INDEX_NAME), "wb") as f:
+        f.write(_dump(index))
+
+    # Nur Versionsordner löschen, die der bisherige index.json genannt hat (ordner kann z.B. img/ enthalten)
+    for alt in frueher - {version}:
+        pfad = os.path.join(ordner, alt)
+        if os.path.isdir(pfad):
+            shutil.rmtree(pfad)
+
+    groesse = sum(len(inhalt) for inhalt in dateien.values())
+    print(f"{len(dateien)} Kacheln exportiert ({groesse / 1024:.0f} kB), Version {version}")
+    return version
+
+
+if __name__ == "__main__":
+    kacheln_exportieren()
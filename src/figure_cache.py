@@ -0,0 +1,172 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.io as pio
+
+import visualisation
+from batch_render import code_version, daten_hash
+from merged_store import DATA_DIR
+
+
+CACHE_ORDNER = os.path.join(DATA_DIR, "cache", "figures")
+
+# Spalten, die die Plot-Funktionen lesen (inklusive der Auswahl nach See und Fisch)
+FINGERPRINT_SPALTEN = ("Fisch", "lake", "scenario", "depth", "year", "temperature_avg", "Kritische Temperatur °C")
+
+
+def daten_fingerprint(df: pd.DataFrame) -> str:
+    """Hash der verwendeten Spalten des ganzen DataFrames (einmal pro DataFrame, siehe FigurenCache)."""
+    return daten_hash(df[[s for s in FINGERPRINT_SPALTEN if s in df.columns]])
+
+
+def fingerprint(daten: str, see: str, fisch: str, funktion: str, *parameter, version: str = "", **optionen) -> str:
+    """
+    Schlüssel einer Grafik: Daten-Hash (daten_fingerprint), See, Fisch, Name der Plot-Funktion,
+    Parameter (z.B. window) und Version des Plot-Codes.
+    """
+    parameter = json.dumps([funktion, see, fisch, parameter, optionen], sort_keys=True, default=str)
+    return hashlib.sha256(f"{daten}|{parameter}|{version}".encode()).hexdigest()[:24]
+
+
+def _kopie(fig):
+    """Unabhängige Kopie einer Figur."""
+    return type(fig)(fig)
+
+
+class FigurenCache:
+    """
+    Zwischenspeicher für die Grafiken aus visualisation.py, z.B. für Dashboard-Callbacks,
+    in denen dieselben Fisch-See-Kombinationen immer wieder angefragt werden.
+
+    Stufe 1 hält die zuletzt verwendeten maxgroesse Figuren im Speicher (LRU),
+    Stufe 2 (optional, ordner, z.B. CACHE_ORDNER) legt jede Figur als Plotly-JSON auf der Festplatte ab und
+    überlebt damit Neustarts und wird von mehreren Prozessen geteilt.
+
+    Jeder Aufruf liefert eine eigene Kopie der Figur, Änderungen daran erreichen den Cache nicht.
+    kopie=False gibt die geteilte Figur zurück (schneller, nur wenn sie niemand verändert).
+
+    Der Daten-Hash wird pro DataFrame nur beim ersten Aufruf berechnet; ein DataFrame darf
+    danach nicht mehr verändert werden (für neue Daten einen neuen DataFrame übergeben).
+    """
+
+    def __init__(self, maxgroesse: int = 64, ordner: str = None, kopie: bool = True):
+        self.maxgroesse = maxgroesse
+        self.ordner = ordner
+        self.kopie = kopie
+        # Ändert sich der Plot-Code, passen die alten Einträge auf der Festplatte nicht mehr
+        self.version = code_version("figure_cache")
+        self._figuren = OrderedDict()
+        # id(df) -> (schwache Referenz, daten_fingerprint)
+        self._daten = {}
+        self._lock = threading.Lock()
+        self.treffer = 0
+        self.disk_treffer = 0
+        self.fehlschlaege = 0
+        if ordner:
+            os.makedirs(ordner, exist_ok=True)
+
+    def _pfad(self, schluessel: str) -> str:
+        return os.path.join(self.ordner, f"{schluessel}.json")
+
+    def _ablegen(self, schluessel: str, fig) -> None:
+        with self._lock:
+            self._figuren[schluessel] = fig
+            self._figuren.move_to_end(schluessel)
+            while len(self._figuren) > self.maxgroesse:
+                self._figuren.popitem(last=False)
+
+    def _daten_fingerprint(self, df: pd.DataFrame) -> str:
+        with self._lock:
+            eintrag = self._daten.get(id(df))
+        if eintrag is not None and eintrag[0]() is df:
+            return eintrag[1]
+        h = daten_fingerprint(df)
+        schluessel = id(df)
+        # Wird der DataFrame freigegeben, verschwindet auch sein Eintrag (die id kann neu vergeben werden)
+        ref = weakref.ref(df, lambda _: self._daten.pop(schluessel, None))
+        with self._lock:
+            self._daten[schluessel] = (ref, h)
+        return h
+
+    def _ausgabe(self, fig):
+        return _kopie(fig) if self.kopie else fig
+
+    def abrufen(self, funktion, df: pd.DataFrame, see: str, fisch: str, *parameter, **optionen):
+        """
+        Liefert funktion(df, see, fisch, *parameter, **optionen) aus dem Cache
+        oder erzeugt die Figur und legt sie in beiden Stufen ab.
+        """
+        schluessel = fingerprint(
+            self._daten_fingerprint(df), see, fisch, funktion.__name__, *parameter, version=self.version, **optionen
+        )
+
+        with self._lock:
+            fig = self._figuren.get(schluessel)
+            if fig is not None:
+                self._figuren.move_to_end(schluessel)
+                self.treffer += 1
+                return self._ausgabe(fig)
+
+        if self.ordner and os.path.exists(self._pfad(schluessel)):
+            with open(self._pfad(schluessel), "r", encoding="utf-8") as f:
+                fig = pio.from_json(f.read())
+            self._ablegen(schluessel, fig)
+            with self._lock:
+                self.disk_treffer += 1
+            return self._ausgabe(fig)
+
+        fig = funktion(df, see, fisch, *parameter, **optionen)
+        with self._lock:
+            self.fehlschlaege += 1
+        self._ablegen(schluessel, fig)
+        if self.ordner:
+            # Erst vollständig schreiben, dann umbenennen: andere Prozesse sehen nie halbe Dateien
+            tmp = f"{self._pfad(schluessel)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(fig.to_json())
+            os.replace(tmp, self._pfad(schluessel))
+        return self._ausgabe(fig)
+
+    def umhuellen(self, funktion):
+        """Plot-Funktion mit Signatur (df, see, fisch, ...) als gecachte Variante."""
+        @functools.wraps(funktion)
+        def gecacht(df, see, fisch, *parameter, **optionen):
+            return self.abrufen(funktion, df, see, fisch, *parameter, **optionen)
+        gecacht.cache = self
+        return gecacht
+
+    def statistik(self) -> dict:
+        """Treffer (Speicher, Festplatte), Fehlschläge, Trefferquote und aktuelle Grösse."""
+        with self._lock:
+            anfragen = self.treffer + self.disk_treffer + self.fehlschlaege
+            return {
+                "treffer": self.treffer,
+                "disk_treffer": self.disk_treffer,
+                "fehlschlaege": self.fehlschlaege,
+                "trefferquote": (self.treffer + self.disk_treffer) / anfragen if anfragen else 0.0,
+                "groesse": len(self._figuren),
+                "maxgroesse": self.maxgroesse,
+            }
+
+    def leeren(self, festplatte: bool = False) -> None:
+        """Leert den Speicher (und auf Wunsch die Festplatten-Stufe) und setzt die Statistik zurück."""
+        with self._lock:
+            self._figuren.clear()
+            self._daten.clear()
+            self.treffer = self.disk_treffer = self.fehlschlaege = 0
+        if festplatte and self.ordner:
+            for datei in os.listdir(self.ordner):
+                if datei.endswith(".json"):
+                    os.remove(os.path.join(self.ordner, datei))
+
+
+# Standard-Cache für das Dashboard (nur Speicher)
+STANDARD_CACHE = FigurenCache()
+plot_scenario = STANDARD_CACHE.umhuellen(visualisation.plot_scenario)
+plot_forelle_scenario_animated_lines = STANDARD_CACHE.umhuellen(visualisation.plot_forelle_scenario_animated_lines)
@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from merged_store import DATA_DIR
+from name_registry import Namen, SEE_ALIASE
+from star_schema import einzugsgebiete
+
+
+KOORDINATEN_PFAD = os.path.join(DATA_DIR, "see_lat_lon_final.csv")
+ERDRADIUS_KM = 6371.0088
+
+# Ausdehnung der Schweiz (lon_min, lat_min, lon_max, lat_max), Standard für Karte_Schweiz_ohne_hintergrund.png
+SCHWEIZ_GRENZEN = (5.956, 45.818, 10.492, 47.808)
+
+
+def lade_koordinaten(pfad: str = KOORDINATEN_PFAD) -> pd.DataFrame:
+    """Liest die Seen-Koordinaten (See, Latitude, Longitude) mit Spalte lake statt See."""
+    return pd.read_csv(pfad).rename(columns={'See': 'lake'})
+
+
+def einheitsvektoren(lat, lon) -> np.ndarray:
+    """Punkte auf der Kugel als 3D-Einheitsvektoren (n x 3)."""
+    lat, lon = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Grosskreisdistanz in km (vektorisiert)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * ERDRADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _sehne(distanz_km):
+    """Grosskreisdistanz -> Sehnenlänge auf der Einheitskugel (monoton, daher für den KD-Baum geeignet)."""
+    return 2 * np.sin(np.minimum(np.asarray(distanz_km, dtype=np.float64) / ERDRADIUS_KM, np.pi) / 2)
+
+
+def _bogen_km(sehne):
+    """Sehnenlänge auf der Einheitskugel -> Grosskreisdistanz in km."""
+    return 2 * ERDRADIUS_KM * np.arcsin(np.clip(np.asarray(sehne) / 2, 0.0, 1.0))
+
+
+class SeenIndex:
+    """
+    Räumlicher Index über die Seen (oder Messstellen) für Umkreis- und Nächste-Nachbarn-Abfragen.
+
+    Die Punkte liegen als Einheitsvektoren in einem KD-Baum. Die Sehnenlänge zwischen zwei
+    Einheitsvektoren wächst monoton mit der Grosskreisdistanz, die Abfragen liefern also
+    exakt dieselben Treffer wie ein Haversine-Vergleich, aber in O(log n) statt über alle Paare.
+    """
+
+    def __init__(self, koordinaten: pd.DataFrame = None):
+        if koordinaten is None:
+            koordinaten = lade_koordinaten()
+        self.koordinaten = koordinaten.reset_index(drop=True)
+        # Seenamen auch unter ihren Aliasen ('L. Maggiore'), siehe name_registry
+        self.namen = Namen(self.koordinaten['lake'], SEE_ALIASE)
+        self.baum = cKDTree(einheitsvektoren(self.koordinaten['Latitude'], self.koordinaten['Longitude']))
+
+    def _ergebnis(self, idx, sehnen) -> pd.DataFrame:
+        df = self.koordinaten.iloc[idx].reset_index(drop=True)
+        df['distanz_km'] = _bogen_km(sehnen)
+        return df.sort_values('distanz_km', kind='stable').reset_index(drop=True)
+
+    def im_umkreis(self, lat: float, lon: float, radius_km: float) -> pd.DataFrame:
+        """Alle Seen im Umkreis von radius_km um (lat, lon), nach Distanz sortiert."""
+        punkt = einheitsvektoren(lat, lon)
+        idx = np.asarray(self.baum.query_ball_point(punkt, _sehne(radius_km)), dtype=int)
+        sehnen = np.linalg.norm(self.baum.data[idx] - punkt, axis=1)
+        return self._ergebnis(idx, sehnen)
+
+    def naechste(self, lat: float, lon: float, k: int = 5) -> pd.DataFrame:
+        """Die k nächsten Seen zu (lat, lon), nach Distanz sortiert."""
+        k = min(k, len(self.koordinaten))
+        sehnen, idx = self.baum.query(einheitsvektoren(lat, lon), k=k)
+        return self._ergebnis(np.atleast_1d(idx), np.atleast_1d(sehnen))
+
+    def nachbarn(self, see: str, radius_km: float) -> pd.DataFrame:
+        """
+        Alle anderen Seen im Umkreis von radius_km um einen See (Name oder Alias).
+        Unbekannte Seen ergeben einen KeyError.
+        """
+        zeile = self.koordinaten.iloc[self.namen.id(see)]
+        treffer = self.im_umkreis(zeile['Latitude'], zeile['Longitude'], radius_km)
+        return treffer[treffer['lake'] != zeile['lake']].reset_index(drop=True)
+
+
+def einzugsgebiet_aggregate(tabelle: pd.DataFrame, fische: pd.DataFrame, koordinaten: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Fasst eine Aussterbetabelle aus visualisation.seen_mit_sterbejahr (Fisch, lake,
+    'Aussterbejahr bei ...', 0 = stirbt nie) pro Einzugsgebiet der Fische zusammen.
+    Ein Fisch mit mehreren Einzugsgebieten ('Rhein, Rhone, Doubs') zählt in jedem davon
+    (siehe star_schema.einzugsgebiete), die Summe über alle Gebiete ist also grösser als die Anzahl Paare.
+
+    Parameters:
+        tabelle (pd.DataFrame): Ergebnis von seen_mit_sterbejahr.
+        fische (pd.DataFrame): Fisch-Dimension mit Spalte Einzugsgebiet (z.B. Sternschema.fische).
+        koordinaten (pd.DataFrame): Seen-Koordinaten (Standard: see_lat_lon_final.csv).
+
+    Returns:
+        pd.DataFrame: Pro Einzugsgebiet Anzahl Paare und Seen, Schwerpunkt der Seen (Latitude, Longitude)
+                      und pro Szenario den Anteil ausgestorbener Paare, das früheste und das mittlere Aussterbejahr.
+    """
+    if koordinaten is None:
+        koordinaten = lade_koordinaten()
+    jahr_spalten = [spalte for spalte in tabelle.columns if str(spalte).startswith("Aussterbejahr bei ")]
+
+    gebiete = fische['Einzugsgebiet'].map(einzugsgebiete).rename('Einzugsgebiet')
+    df = tabelle.merge(gebiete, left_on='Fisch', right_index=True, how='left')
+    df['Einzugsgebiet'] = df['Einzugsgebiet'].map(lambda g: g if isinstance(g, list) else einzugsgebiete(None))
+    df = df.explode('Einzugsgebiet', ignore_index=True)
+    df = df.merge(koordinaten, on='lake', how='left')
+    gruppen = df.groupby('Einzugsgebiet', sort=True)
+
+    ergebnis = gruppen.agg(
+        anzahl_paare=('Fisch', 'size'),
+        anzahl_seen=('lake', 'nunique'),
+        Latitude=('Latitude', 'mean'),
+        Longitude=('Longitude', 'mean'),
+    )
+    jahre = df[jahr_spalten].where(df[jahr_spalten] > 0)
+    for spalte in jahr_spalten:
+        szenario = spalte.replace("Aussterbejahr bei ", "")
+        ergebnis[f"Anteil ausgestorben {szenario}"] = jahre[spalte].notna().groupby(df['Einzugsgebiet']).mean()
+        ergebnis[f"Frühestes Aussterbejahr {szenario}"] = jahre[spalte].groupby(df['Einzugsgebiet']).min()
+        ergebnis[f"Mittleres Aussterbejahr {szenario}"] = jahre[spalte].groupby(df['Einzugsgebiet']).median()
+    return ergebnis.reset_index()
+
+
+def kartenpunkte(
+    df: pd.DataFrame,
+    breite: int = 1359,
+    hoehe: int = 922,
+    grenzen: tuple = SCHWEIZ_GRENZEN
+    ) -> pd.DataFrame:
+    """
+    Ergänzt Pixelkoordinaten x, y (Ursprung oben links) für eine Karte mit den gegebenen
+    geografischen Grenzen, standardmässig Karte_Schweiz_ohne_hintergrund.png (1359 x 922).
+    """
+    lon_min, lat_min, lon_max, lat_max = grenzen
+    df = df.copy()
+    df['x'] = (df['Longitude'] - lon_min) / (lon_max - lon_min) * breite
+    df['y'] = (lat_max - df['Latitude']) / (lat_max - lat_min) * hoehe
+    return df
@@ -0,0 +1,279 @@
+import hashlib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps, features
+
+from merged_store import DATA_DIR
+
+
+WEBSTORY_ORDNER = os.path.join(DATA_DIR, "..", "webstory_fisch")
+IMG_ORDNER = os.path.join(WEBSTORY_ORDNER, "img")
+AUSGABE_ORDNER = os.path.join(IMG_ORDNER, "opt")
+INDEX_PFAD = os.path.join(WEBSTORY_ORDNER, "index.html")
+SCRAPER_ORDNER = os.path.join(DATA_DIR, "img_webscrape", "img_scraper")
+MANIFEST_NAME = "manifest.json"
+
+BREITEN = (480, 960, 1600)
+# AVIF kann Pillow erst ab 11.2 schreiben (requirements.txt: 10.1.0), fehlt es, nur WebP
+FORMATE = ("avif", "webp")
+ENDUNGEN = (".jpg", ".jpeg", ".png")
+QUALITAET = {"avif": 55, "webp": 78, "jpg": 82}
+
+# sizes pro CSS-Klasse (angezeigte Breite laut index.html/style.css); ein sizes-Attribut im
+# ursprünglichen <img> hat Vorrang. 100vw nur für Hintergründe über die ganze Breite.
+SIZES = {
+    "banner-logo": "71px",  # height: 42px bei 291 x 173
+    "forelle-anim-img": "(max-width: 400px) 80vw, 320px",
+    "card-img-top": "(max-width: 600px) 100vw, 600px",  # .fish-card max-width
+    "video-bg": "100vw",
+}
+
+# Dateinamen enthalten den Inhalts-Hash und ändern sich nie -> unbegrenzt cachen (Apache)
+HTACCESS = """<IfModule mod_headers.c>
+    Header set Cache-Control "public, max-age=31536000, immutable"
+</IfModule>
+"""
+
+
+def datei_hash(pfad: str) -> str:
+    with open(pfad, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def _basisname(pfad: str) -> str:
+    return re.sub(r"[^\w-]+", "_", os.path.splitext(os.path.basename(pfad))[0]).strip("_")
+
+
+def _ausgabe_format(bild: Image.Image) -> str:
+    """Ersatzformat für alte Browser: PNG bei Transparenz, sonst JPG."""
+    transparent = bild.mode in ("RGBA", "LA") or (bild.mode == "P" and "transparency" in bild.info)
+    return "png" if transparent else "jpg"
+
+
+def verfuegbare_formate(formate=FORMATE) -> tuple:
+    """Die Formate, die das installierte Pillow schreiben kann."""
+    return tuple(fmt for fmt in formate if features.check(fmt))
+
+
+def varianten_erzeugen(pfad: str, ausgabe: str, breiten=BREITEN, formate=FORMATE) -> dict:
+    """
+    Erzeugt für ein Bild verkleinerte Varianten in den modernen Formaten und im Ersatzformat
+    (läuft im Worker-Prozess). Die Dateinamen enthalten den Hash der Quelle, bereits vorhandene
+    Dateien werden nicht neu kodiert. Formate, die Pillow nicht schreiben kann, fallen weg;
+    die EXIF-Ausrichtung wird vor dem Verkleinern angewendet.
+
+    Returns:
+        dict: hash, breite, hoehe und varianten {format: [[breite, dateiname], ...]}
+    """
+    h = datei_hash(pfad)
+    with Image.open(pfad) as bild:
+        bild.load()
+        ersatz = _ausgabe_format(bild)
+        # Hochformat-Fotos tragen die Drehung oft nur im EXIF-Tag, die Varianten haben keins mehr
+        bild = ImageOps.exif_transpose(bild).convert("RGBA" if ersatz == "png" else "RGB")
+        breite, hoehe = bild.size
+
+        # Nur verkleinern; ist das Bild schmaler als alle Stufen, bleibt die Originalbreite
+        ziel_breiten = sorted({b for b in breiten if b < breite} | {min(breite, max(breiten))})
+        varianten = {fmt: [] for fmt in (*verfuegbare_formate(formate), ersatz)}
+        for ziel in ziel_breiten:
+            kopie = None
+            for fmt in varianten:
+                name = f"{_basisname(pfad)}-{h}-{ziel}.{fmt}"
+                ziel_pfad = os.path.join(ausgabe, name)
+                if not os.path.exists(ziel_pfad):
+                    if kopie is None:
+                        kopie = bild if ziel == breite else bild.resize(
+                            (ziel, max(1, round(hoehe * ziel / breite))), Image.LANCZOS
+                        )
+                    optionen = {"optimize": True} if fmt == "png" else {"quality": QUALITAET[fmt]}
+                    kopie.save(ziel_pfad, format="JPEG" if fmt == "jpg" else fmt.upper(), **optionen)
+                varianten[fmt].append([ziel, name])
+
+    return {"hash": h, "breite": breite, "hoehe": hoehe, "varianten": varianten}
+
+
+def bilder_optimieren(
+    ordner: str = IMG_ORDNER,
+    ausgabe: str = AUSGABE_ORDNER,
+    breiten=BREITEN,
+    formate=FORMATE,
+    dateien=None,
+    max_workers: int = None
+    ) -> dict:
+    """
+    Optimiert alle (oder nur die in dateien genannten) JPG/PNG-Bilder in ordner auf einem Prozess-Pool.
+    Bilder, deren Hash im Manifest steht und deren Varianten existieren, werden übersprungen.
+    Für die Bilder aus dem Scraper z.B. bilder_optimieren(SCRAPER_ORDNER, ...).
+
+    Returns:
+        dict: Manifest {Dateiname der Quelle: Ergebnis von varianten_erzeugen}
+    """
+    os.makedirs(ausgabe, exist_ok=True)
+    manifest_pfad = os.path.join(ausgabe, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_pfad):
+        with open(manifest_pfad, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    quellen = sorted(
+        f for f in os.listdir(ordner)
+        if f.lower().endswith(ENDUNGEN) and (dateien is None or f in dateien)
+    )
+    formate = verfuegbare_formate(formate)
+    auftraege = []
+    for datei in quellen:
+        eintrag = manifest.get(datei)
+        # Neu erzeugen, wenn sich die Quelle geändert hat, eine Variante fehlt oder ein Format dazukam
+        if eintrag and eintrag["hash"] == datei_hash(os.path.join(ordner, datei)) \
+                and set(formate) <= set(eintrag["varianten"]) and all(
+            os.path.exists(os.path.join(ausgabe, name))
+            for liste in eintrag["varianten"].values() for _, name in liste
+        ):
+            continue
+        auftraege.append(datei)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        ergebnisse = pool.map(
+            varianten_erzeugen,
+            [os.path.join(ordner, datei) for datei in auftraege],
+            [ausgabe] * len(auftraege), [breiten] * len(auftraege), [formate] * len(auftraege)
+        )
+        for datei, ergebnis in zip(auftraege, ergebnisse):
+            manifest[datei] = ergebnis
+
+    # Varianten von Quellen, die es nicht mehr gibt oder die sich geändert haben, entfernen
+    manifest = {datei: eintrag for datei, eintrag in manifest.items() if datei in quellen}
+    behalten = {name for e in manifest.values() for liste in e["varianten"].values() for _, name in liste}
+    for datei in os.listdir(ausgabe):
+        if datei not in behalten and datei not in (MANIFEST_NAME, ".htaccess"):
+            os.remove(os.path.join(ausgabe, datei))
+
+    with open(manifest_pfad, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True, ensure_ascii=False)
+    with open(os.path.join(ausgabe, ".htaccess"), "w", encoding="utf-8") as f:
+        f.write(HTACCESS)
+
+    print(f"{len(auftraege)} Bilder optimiert, {len(quellen) - len(auftraege)} unverändert")
+    return manifest
+
+
+# <picture data-quelle="...">...</picture> aus einem früheren Lauf oder ein einzelnes <img ...>
+_PICTURE = re.compile(r'<picture data-quelle="([^"]+)"([^>]*)>.*?(<img\b[^>]*>)\s*</picture>', re.S)
+_IMG = re.compile(r'<img\b[^>]*>')
+_DATA_SIZES = re.compile(r'\sdata-sizes="([^"]*)"')
+_SIZES = re.compile(r'\ssizes="([^"]*)"')
+_KLASSE = re.compile(r'\sclass="([^"]*)"')
+_VOLLE_BREITE = re.compile(r'width:\s*100vw')
+_ATTRIBUT = re.compile(r'\s(src|srcset|sizes|loading|decoding)="[^"]*"')
+_SRC = re.compile(r'\ssrc="([^"]+)"')
+
+
+def referenzierte_bilder(html_pfad: str = INDEX_PFAD, quell_prefix: str = "img/") -> set:
+    """Dateinamen aller Bilder, die in html_pfad per <img src="img/..."> eingebunden sind (auch bereits umgeschriebene)."""
+    with open(html_pfad, "r", encoding="utf-8") as f:
+        text = f.read()
+    pfade = [html.unescape(q) for q in re.findall(r'<picture data-quelle="([^"]+)"', text)]
+    pfade += [m.group(1) for m in map(_SRC.search, _IMG.findall(text)) if m]
+    return {pfad[len(quell_prefix):] for pfad in pfade if pfad.startswith(quell_prefix)}
+
+
+def _srcset(prefix: str, liste) -> str:
+    return ", ".join(f"{prefix}{name} {breite}w" for breite, name in liste)
+
+
+def _sizes(img_tag: str, groesste_breite: int, sizes: dict) -> tuple:
+    """
+    sizes für ein Bild: eigenes Attribut im ursprünglichen <img>, sonst nach CSS-Klasse aus sizes,
+    sonst 100vw für Bilder mit width:100vw und höchstens die Breite der grössten Variante.
+
+    Returns:
+        tuple: (sizes, True wenn es aus dem <img> stammt und in data-sizes gemerkt werden muss)
+    """
+    eigenes = _SIZES.search(img_tag)
+    if eigenes:
+        return eigenes.group(1), True
+    klasse = _KLASSE.search(img_tag)
+    for name in (klasse.group(1).split() if klasse else []):
+        if name in sizes:
+            return sizes[name], False
+    if _VOLLE_BREITE.search(img_tag):
+        return "100vw", False
+    return f"(max-width: {groesste_breite}px) 100vw, {groesste_breite}px", False
+
+
+def _picture(img_tag: str, quelle: str, eintrag: dict, prefix: str, eager: bool, sizes: dict) -> str:
+    """Baut aus dem ursprünglichen <img>-Tag ein <picture> mit AVIF/WebP-Quellen und srcset."""
+    varianten = eintrag["varianten"]
+    ersatz = [fmt for fmt in varianten if fmt not in FORMATE][0]
+    groesste = varianten[ersatz][-1]
+    wert, merken = _sizes(img_tag, groesste[0], sizes)
+
+    attribute = "".join(f" {teil}" for teil in _ATTRIBUT.sub("", img_tag[len("<img"):-1]).rstrip("/").split())
+    neu = (
+        f'<img src="{prefix}{groesste[1]}" srcset="{_srcset(prefix, varianten[ersatz])}" sizes="{wert}"'
+        f' loading="{"eager" if eager else "lazy"}" decoding="async"{attribute}>'
+    )
+    quellen = "".join(
+        f'<source type="image/{fmt}" srcset="{_srcset(prefix, varianten[fmt])}" sizes="{wert}">'
+        for fmt in FORMATE if fmt in varianten
+    )
+    data_sizes = f' data-sizes="{wert}"' if merken else ""
+    return f'<picture data-quelle="{html.escape(quelle)}"{data_sizes} style="display:contents">{quellen}{neu}</picture>'
+
+
+def index_umschreiben(
+    manifest: dict,
+    html_pfad: str = INDEX_PFAD,
+    quell_prefix: str = "img/",
+    ziel_prefix: str = "img/opt/",
+    eager_anzahl: int = 2,
+    sizes: dict = SIZES
+    ) -> int:
+    """
+    Ersetzt in index.html jedes <img src="img/..."> mit optimierten Varianten durch ein <picture>
+    (AVIF, WebP, Ersatzformat mit srcset, lazy loading ausser für die ersten eager_anzahl Bilder). Bereits umgeschriebene Stellen werden aus data-quelle
+    neu aufgebaut, der Schritt kann also beliebig oft laufen. sizes wird pro Bild bestimmt (siehe _sizes):
+    ein sizes-Attribut im ursprünglichen <img> bleibt als data-sizes am <picture> erhalten.
+
+    Returns:
+        int: Anzahl umgeschriebener Bilder.
+    """
+    with open(html_pfad, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    # Frühere Läufe auf das ursprüngliche <img> zurückführen
+    def zurueckfuehren(m):
+        eigene = _DATA_SIZES.search(m.group(2))
+        sizes_attribut = f' sizes="{eigene.group(1)}"' if eigene else ""
+        return f'<img src="{html.unescape(m.group(1))}"{sizes_attribut}' + _ATTRIBUT.sub("", m.group(3)[len("<img"):])
+
+    text = _PICTURE.sub(zurueckfuehren, text)
+
+    anzahl = 0
+
+    def ersetzen(m):
+        nonlocal anzahl
+        tag = m.group(0)
+        src = _SRC.search(tag)
+        if not src or not src.group(1).startswith(quell_prefix):
+            return tag
+        datei = src.group(1)[len(quell_prefix):]
+        if datei not in manifest:
+            return tag
+        anzahl += 1
+        return _picture(tag, src.group(1), manifest[datei], ziel_prefix, anzahl <= eager_anzahl, sizes)
+
+    text = _IMG.sub(ersetzen, text)
+    with open(html_pfad, "w", encoding="utf-8") as f:
+        f.write(text)
+    return anzahl
+
+
+if __name__ == "__main__":
+    manifest = bilder_optimieren(dateien=referenzierte_bilder())
+    print(f"{index_umschreiben(manifest)} Bilder in index.html umgeschrieben")
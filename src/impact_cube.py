@@ -0,0 +1,271 @@
+import json
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from merged_store import DATA_DIR
+from star_schema import UNBEKANNT, Sternschema, einzugsgebiete, sternschema_aus_dateien
+
+
+STATUS_PFAD = os.path.join(DATA_DIR, "Gefaehrdungsstatus_Codes.csv")
+
+# Zusätzliches Element der Dimensionen lake, status und einzugsgebiet mit der Summe über alle anderen
+ALLE = "alle"
+# Tiefe 'alle': frühestes Jahr über alle Tiefen (wie sterbejahre_pro_szenario), keine Summe
+ALLE_TIEFEN = "alle"
+# Zusätzliche Elemente der Dimension lake, die Arten statt Vorkommen zählen: Arten, die alle
+# ihre Seen verloren haben, bzw. mindestens einen davon
+ARTEN_UEBERALL = "arten_ueberall"
+ARTEN_IRGENDWO = "arten_irgendwo"
+
+DIMENSIONEN = ("lake", "scenario", "depth", "year", "status", "einzugsgebiet")
+
+
+def lade_status_codes(pfad: str = STATUS_PFAD) -> dict:
+    """Gefährdungsstatus-Codes -> Bedeutung, z.B. {'1': 'vom Aussterben bedroht', ...}."""
+    codes = pd.read_csv(pfad, dtype=str)
+    return dict(zip(codes['Code'].str.strip(), codes['Bedeutung'].str.strip()))
+
+
+@dataclass
+class Wirkungswuerfel:
+    """
+    Vorberechneter Würfel lake x scenario x depth x year x status x einzugsgebiet mit der Anzahl
+    Fischarten, die bis einschliesslich year ihren Lebensraum verloren haben.
+
+    Gespeichert werden nur die Ereignisse (Aussterbejahr pro Kombination, dünn besetzt) und der
+    Bestand pro See, Status und Einzugsgebiet. Beim Laden wird daraus einmal das kumulierte Array
+    aufgebaut, inklusive der Summen-Elemente ALLE für lake und status. Jede Abfrage
+    einer Zelle (auch über ALLE) ist danach ein einzelner Array-Zugriff.
+
+    Mit lake = ALLE werden Vorkommen gezählt: eine Art in drei Seen zählt dreimal. Die Elemente
+    ARTEN_UEBERALL und ARTEN_IRGENDWO der Dimension lake zählen jede Art einmal, sobald sie alle
+    ihre Seen bzw. mindestens einen verloren hat; sie werden wie ALLE der Einzugsgebiete eigens
+    gespeichert (See-Index = Anzahl Seen + 1 bzw. + 2) und gehen nicht in die Summe ALLE ein.
+    Eine Art mit mehreren Einzugsgebieten ('Rhein, Rhone, Doubs') zählt in jedem davon; das Element
+    ALLE der Dimension einzugsgebiet ist deshalb keine Summe, sondern wird eigens gespeichert
+    (Einzugsgebiet-Index = Anzahl Einzugsgebiete) und zählt jede Art einmal.
+    """
+    seen: list
+    szenarien: list
+    tiefen: list
+    jahre: np.ndarray
+    status: list
+    einzugsgebiete: list
+    # (n, 7): lake, scenario, depth, Jahr-Index, status, einzugsgebiet, Anzahl
+    ereignisse: np.ndarray
+    # (n, 4): lake, status, einzugsgebiet, Anzahl
+    bestand_eintraege: np.ndarray
+    status_namen: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.jahre = np.asarray(self.jahre)
+        self._index = {
+            "lake": {name: i for i, name in enumerate([*self.seen, ALLE, ARTEN_UEBERALL, ARTEN_IRGENDWO])},
+            "scenario": {name: i for i, name in enumerate(self.szenarien)},
+            "depth": {name: i for i, name in enumerate(self.tiefen)},
+            "status": {name: i for i, name in enumerate([*self.status, ALLE])},
+            "einzugsgebiet": {name: i for i, name in enumerate([*self.einzugsgebiete, ALLE])},
+        }
+        # Bedeutung ('stark gefährdet') als Alternative zum Code
+        for code, name in self.status_namen.items():
+            if code in self._index["status"]:
+                self._index["status"].setdefault(name, self._index["status"][code])
+
+        # Einzugsgebiet-Achse inklusive ALLE (gespeichert, nicht summiert), See-Achse mit den
+        # Seen, ALLE (Summe, hier berechnet) und den gespeicherten Art-Elementen
+        n_l, n_s, n_e = len(self.seen), len(self.status), len(self.einzugsgebiete) + 1
+        form = (n_l + 3, len(self.szenarien), len(self.tiefen), len(self.jahre) + 1, n_s, n_e)
+        neu = np.zeros(form, dtype=np.int32)
+        e = np.asarray(self.ereignisse, dtype=np.int64).reshape(-1, 7)
+        np.add.at(neu, tuple(e[:, :6].T), e[:, 6])
+        # Letzte Jahresstelle = stirbt nie, zählt nicht als verloren
+        verloren = np.cumsum(neu[:, :, :, :-1], axis=3)
+        verloren[n_l] = verloren[:n_l].sum(axis=0)
+        self._verloren = _mit_summen(verloren, achsen=(4,))
+
+        bestand = np.zeros((n_l + 3, n_s, n_e), dtype=np.int32)
+        b = np.asarray(self.bestand_eintraege, dtype=np.int64).reshape(-1, 4)
+        np.add.at(bestand, tuple(b[:, :3].T), b[:, 3])
+        bestand[n_l] = bestand[:n_l].sum(axis=0)
+        self._bestand = _mit_summen(bestand, achsen=(1,))
+
+    @classmethod
+    def aus_sterbejahren(
+        cls,
+        sterbejahre: pd.DataFrame,
+        fische: pd.DataFrame,
+        jahre,
+        status_namen: dict = None
+        ) -> 'Wirkungswuerfel':
+        """
+        Baut den Würfel aus einer Aussterbetabelle.
+
+        Parameters:
+            sterbejahre (pd.DataFrame): Index (Fisch, lake), Spalten (scenario, depth), NaN = stirbt nie,
+                                        z.B. Sternschema.sterbejahre() oder sterbejahre(refugium=True).
+            fische (pd.DataFrame): Fisch-Dimension mit Gefährdungsstatus und Einzugsgebiet (Index = Fisch).
+            jahre: Alle Jahre der Zeitachse.
+            status_namen (dict): Code -> Bedeutung (Standard: Gefaehrdungsstatus_Codes.csv).
+        """
+        if status_namen is None:
+            status_namen = lade_status_codes()
+        jahre = np.sort(np.asarray(jahre))
+
+        # Tiefe 'alle' = frühestes Jahr über alle Tiefen
+        frueheste = sterbejahre.T.groupby(level='scenario', sort=False).min().T
+        frueheste.columns = pd.MultiIndex.from_product([frueheste.columns, [ALLE_TIEFEN]], names=['scenario', 'depth'])
+        tabelle = pd.concat([sterbejahre, frueheste], axis=1)
+        seen = list(pd.unique(sterbejahre.index.get_level_values('lake')))
+
+        # Pro Art: spätestes Jahr über ihre Seen (nie, wenn sie in einem See überlebt) und frühestes Jahr
+        pro_art = tabelle.groupby(level='Fisch', sort=False, observed=True)
+        ueberall = pro_art.max().mask(tabelle.isna().groupby(level='Fisch', sort=False, observed=True).any())
+        irgendwo = pro_art.min()
+        for art_tabelle, name in ((ueberall, ARTEN_UEBERALL), (irgendwo, ARTEN_IRGENDWO)):
+            art_tabelle.index = pd.MultiIndex.from_arrays(
+                [art_tabelle.index, [name] * len(art_tabelle)], names=['Fisch', 'lake']
+            )
+        tabelle = pd.concat([tabelle, ueberall, irgendwo])
+
+        lang = tabelle.stack(['scenario', 'depth'], future_stack=True).rename('sterbejahr').reset_index()
+        info = fische.reindex(lang['Fisch'])
+        lang['status'] = info['Gefährdungsstatus'].fillna(UNBEKANNT).astype(str).str.strip().to_numpy()
+        # Liste der Einzugsgebiete pro Zeile, ALLE steht für die Art als Ganzes
+        lang['einzugsgebiet'] = [[*einzugsgebiete(w), ALLE] for w in info['Einzugsgebiet']]
+        lang = lang.explode('einzugsgebiet', ignore_index=True)
+
+        szenarien = list(pd.unique(tabelle.columns.get_level_values('scenario')))
+        tiefen = list(pd.unique(tabelle.columns.get_level_values('depth')))
+        # Status in der Reihenfolge der Codes-Datei, unbekannte Codes dahinter
+        status = [c for c in status_namen if c in set(lang['status'])]
+        status += sorted(set(lang['status']) - set(status))
+        gebiete = sorted(set(lang['einzugsgebiet']) - {ALLE})
+
+        see_index = pd.Index([*seen, ALLE, ARTEN_UEBERALL, ARTEN_IRGENDWO])
+        codes = np.column_stack([
+            see_index.get_indexer(lang['lake']),
+            pd.Index(szenarien).get_indexer(lang['scenario']),
+            pd.Index(tiefen).get_indexer(lang['depth']),
+            np.where(lang['sterbejahr'].isna(), len(jahre),
+                     np.searchsorted(jahre, lang['sterbejahr'].fillna(jahre[0]).to_numpy())),
+            pd.Index(status).get_indexer(lang['status']),
+            pd.Index([*gebiete, ALLE]).get_indexer(lang['einzugsgebiet']),
+        ])
+        ereignisse, anzahl = np.unique(codes, axis=0, return_counts=True)
+
+        paare = lang.drop_duplicates(['Fisch', 'lake', 'einzugsgebiet'])
+        b_codes = np.column_stack([
+            see_index.get_indexer(paare['lake']),
+            pd.Index(status).get_indexer(paare['status']),
+            pd.Index([*gebiete, ALLE]).get_indexer(paare['einzugsgebiet']),
+        ])
+        bestand, b_anzahl = np.unique(b_codes, axis=0, return_counts=True)
+
+        return cls(
+            seen, szenarien, tiefen, jahre, status, gebiete,
+            np.column_stack([ereignisse, anzahl]), np.column_stack([bestand, b_anzahl]),
+            {c: status_namen[c] for c in status if c in status_namen},
+        )
+
+    def _i(self, dimension: str, wert):
+        """Index eines Werts in einer Dimension; Listen werden zu Index-Listen (Summe darüber)."""
+        if isinstance(wert, (list, tuple)):
+            return [self._index[dimension][w] for w in wert]
+        try:
+            return self._index[dimension][wert]
+        except KeyError:
+            raise KeyError(f"Unbekannter Wert {wert!r} für {dimension}") from None
+
+    def _jahr(self, jahr: int) -> int:
+        """Index des letzten Jahres <= jahr, -1 vor dem ersten Jahr."""
+        return int(np.searchsorted(self.jahre, jahr, side='right')) - 1
+
+    def verloren(self, scenario: str, jahr: int, lake=ALLE, depth=ALLE_TIEFEN, status=ALLE, einzugsgebiet=ALLE) -> int:
+        """
+        Anzahl Arten (bzw. Vorkommen bei lake=ALLE), die bis einschliesslich jahr ihren
+        Lebensraum verloren haben. Über alle Seen zählt lake=ARTEN_UEBERALL die Arten, die in
+        keinem ihrer Seen mehr überleben, lake=ARTEN_IRGENDWO die Arten mit mindestens einem
+        verlorenen See. status und einzugsgebiet können auch Listen sein; bei einer Liste von
+        Einzugsgebieten zählt eine Art in mehreren davon mehrfach.
+        """
+        j = self._jahr(jahr)
+        if j < 0:
+            return 0
+        zelle = self._verloren[self._i("lake", lake), self._i("scenario", scenario), self._i("depth", depth), j]
+        return int(np.sum(zelle[np.ix_(np.atleast_1d(self._i("status", status)),
+                                       np.atleast_1d(self._i("einzugsgebiet", einzugsgebiet)))]))
+
+    def bestand(self, lake=ALLE, status=ALLE, einzugsgebiet=ALLE) -> int:
+        """Anzahl Arten (bzw. Vorkommen bei lake=ALLE) heute; ARTEN_UEBERALL/ARTEN_IRGENDWO zählen jede Art einmal."""
+        zelle = self._bestand[self._i("lake", lake)]
+        return int(np.sum(zelle[np.ix_(np.atleast_1d(self._i("status", status)),
+                                       np.atleast_1d(self._i("einzugsgebiet", einzugsgebiet)))]))
+
+    def ueberlebend(self, scenario: str, jahr: int, lake=ALLE, depth=ALLE_TIEFEN, status=ALLE, einzugsgebiet=ALLE) -> int:
+        """Bestand minus verloren für dieselbe Auswahl."""
+        return self.bestand(lake, status, einzugsgebiet) - self.verloren(scenario, jahr, lake, depth, status, einzugsgebiet)
+
+    def zeitreihe(self, scenario: str, lake=ALLE, depth=ALLE_TIEFEN, status=ALLE, einzugsgebiet=ALLE) -> pd.Series:
+        """Verlorene Arten pro Jahr (kumuliert) für eine Auswahl, Index = Jahr."""
+        zelle = self._verloren[self._i("lake", lake), self._i("scenario", scenario), self._i("depth", depth)]
+        auswahl = zelle[:, np.atleast_1d(self._i("status", status))][:, :, np.atleast_1d(self._i("einzugsgebiet", einzugsgebiet))]
+        return pd.Series(auswahl.sum(axis=(1, 2)), index=pd.Index(self.jahre, name='year'), name='verloren')
+
+    def als_json(self) -> dict:
+        """Dünne Darstellung für die Webstory: Dimensionen, Ereignisse und Bestand (Kumulieren im Browser)."""
+        return {
+            "dimensionen": {
+                "lake": self.seen,
+                "scenario": self.szenarien,
+                "depth": self.tiefen,
+                "year": self.jahre.tolist(),
+                "status": self.status,
+                "einzugsgebiet": self.einzugsgebiete,
+            },
+            "status_namen": self.status_namen,
+            # Jahr-Index = Anzahl Jahre bedeutet 'stirbt nie', Einzugsgebiet-Index = Anzahl Gebiete bedeutet 'alle',
+            # See-Index = Anzahl Seen + 1 / + 2 bedeutet ARTEN_UEBERALL / ARTEN_IRGENDWO
+            "ereignisse": np.asarray(self.ereignisse).tolist(),
+            "bestand": np.asarray(self.bestand_eintraege).tolist(),
+        }
+
+    @classmethod
+    def aus_json(cls, daten: dict) -> 'Wirkungswuerfel':
+        d = daten["dimensionen"]
+        return cls(d["lake"], d["scenario"], d["depth"], np.asarray(d["year"]), d["status"], d["einzugsgebiet"],
+                   np.asarray(daten["ereignisse"]), np.asarray(daten["bestand"]), daten.get("status_namen", {}))
+
+    def speichern(self, pfad: str) -> None:
+        """Schreibt den Würfel als komprimiertes .npz (Ereignisse und Dimensionen)."""
+        dimensionen = {k: v for k, v in self.als_json().items() if k not in ("ereignisse", "bestand")}
+        np.savez_compressed(
+            pfad,
+            ereignisse=np.asarray(self.ereignisse, dtype=np.int32),
+            bestand=np.asarray(self.bestand_eintraege, dtype=np.int32),
+            dimensionen=np.array(json.dumps(dimensionen, ensure_ascii=False)),
+        )
+
+    @classmethod
+    def laden(cls, pfad: str) -> 'Wirkungswuerfel':
+        with np.load(pfad) as npz:
+            daten = json.loads(str(npz["dimensionen"]))
+            daten["ereignisse"], daten["bestand"] = npz["ereignisse"], npz["bestand"]
+        return cls.aus_json(daten)
+
+
+def _mit_summen(array: np.ndarray, achsen) -> np.ndarray:
+    """Hängt an jede der achsen ein Element mit der Summe über diese Achse an (Reihenfolge egal)."""
+    for achse in achsen:
+        array = np.concatenate([array, array.sum(axis=achse, keepdims=True)], axis=achse)
+    return array
+
+
+def wirkungswuerfel(schema: Sternschema = None, refugium: bool = False) -> Wirkungswuerfel:
+    """Würfel aus Sternschema.sterbejahre (temperature_max >= kritische Temperatur)."""
+    if schema is None:
+        schema = sternschema_aus_dateien()
+    jahre = np.sort(schema.temperaturen['year'].unique())
+    return Wirkungswuerfel.aus_sterbejahren(schema.sterbejahre(refugium=refugium), schema.fische, jahre)
@@ -0,0 +1,204 @@
+import mmap
+import os
+
+import numpy as np
+
+from merged_store import DATA_DIR
+
+
+JSON_ORDNER = os.path.join(DATA_DIR, "see_data_json")
+
+_LEERZEICHEN = b" \t\r\n"
+_ZAHL_START = b"-0123456789nN"
+
+
+def _gewuenscht(pfad: tuple, praefixe) -> bool:
+    """True, wenn pfad mit einem der gewünschten Präfixe beginnt."""
+    if praefixe is None:
+        return True
+    return any(pfad[:len(p)] == p for p in praefixe)
+
+
+def _ueberspringen(daten, k: int) -> int:
+    """Erste Position ab k, die kein Leerzeichen ist."""
+    n = len(daten)
+    while k < n and daten[k:k + 1] in _LEERZEICHEN:
+        k += 1
+    return k
+
+
+def _string_ende(daten, i: int) -> int:
+    """Position des schliessenden Anführungszeichens eines Strings, der bei i beginnt."""
+    j = i + 1
+    while True:
+        j = daten.find(b'"', j)
+        if j < 0:
+            raise ValueError(f"String ab Position {i} wird nicht geschlossen")
+        # Escapete Anführungszeichen überspringen
+        k = j - 1
+        while daten[k] == 0x5C:  # Backslash
+            k -= 1
+        if (j - 1 - k) % 2 == 0:
+            return j
+        j += 1
+
+
+def numerische_arrays(pfad: str, pfade=None):
+    """
+    Liest eine JSON-Datei inkrementell über die rohen Bytes (memory-mapped) und liefert jedes
+    flache Zahlen-Array als NumPy-Array. Die Zahlen werden direkt aus dem Text geparst,
+    ohne Python-Listen oder float-Objekte. Nicht gewünschte Arrays werden nur übersprungen.
+
+    Parameters:
+        pfad (str): JSON-Datei.
+        pfade (list): Optional nur Arrays unterhalb dieser Pfade, z.B. ['yearly.bottom'].
+
+    Yields:
+        tuple: (Pfad als 'a.b.c', np.ndarray float64)
+
+    Raises:
+        ValueError: Bei abgeschnittenen oder fehlerhaften Dateien (offener String, Array oder Container).
+    """
+    praefixe = None if pfade is None else [tuple(p.split(".")) for p in pfade]
+
+    with open(pfad, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as daten:
+        n = len(daten)
+        stapel = []   # offene Container: '{' oder '['
+        schluessel = []   # aktueller Pfad
+        i = 0
+        while i < n:
+            c = daten[i:i + 1]
+            if c in _LEERZEICHEN or c in b",:":
+                i += 1
+            elif c == b"{":
+                stapel.append(c)
+                schluessel.append(None)
+                i += 1
+            elif c == b'"':
+                j = _string_ende(daten, i)
+                # Ein String direkt in einem Objekt vor ':' ist ein Schlüssel
+                if stapel and stapel[-1] == b"{":
+                    k = _ueberspringen(daten, j + 1)
+                    if daten[k:k + 1] == b":":
+                        schluessel[-1] = daten[i + 1:j].decode("utf-8")
+                i = j + 1
+            elif c == b"[":
+                k = _ueberspringen(daten, i + 1)
+                if daten[k:k + 1] and daten[k:k + 1] in _ZAHL_START + b"]":
+                    # Flaches Zahlen-Array: bis zur schliessenden Klammer springen
+                    j = daten.find(b"]", i)
+                    if j < 0:
+                        raise ValueError(f"Array ab Position {i} wird nicht geschlossen")
+                    aktueller_pfad = tuple(s for s in schluessel if s is not None)
+                    if _gewuenscht(aktueller_pfad, praefixe):
+                        text = daten[i + 1:j].replace(b"null", b"nan")
+                        werte = np.fromstring(text, dtype=np.float64, sep=",") if text.strip() else np.empty(0)
+                        yield ".".join(aktueller_pfad), werte
+                    i = j + 1
+                else:
+                    stapel.append(c)
+                    schluessel.append(None)
+                    i += 1
+            elif c in b"}]":
+                if not stapel or stapel[-1] != (b"{" if c == b"}" else b"["):
+                    raise ValueError(f"Unerwartetes {c.decode()} an Position {i}")
+                stapel.pop()
+                schluessel.pop()
+                i += 1
+            else:
+                # Einzelner Wert (Zahl, true, false, null) ausserhalb eines Arrays
+                while i < n and daten[i:i + 1] not in b",}]":
+                    i += 1
+        if stapel:
+            raise ValueError(f"Datei endet mit {len(stapel)} offenen Containern: {pfad}")
+
+
+def lese_arrays(pfad: str, pfade=None) -> dict:
+    """
+    Liest alle (oder nur die gewünschten) Zahlen-Arrays einer JSON-Datei in ein Dictionary
+    {'yearly.bottom.RCP85.y_ave': np.ndarray, ...}.
+    """
+    return dict(numerische_arrays(pfad, pfade))
+
+
+def jahreswerte_cube(
+    ordner: str = JSON_ORDNER,
+    tiefen=("surface", "bottom"),
+    szenarien=("RCP26", "RCP45", "RCP85"),
+    statistiken=("y_ave", "y_min", "y_max")
+    ) -> tuple:
+    """
+    Liest die Jahreswerte aller Seen in einen Würfel. Die Werte werden über die Jahresliste x
+    ihrer Reihe eingeordnet; die Jahresachse umfasst alle Jahre aller Reihen, fehlende Jahre
+    einer Reihe bleiben NaN. Ist eine Werteliste anders lang als ihr x (oder fehlt x),
+    wird ein ValueError ausgelöst.
+
+    Returns:
+        tuple: (seen, jahre, cube) mit cube der Form (See, Szenario, Tiefe, Statistik, Jahr), float32.
+    """
+    dateien = sorted(f for f in os.listdir(ordner) if f.endswith(".json"))
+    seen = [datei.replace(".json", "") for datei in dateien]
+    pfade = [f"yearly.{tiefe}" for tiefe in tiefen]
+
+    # Erst alle Reihen lesen, die Jahresachse steht erst danach fest
+    reihen = []
+    for s, datei in enumerate(dateien):
+        gelesen = {}
+        for pfad, werte in numerische_arrays(os.path.join(ordner, datei), pfade):
+            _, tiefe, szenario, feld = pfad.split(".")
+            if szenario in szenarien and (feld == "x" or feld in statistiken):
+                gelesen.setdefault((tiefe, szenario), {})[feld] = werte
+        for (tiefe, szenario), felder in gelesen.items():
+            x = felder.pop("x", None)
+            if x is None:
+                raise ValueError(f"{datei}: yearly.{tiefe}.{szenario} hat Werte, aber kein x")
+            for feld, werte in felder.items():
+                if len(werte) != len(x):
+                    raise ValueError(f"{datei}: yearly.{tiefe}.{szenario}.{feld} hat {len(werte)} Werte, x {len(x)}")
+            reihen.append((s, szenarien.index(szenario), tiefen.index(tiefe), x.astype(np.int16), felder))
+
+    jahre = np.unique(np.concatenate([reihe[3] for reihe in reihen])) if reihen else np.empty(0, dtype=np.int16)
+    cube = np.full((len(seen), len(szenarien), len(tiefen), len(statistiken), len(jahre)), np.nan, dtype=np.float32)
+    for s, sz, t, x, felder in reihen:
+        spalten = np.searchsorted(jahre, x)
+        for feld, werte in felder.items():
+            cube[s, sz, t, statistiken.index(feld), spalten] = werte
+
+    return seen, jahre, cube
+
+
+def saisonwerte_cube(
+    ordner: str = JSON_ORDNER,
+    tiefen=("surface", "bottom"),
+    szenarien=("RCP26", "RCP45", "RCP85"),
+    perioden=("p1", "p2", "p3", "p4"),
+    statistiken=("ave", "min", "max")
+    ) -> tuple:
+    """
+    Liest die täglichen Klimatologien (seasonal) aller Seen in einen vorab allozierten Würfel.
+
+    Die Tagesachse ist so lang wie die längste Reihe; kürzere Reihen werden mit NaN aufgefüllt.
+
+    Returns:
+        tuple: (seen, cube) mit cube der Form (See, Szenario, Tiefe, Periode, Statistik, Tag), float32.
+    """
+    dateien = sorted(f for f in os.listdir(ordner) if f.endswith(".json"))
+    seen = [datei.replace(".json", "") for datei in dateien]
+    pfade = [f"seasonal.{tiefe}" for tiefe in tiefen]
+
+    form = (len(seen), len(szenarien), len(tiefen), len(perioden), len(statistiken))
+    cube = np.full((*form, 0), np.nan, dtype=np.float32)
+    for s, datei in enumerate(dateien):
+        for pfad, werte in numerische_arrays(os.path.join(ordner, datei), pfade):
+            _, tiefe, periode, szenario, feld = pfad.split(".")
+            if szenario not in szenarien or periode not in perioden or feld not in statistiken:
+                continue
+            if len(werte) > cube.shape[-1]:
+                # Längere Reihe als alle bisherigen: Tagesachse verlängern, bisherige Werte übernehmen
+                laenger = np.full((*form, len(werte)), np.nan, dtype=np.float32)
+                laenger[..., :cube.shape[-1]] = cube
+                cube = laenger
+            cube[s, szenarien.index(szenario), tiefen.index(tiefe), perioden.index(periode),
+                 statistiken.index(feld), :len(werte)] = werte
+
+    return seen, cube
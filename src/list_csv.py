@@ -0,0 +1,103 @@
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+from merged_store import DATA_DIR
+
+
+CSV_ORDNER = os.path.join(DATA_DIR, "see_data", "see_data_csv")
+
+# Listen-Zellen sind länger als die Standardgrenze des csv-Moduls (128 kB); sys.maxsize
+# passt unter Windows nicht in ein C long, daher die grösste 32-Bit-Grenze
+FELD_GRENZE = 2**31 - 1
+
+
+def lese_listen_csv(pfad: str) -> dict:
+    """
+    Liest eine CSV-Datei aus see_data_csv (eine Zeile, Zellen wie "[1981, 1982, ...]").
+    Die Felder trennt das csv-Modul (Anführungszeichen, leere Zellen), nur die Listen-Zellen
+    werden mit np.fromstring in NumPy-Arrays umgewandelt, ohne eval/ast.literal_eval.
+
+    Returns:
+        dict: {'yearly.surface.RCP85.x': np.ndarray, ...}; einzelne Werte als float,
+              leere Zellen als NaN, anderer Text unverändert.
+    """
+    # Grenze nur für diesen Aufruf anheben, andere csv-Nutzer im Prozess behalten ihre
+    alte_grenze = csv.field_size_limit(FELD_GRENZE)
+    try:
+        with open(pfad, "r", encoding="utf-8", newline="") as f:
+            kopf, *zeilen = csv.reader(f)
+    finally:
+        csv.field_size_limit(alte_grenze)
+    zeile = zeilen[0] if zeilen else []
+
+    spalten = {}
+    for name, zelle in zip(kopf, zeile):
+        zelle = zelle.strip()
+        if zelle.startswith("[") and zelle.endswith("]"):
+            liste = zelle[1:-1]
+            spalten[name] = np.fromstring(liste, dtype=np.float64, sep=",") if liste.strip() else np.empty(0)
+        elif not zelle:
+            spalten[name] = np.nan
+        else:
+            try:
+                spalten[name] = float(zelle)
+            except ValueError:
+                spalten[name] = zelle
+    return spalten
+
+
+def lese_jahreswerte_csv(ordner: str = CSV_ORDNER, seen=None) -> pd.DataFrame:
+    """
+    Liest die Jahreswerte aller (oder der gewünschten) Seen in einem Aufruf
+    als lange, typisierte Tabelle.
+
+    Parameters:
+        ordner (str): Ordner mit den CSV-Dateien pro See.
+        seen (list): Optional nur diese Seen.
+
+    Leere Werte-Zellen (keine Liste) werden übersprungen. Fehlt die Jahresliste x einer Reihe
+    mit Werten oder ist sie anders lang als die Werte, wird ein ValueError ausgelöst, damit
+    Jahre und Werte der folgenden Seen nicht gegeneinander verschoben werden.
+
+    Returns:
+        pd.DataFrame: Spalten lake, depth, scenario, year, stat (y_ave/y_min/y_max), value.
+    """
+    dateien = sorted(f for f in os.listdir(ordner) if f.endswith(".csv"))
+    if seen is not None:
+        dateien = [datei for datei in dateien if datei.replace(".csv", "") in seen]
+
+    schluessel, jahre, werte = [], [], []
+    for datei in dateien:
+        lake = datei.replace(".csv", "")
+        spalten = lese_listen_csv(os.path.join(ordner, datei))
+        for name, array in spalten.items():
+            teile = name.split(".")
+            if teile[0] != "yearly" or teile[-1] == "x":
+                continue
+            if not isinstance(array, np.ndarray):
+                continue
+            _, depth, scenario, stat = teile
+            x = spalten.get(f"yearly.{depth}.{scenario}.x")
+            if not isinstance(x, np.ndarray):
+                raise ValueError(f"{datei}: {name} hat Werte, aber keine Jahresliste yearly.{depth}.{scenario}.x")
+            if len(x) != len(array):
+                raise ValueError(f"{datei}: {name} hat {len(array)} Werte, die Jahresliste {len(x)}")
+            schluessel.append((lake, depth, scenario, stat, len(array)))
+            jahre.append(x)
+            werte.append(array)
+
+    if not werte:
+        return pd.DataFrame(columns=["lake", "depth", "scenario", "year", "stat", "value"])
+
+    # Alle Arrays auf einmal zusammenfügen, Schlüssel nur wiederholen
+    laengen = np.array([s[-1] for s in schluessel])
+    df = pd.DataFrame({
+        spalte: pd.Categorical(np.repeat([s[i] for s in schluessel], laengen))
+        for i, spalte in enumerate(["lake", "depth", "scenario", "stat"])
+    })
+    df.insert(3, "year", np.concatenate(jahre).astype(np.int16))
+    df["value"] = np.concatenate(werte).astype(np.float32)
+    return df
@@ -0,0 +1,219 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+CSV_PFAD = os.path.join(DATA_DIR, "df_merged.csv")
+PARQUET_PFAD = os.path.join(DATA_DIR, "df_merged.parquet")
+
+# Spalten, die als Kategorien (Dictionary-Codes) gespeichert werden
+KATEGORIE_SPALTEN = ['Fisch', 'Name wissenschaftlich', 'Einzugsgebiet', 'Gefährdungsstatus',
+                     'lake', 'scenario', 'depth']
+# Schwellenwerte der Fische: nullable float, da z.B. 'X' für "unbekannt" steht
+SCHWELLEN_SPALTEN = ['Kritische Temperatur °C', 'Minimale Temperatur °C', 'Kritischer O2-Grenzwert (mg/l)']
+TEMPERATUR_SPALTEN = ['temperature_avg', 'temperature_min', 'temperature_max']
+
+# Sortierung beim Schreiben, damit die Row-Group-Statistiken für Filter greifen
+SORTIERUNG = ['Fisch', 'lake', 'scenario', 'depth', 'year']
+# Schlüssel in den Parquet-Metadaten, unter dem die Herkunft der Daten steht
+QUELLE_SCHLUESSEL = b"merged_store.quelle"
+
+
+def typisieren(df_merged: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bringt df_merged in kompakte Datentypen: Kategorien für Namen/Szenarien/Tiefen,
+    int16 für Jahre, float32 für Temperaturen und Float32 (nullable) für die Schwellenwerte.
+
+    Parameters:
+        df_merged (pd.DataFrame): Gesamtdaten, mit Spalte 'See' oder 'lake'.
+
+    Returns:
+        pd.DataFrame: Typisierte Kopie mit Spalte 'lake'.
+    """
+    df = df_merged.rename(columns={'See': 'lake'}).copy()
+
+    for spalte in KATEGORIE_SPALTEN:
+        if spalte in df.columns:
+            df[spalte] = df[spalte].astype('category')
+    for spalte in SCHWELLEN_SPALTEN:
+        if spalte in df.columns:
+            # Ungültige Werte wie 'X' werden zu <NA>
+            df[spalte] = pd.to_numeric(df[spalte], errors='coerce').astype('Float32')
+    for spalte in TEMPERATUR_SPALTEN:
+        if spalte in df.columns:
+            df[spalte] = df[spalte].astype(np.float32)
+    if 'year' in df.columns:
+        df['year'] = df['year'].astype(np.int16)
+    if 'überlebt' in df.columns:
+        df['überlebt'] = df['überlebt'].astype(bool)
+
+    return df
+
+
+def lade_df_merged_csv(pfad: str = CSV_PFAD) -> pd.DataFrame:
+    """
+    Liest df_merged.csv ein und gibt die typisierte Version zurück.
+    """
+    return typisieren(pd.read_csv(pfad, na_values=['X']))
+
+
+def schreibe_df_merged(
+    df_merged: pd.DataFrame,
+    pfad: str = PARQUET_PFAD,
+    row_group_spalte: str = 'Fisch',
+    row_group_size: int = 50_000,
+    quelle: dict = None
+    ) -> None:
+    """
+    Speichert df_merged spaltenbasiert als Parquet-Datei, mit einer eigenen Row Group
+    pro Wert von row_group_spalte. Jede Row Group enthält dann nur einen Fisch (min = max
+    in den Statistiken), sodass lade_df_merged(fisch=...) alle anderen überspringt.
+
+    Parameters:
+        df_merged (pd.DataFrame): Gesamtdaten (wird vorher typisiert).
+        pfad (str): Zieldatei.
+        row_group_spalte (str): Spalte, nach deren Werten die Row Groups getrennt werden
+            (die Filterspalte der häufigsten Abfrage; None = nur nach row_group_size).
+        row_group_size (int): Höchstens so viele Zeilen pro Row Group.
+        quelle (dict): Optional Herkunft der Daten (z.B. csv_stempel), wird als JSON in den
+            Metadaten gespeichert und von lade_df_merged geprüft.
+    """
+    df = typisieren(df_merged)
+    sortierung = [spalte for spalte in SORTIERUNG if spalte in df.columns]
+    if row_group_spalte in df.columns:
+        sortierung = [row_group_spalte] + [spalte for spalte in sortierung if spalte != row_group_spalte]
+    df = df.sort_values(sortierung, kind='stable').reset_index(drop=True)
+
+    tabelle = pa.Table.from_pandas(df, preserve_index=False)
+    if quelle is not None:
+        tabelle = tabelle.replace_schema_metadata({**tabelle.schema.metadata, QUELLE_SCHLUESSEL: json.dumps(quelle)})
+    if row_group_spalte in df.columns:
+        # Grenzen, an denen der Wert der Spalte wechselt (die Daten sind danach sortiert)
+        codes = df[row_group_spalte].cat.codes.to_numpy()
+        grenzen = [0, *(np.flatnonzero(codes[1:] != codes[:-1]) + 1), len(df)]
+    else:
+        grenzen = [0, len(df)]
+    with pq.ParquetWriter(pfad, tabelle.schema) as writer:
+        for start, ende in zip(grenzen[:-1], grenzen[1:]):
+            writer.write_table(tabelle.slice(start, ende - start), row_group_size=row_group_size)
+
+
+def csv_stempel(pfad: str = CSV_PFAD) -> dict:
+    """Grösse und Änderungszeit der CSV-Datei, aus der die Parquet-Datei erzeugt wird."""
+    info = os.stat(pfad)
+    return {"csv": os.path.basename(pfad), "groesse": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+
+def gespeicherte_quelle(pfad: str) -> dict:
+    """Die mit schreibe_df_merged(quelle=...) gespeicherte Herkunft, None wenn keine da ist."""
+    metadaten = pq.read_schema(pfad).metadata or {}
+    return json.loads(metadaten[QUELLE_SCHLUESSEL]) if QUELLE_SCHLUESSEL in metadaten else None
+
+
+def parquet_aus_csv(pfad: str = PARQUET_PFAD, csv_pfad: str = CSV_PFAD) -> bool:
+    """
+    Erzeugt die Parquet-Datei aus der CSV-Datei, wenn sie fehlt oder aus einer anderen
+    Version der CSV-Datei stammt (Grösse oder Änderungszeit weichen vom gespeicherten
+    csv_stempel ab; ebenso ältere Dateien ohne Herkunft). Dateien mit einer anderen Quelle,
+    z.B. aus pipeline.pipeline_ausfuehren, bleiben unverändert.
+
+    Returns:
+        bool: True, wenn die Datei neu geschrieben wurde.
+    """
+    if not os.path.exists(csv_pfad):
+        return False
+    stempel = csv_stempel(csv_pfad)
+    if os.path.exists(pfad):
+        quelle = gespeicherte_quelle(pfad)
+        if quelle == stempel or (quelle is not None and "csv" not in quelle):
+            return False
+
+    # Erst vollständig schreiben, dann ersetzen: Leser sehen nie eine halbe Datei
+    tmp = f"{pfad}.{os.getpid()}.tmp"
+    schreibe_df_merged(lade_df_merged_csv(csv_pfad), tmp, quelle=stempel)
+    os.replace(tmp, pfad)
+    return True
+
+
+def _filter(**bedingungen) -> list:
+    """Baut die pyarrow-Filterliste aus Spalte=Wert oder Spalte=[Werte]."""
+    filter_liste = []
+    for spalte, wert in bedingungen.items():
+        if wert is None:
+            continue
+        if isinstance(wert, str):
+            wert = [wert]
+        filter_liste.append((spalte, 'in', list(wert)))
+    return filter_liste
+
+
+def _row_groups(metadata, filter_liste: list) -> list:
+    """
+    Indizes der Row Groups, die laut ihren min/max-Statistiken Zeilen für alle Filter
+    enthalten können. pyarrow selbst überspringt bei Kategorie-Spalten (Dictionary) keine
+    Row Groups, daher wird hier anhand der Statistiken in den Metadaten ausgewählt.
+    """
+    gruppen = []
+    for i in range(metadata.num_row_groups):
+        gruppe = metadata.row_group(i)
+        statistiken = {gruppe.column(j).path_in_schema: gruppe.column(j).statistics for j in range(gruppe.num_columns)}
+        if all(_moeglich(statistiken.get(spalte), werte) for spalte, _, werte in filter_liste):
+            gruppen.append(i)
+    return gruppen
+
+
+def _moeglich(statistik, werte: list) -> bool:
+    """False nur, wenn die Statistik belegt, dass keiner der Werte in der Row Group vorkommt."""
+    if statistik is None or not statistik.has_min_max:
+        return True
+    return any(statistik.min <= wert <= statistik.max for wert in werte)
+
+
+def lade_df_merged(
+    pfad: str = PARQUET_PFAD,
+    fisch=None,
+    lake=None,
+    scenario=None,
+    depth=None,
+    spalten=None
+    ) -> pd.DataFrame:
+    """
+    Lädt df_merged aus der Parquet-Datei. Anhand der Filter werden nur die Row Groups
+    gelesen, die passende Zeilen enthalten können (mit schreibe_df_merged eine pro Fisch).
+    Die Standarddatei PARQUET_PFAD wird vorher mit parquet_aus_csv aktuell gehalten.
+
+    Parameters:
+        pfad (str): Parquet-Datei, erzeugt mit schreibe_df_merged.
+        fisch, lake, scenario, depth (str oder list): Optionale Filter.
+        spalten (list): Optional nur diese Spalten laden.
+
+    Returns:
+        pd.DataFrame: Typisierte Daten (nur die gefilterten Zeilen).
+    """
+    if pfad == PARQUET_PFAD:
+        # Aus der CSV-Datei erzeugen, wenn die Datei fehlt oder die CSV-Datei sich geändert hat
+        parquet_aus_csv(pfad)
+
+    filter_liste = _filter(Fisch=fisch, lake=lake, scenario=scenario, depth=depth)
+    datei = pq.ParquetFile(pfad)
+    gruppen = _row_groups(datei.metadata, filter_liste)
+    lese_spalten = None if spalten is None else list(dict.fromkeys([*spalten, *(s for s, _, _ in filter_liste)]))
+    df = datei.read_row_groups(gruppen, columns=lese_spalten).to_pandas()
+
+    # Row Groups mit mehreren Werten einer Filterspalte enthalten noch fremde Zeilen
+    for spalte, _, werte in filter_liste:
+        df = df[df[spalte].isin(werte)]
+    df = df.reset_index(drop=True)
+    if spalten is not None:
+        df = df[spalten]
+
+    # Kategorien, die nach dem Filtern nicht mehr vorkommen, entfernen
+    for spalte in df.select_dtypes('category').columns:
+        df[spalte] = df[spalte].cat.remove_unused_categories()
+
+    return df
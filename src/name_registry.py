@@ -0,0 +1,211 @@
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from merged_store import DATA_DIR
+
+
+# Kanonische Seenamen (wie see_data_json, see_lat_lon_final.csv, df_merged) -> Namen in anderen Quellen
+# (kritische_temperaturen.csv, Fischdaten.csv, Fischdaten_gemappt.csv, Mapping aus See-daten-M.ipynb)
+SEE_ALIASE = {
+    "Maggiore": ["L. Maggiore"],
+    "Lower-Lugano": ["Lower L. Lugano"],
+    "Upper-Lugano": ["Upper L. Lugano"],
+    "Geneva": ["L. Geneva"],
+    "Lower-Constance": ["Lower L. Constance"],
+    "Upper-Constance": ["Upper L. Constance"],
+    "Upper-Zurich": ["Upper L. Zürich"],
+    "Lower-Zurich": ["Lower L. Zürich"],
+    "Walen": ["Walensee"],
+    "Rot": ["Rotsee"],
+    "Biel": ["L. Biel"],
+    "Murten": ["L. Murten"],
+    "Neuchatel": ["L. Neuchâtel"],
+    "Lucerne-Alpnacher": ["L. Alpnach"],
+    "Lucerne-Gersauer": ["L. Lucerne, Gersauer Becken"],
+    "Lucerne-Kreuztrichter": ["L. Lucerne, Kreuztrichter"],
+    "Lucerne-Urnersee": ["L. Lucerne, Urnersee"],
+    "Greifen": ["Greifensee"],
+    "Pfaffikon": ["Pfäffikersee"],
+    "Brienz": ["L. Brienz"],
+    "Klontaler": ["Klöntalersee"],
+    "Poschiavo": ["Lago di Poschiavo"],
+    "Joux": ["Lac de Joux"],
+    "LacdelHongrin": ["Lac de l'Hongrin"],
+    "LakeDavos": ["L. Davos"],
+    "Oeschinensee": [],
+    "StMoritz": ["L. St. Moritz"],
+    "Silvaplana": ["L. Silvaplana"],
+    "Sils": ["L. Sils"],
+}
+
+FISCHDATEN_PFAD = os.path.join(DATA_DIR, "Fischdaten_final.csv")
+
+
+def schluessel(name) -> str:
+    """Vergleichsschlüssel: ohne Akzente, Gross-/Kleinschreibung, Leer- und Satzzeichen."""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^0-9a-z]", "", text.casefold())
+
+
+def _wissenschaftliche_namen(fische, wissenschaftlich) -> dict:
+    """Wissenschaftliche Namen als Aliase, nur wo sie genau einen Fisch bezeichnen."""
+    wissenschaftlich = pd.Series(list(wissenschaftlich), dtype=str).str.strip()
+    eindeutig = ~wissenschaftlich.duplicated(keep=False)
+    return {f: [w] for f, w, e in zip(fische, wissenschaftlich, eindeutig) if e}
+
+
+class Namen:
+    """Eine Dimension mit kanonischen Namen, fortlaufenden IDs und Alias-Auflösung."""
+
+    def __init__(self, namen, aliase: dict = None):
+        self.namen = pd.Index(list(namen))
+        self._ids = {}
+        self._roh = {}
+        for i, name in enumerate(self.namen):
+            self._ids[schluessel(name)] = i
+            self._roh[str(name)] = i
+        for kanonisch, weitere in (aliase or {}).items():
+            if schluessel(kanonisch) not in self._ids:
+                continue
+            for alias in weitere:
+                self._ids.setdefault(schluessel(alias), self._ids[schluessel(kanonisch)])
+                self._roh.setdefault(str(alias), self._ids[schluessel(kanonisch)])
+
+    def __len__(self):
+        return len(self.namen)
+
+    def id(self, name) -> int:
+        try:
+            return self._ids[schluessel(name)]
+        except KeyError:
+            raise KeyError(f"Unbekannter Name: {name!r}") from None
+
+    def ids(self, namen) -> np.ndarray:
+        """IDs für viele Namen, -1 für unbekannte (Schlüssel wird nur einmal pro Wert berechnet)."""
+        werte = pd.Series(namen, dtype=object)
+        eindeutig = pd.unique(werte)
+        tabelle = {name: self._ids.get(schluessel(name), -1) for name in eindeutig}
+        return werte.map(tabelle).to_numpy(dtype=np.int64)
+
+    def kanonisch(self, name) -> str:
+        return self.namen[self.id(name)]
+
+    def tabelle(self) -> dict:
+        """Namen und Aliase, jeweils wörtlich und als Schlüssel -> ID."""
+        return {**self._ids, **self._roh}
+
+
+class Register:
+    """
+    Kanonische Namen und ganzzahlige IDs für Seen und Fische über alle Datenquellen.
+
+    Seen heissen je nach Quelle 'L. Maggiore' oder 'Maggiore'; beide (und Schreibvarianten wie
+    'l. maggiore') ergeben dieselbe ID. Fische sind über den deutschen Namen und, wo eindeutig,
+    über den wissenschaftlichen Namen auffindbar.
+
+    Das Vorkommen ist zweimal als gepackte Bitmap gespeichert: Fische x Seen (wie
+    Sternschema.anwesenheit) und Seen x Fische, damit beide Richtungen eine Zeile lesen und
+    Schnittmengen ein bitweises UND über wenige Bytes sind.
+    """
+
+    def __init__(self, seen, fische, vorkommen: np.ndarray, see_aliase: dict = SEE_ALIASE, fisch_aliase: dict = None):
+        self.seen = Namen(seen, see_aliase)
+        self.fische = Namen(fische, fisch_aliase)
+        vorkommen = np.asarray(vorkommen, dtype=bool)
+        self.fisch_bits = np.packbits(vorkommen, axis=1)
+        self.see_bits = np.packbits(vorkommen.T, axis=1)
+
+    @classmethod
+    def aus_fischdaten(cls, pfad: str = FISCHDATEN_PFAD, seen=None) -> 'Register':
+        """
+        Register aus einer Vorkommenstabelle mit JA/NEIN-Spalte pro See (Fischdaten_final.csv,
+        kritische_temperaturen.csv, ...). Die Spaltennamen werden auf die kanonischen Seen abgebildet.
+
+        Parameters:
+            seen: Kanonische Seen (Standard: alle aus SEE_ALIASE in dieser Reihenfolge).
+        """
+        df = pd.read_csv(pfad).rename(columns={'Name deutsch/lokal': 'Fisch'}).drop_duplicates('Fisch')
+        seen_namen = Namen(seen if seen is not None else SEE_ALIASE, SEE_ALIASE)
+        spalten = {spalte: seen_namen.ids([spalte])[0] for spalte in df.columns}
+        spalten = {spalte: i for spalte, i in spalten.items() if i >= 0}
+
+        vorkommen = np.zeros((len(df), len(seen_namen)), dtype=bool)
+        for spalte, i in spalten.items():
+            vorkommen[:, i] = df[spalte].astype(str).str.strip().str.upper() == 'JA'
+
+        fisch_aliase = _wissenschaftliche_namen(df['Fisch'], df['Name wissenschaftlich'])
+        return cls(seen_namen.namen, df['Fisch'].astype(str).str.strip(), vorkommen, fisch_aliase=fisch_aliase)
+
+    @classmethod
+    def aus_sternschema(cls, schema) -> 'Register':
+        """Register mit den Seen und Fischen (und der Bitmap) eines Sternschemas."""
+        vorkommen = np.unpackbits(schema.anwesenheit, axis=1, count=len(schema.seen)).astype(bool)
+        fisch_aliase = _wissenschaftliche_namen(schema.fische.index, schema.fische['Name wissenschaftlich'])
+        return cls(schema.seen, schema.fische.index, vorkommen, fisch_aliase=fisch_aliase)
+
+    def see_id(self, name) -> int:
+        return self.seen.id(name)
+
+    def fisch_id(self, name) -> int:
+        return self.fische.id(name)
+
+    def see(self, name) -> str:
+        """Kanonischer Seename für einen beliebigen Alias."""
+        return self.seen.kanonisch(name)
+
+    def fisch(self, name) -> str:
+        return self.fische.kanonisch(name)
+
+    def kanonisieren(self, df: pd.DataFrame, spalte: str = 'lake') -> pd.DataFrame:
+        """
+        Ersetzt Seenamen in spalte durch die kanonischen Namen ('See' wird zu 'lake').
+        Unbekannte Namen bleiben unverändert.
+        """
+        df = df.rename(columns={'See': 'lake'}) if spalte == 'lake' and 'See' in df.columns else df.copy()
+        ids = self.seen.ids(df[spalte])
+        df[spalte] = np.where(ids >= 0, self.seen.namen.to_numpy()[np.maximum(ids, 0)], df[spalte])
+        return df
+
+    def kommt_vor(self, fisch, see) -> bool:
+        """True, wenn der Fisch im See vorkommt (ein Bit)."""
+        j = self.see_id(see)
+        return bool(self.fisch_bits[self.fisch_id(fisch), j >> 3] & (0x80 >> (j & 7)))
+
+    def _namen(self, bits: np.ndarray, namen: pd.Index) -> list:
+        return namen[np.flatnonzero(np.unpackbits(bits, count=len(namen)))].tolist()
+
+    def fische_in(self, see) -> list:
+        """Alle Fische eines Sees."""
+        return self._namen(self.see_bits[self.see_id(see)], self.fische.namen)
+
+    def seen_fuer(self, fisch) -> list:
+        """Alle Seen, in denen ein Fisch vorkommt."""
+        return self._namen(self.fisch_bits[self.fisch_id(fisch)], self.seen.namen)
+
+    def gemeinsame_fische(self, seen) -> list:
+        """Fische, die in allen angegebenen Seen vorkommen."""
+        bits = np.bitwise_and.reduce(self.see_bits[[self.see_id(s) for s in seen]], axis=0)
+        return self._namen(bits, self.fische.namen)
+
+    def fische_in_einem(self, seen) -> list:
+        """Fische, die in mindestens einem der angegebenen Seen vorkommen."""
+        bits = np.bitwise_or.reduce(self.see_bits[[self.see_id(s) for s in seen]], axis=0)
+        return self._namen(bits, self.fische.namen)
+
+    def gemeinsame_seen(self, fische) -> list:
+        """Seen, in denen alle angegebenen Fische vorkommen."""
+        bits = np.bitwise_and.reduce(self.fisch_bits[[self.fisch_id(f) for f in fische]], axis=0)
+        return self._namen(bits, self.seen.namen)
+
+    def anzahl_fische(self) -> pd.Series:
+        """Anzahl Fische pro See (Bits pro Zeile zählen; unpackbits statt bitwise_count, das erst ab NumPy 2 existiert)."""
+        anzahl = np.unpackbits(self.see_bits, axis=1).sum(axis=1, dtype=np.int64)
+        return pd.Series(anzahl, index=self.seen.namen, name='Anzahl Fische')
+
+    def paar_ids(self) -> tuple:
+        """Alle vorkommenden Paare als ID-Arrays (Fisch-ID, See-ID)."""
+        return np.nonzero(np.unpackbits(self.fisch_bits, axis=1, count=len(self.seen)))
@@ -0,0 +1,238 @@
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from json_stream import lese_arrays
+from merged_store import DATA_DIR, PARQUET_PFAD, SCHWELLEN_SPALTEN, schreibe_df_merged
+
+
+JSON_ORDNER = os.path.join(DATA_DIR, "see_data_json")
+FISCHDATEN_PFAD = os.path.join(DATA_DIR, "Fischdaten_final.csv")
+TRANSFORMIERT_ORDNER = os.path.join(DATA_DIR, "See_Temperatur_transformiert")
+KOMBINIERT_PFAD = os.path.join(DATA_DIR, "temperaturdaten_kombiniert.csv")
+CACHE_ORDNER = os.path.join(DATA_DIR, "cache")
+# Schlüssel der zuletzt geschriebenen Endergebnisse, pro Ausgabepfad
+AUSGABEN_PFAD = os.path.join(CACHE_ORDNER, "ausgaben.json")
+
+# Bei Änderungen an der Logik einer Stufe erhöhen, damit der Cache neu gebaut wird
+PIPELINE_VERSION = "1"
+
+FISCH_ID_SPALTEN = ['Fisch', 'Name wissenschaftlich', 'Einzugsgebiet', 'Gefährdungsstatus']
+
+
+def _hash(*teile) -> str:
+    """Kurzer Inhalts-Hash über Bytes/Strings (Eingaben, Parameter und Version)."""
+    h = hashlib.sha256(PIPELINE_VERSION.encode())
+    for teil in teile:
+        h.update(teil if isinstance(teil, bytes) else str(teil).encode())
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+def _datei_hash(pfad: str) -> str:
+    with open(pfad, "rb") as f:
+        return _hash(f.read())
+
+
+def _gecacht(stufe: str, partition: str, schluessel: str, berechnen) -> tuple:
+    """
+    Gibt das Ergebnis einer Stufe für eine Partition aus dem Cache zurück oder berechnet es neu.
+    Veraltete Einträge derselben Partition werden gelöscht.
+
+    Returns:
+        tuple: (DataFrame, True wenn neu berechnet)
+    """
+    ordner = os.path.join(CACHE_ORDNER, stufe)
+    os.makedirs(ordner, exist_ok=True)
+    pfad = os.path.join(ordner, f"{partition}-{schluessel}.parquet")
+    if os.path.exists(pfad):
+        return pd.read_parquet(pfad), False
+
+    df = berechnen()
+    df.to_parquet(pfad, index=False)
+    # Genau <partition>-<16 Hex-Zeichen>, damit 'Lucerne' nicht 'Lucerne-Urnersee' trifft
+    muster = f"{glob.escape(partition)}-{'[0-9a-f]' * len(schluessel)}.parquet"
+    for alt in glob.glob(os.path.join(ordner, muster)):
+        if alt != pfad:
+            os.remove(alt)
+    return df, True
+
+
+# Stufe 1: JSON flach machen -> lange Tabelle pro See
+def jahreswerte_see(json_pfad: str) -> pd.DataFrame:
+    """
+    Liest die Jahreswerte eines Sees aus der JSON-Datei als lange Tabelle
+    (lake, year, temperature_avg/min/max, scenario, depth).
+    """
+    lake = os.path.basename(json_pfad).replace(".json", "")
+    arrays = lese_arrays(json_pfad, ["yearly"])
+
+    dfs = []
+    for depth in ["surface", "bottom"]:
+        for scenario in ["RCP26", "RCP45", "RCP85"]:
+            pfad = f"yearly.{depth}.{scenario}"
+            dfs.append(pd.DataFrame({
+                "year": arrays[f"{pfad}.x"].astype(int),
+                "temperature_avg": arrays[f"{pfad}.y_ave"],
+                "temperature_min": arrays[f"{pfad}.y_min"],
+                "temperature_max": arrays[f"{pfad}.y_max"],
+                "scenario": scenario,
+                "depth": depth,
+                "lake": lake
+            }))
+    return pd.concat(dfs, ignore_index=True)
+
+
+# Stufe 2: Tabelle im Format von See_Temperatur_transformiert
+def transformiert_see(df_see: pd.DataFrame, depth: str = "surface", spalte: str = "temperature_max") -> pd.DataFrame:
+    """
+    Reduziert die lange Tabelle eines Sees auf See, Szenario, Jahr, Temperatur.
+    """
+    df = df_see[df_see['depth'] == depth]
+    return pd.DataFrame({
+        "See": df['lake'],
+        "Szenario": df['scenario'],
+        "Jahr": df['year'],
+        "Temperatur": df[spalte]
+    }).sort_values(["Szenario", "Jahr"]).reset_index(drop=True)
+
+
+# Stufe 4 + 5: Fischdaten eines Sees mit den Temperaturen verbinden und Überleben berechnen
+def merge_see(df_see: pd.DataFrame, df_fisch_see: pd.DataFrame, spalte: str = "temperature_max") -> pd.DataFrame:
+    """
+    Verbindet die Fische, die im See vorkommen, mit der Temperaturtabelle des Sees
+    und setzt die Spalte überlebt (spalte < Kritische Temperatur).
+    """
+    df_merged = pd.merge(df_fisch_see, df_see, on='lake', how='inner')
+    df_merged['Kritische Temperatur °C'] = pd.to_numeric(df_merged['Kritische Temperatur °C'], errors='coerce')
+    df_merged['überlebt'] = df_merged[spalte] < df_merged['Kritische Temperatur °C']
+    return df_merged
+
+
+def fische_pro_see(fischdaten_pfad: str = FISCHDATEN_PFAD) -> pd.DataFrame:
+    """
+    Wandelt Fischdaten_final.csv (JA/NEIN-Spalte pro See) in eine lange Tabelle
+    mit einer Zeile pro Fisch und See, in dem er vorkommt.
+    """
+    df_fisch = pd.read_csv(fischdaten_pfad).rename(columns={'Name deutsch/lokal': 'Fisch'})
+    seen = [spalte for spalte in df_fisch.columns if spalte not in FISCH_ID_SPALTEN + SCHWELLEN_SPALTEN]
+    df_long = df_fisch.melt(
+        id_vars=FISCH_ID_SPALTEN + SCHWELLEN_SPALTEN,
+        value_vars=seen,
+        var_name='lake',
+        value_name='present'
+    )
+    return df_long[df_long['present'] == 'JA'].drop(columns='present').reset_index(drop=True)
+
+
+def _seen_reihenfolge(df: pd.DataFrame, pfad: str) -> pd.DataFrame:
+    """
+    Sortiert die kombinierte Tabelle nach See, Szenario und Jahr. Die Seen behalten die
+    Reihenfolge einer bestehenden Datei unter pfad (neue Seen alphabetisch dahinter), damit
+    die eingecheckte CSV bei gleichen Daten Byte für Byte gleich bleibt.
+    """
+    bisher = list(pd.unique(pd.read_csv(pfad, usecols=['See'])['See'])) if os.path.exists(pfad) else []
+    seen = [see for see in bisher if see in set(df['See'])] + sorted(set(df['See']) - set(bisher))
+    rang = df['See'].map({see: i for i, see in enumerate(seen)})
+    return (df.assign(_rang=rang).sort_values(['_rang', 'Szenario', 'Jahr'], kind='stable')
+            .drop(columns='_rang').reset_index(drop=True))
+
+
+def _ausgabe_aktuell(pfad: str, schluessel: str) -> bool:
+    if not os.path.exists(pfad) or not os.path.exists(AUSGABEN_PFAD):
+        return False
+    with open(AUSGABEN_PFAD, "r", encoding="utf-8") as f:
+        return json.load(f).get(os.path.abspath(pfad)) == schluessel
+
+
+def _ausgabe_merken(pfad: str, schluessel: str) -> None:
+    ausgaben = {}
+    if os.path.exists(AUSGABEN_PFAD):
+        with open(AUSGABEN_PFAD, "r", encoding="utf-8") as f:
+            ausgaben = json.load(f)
+    ausgaben[os.path.abspath(pfad)] = schluessel
+    os.makedirs(CACHE_ORDNER, exist_ok=True)
+    with open(AUSGABEN_PFAD, "w", encoding="utf-8") as f:
+        json.dump(ausgaben, f, indent=1, sort_keys=True)
+
+
+def pipeline_ausfuehren(
+    json_ordner: str = JSON_ORDNER,
+    fischdaten_pfad: str = FISCHDATEN_PFAD,
+    spalte: str = "temperature_max",
+    csv_ausgabe: bool = True,
+    parquet_pfad: str = PARQUET_PFAD,
+    kombiniert_pfad: str = KOMBINIERT_PFAD,
+    transformiert_ordner: str = TRANSFORMIERT_ORDNER
+    ) -> pd.DataFrame:
+    """
+    Führt die ganze Pipeline JSON -> See-Tabellen -> kombinierte Tabelle -> df_merged aus.
+    Jede Stufe wird pro See im Cache abgelegt und nur neu gebaut, wenn sich der Hash
+    ihrer Eingaben (JSON-Datei, Fischzeilen des Sees, Parameter) geändert hat. Die
+    Endergebnisse hängen vom Hash über alle Seen ab, ein gelöschter See baut sie also neu.
+
+    Parameters:
+        json_ordner (str): Ordner mit den JSON-Dateien pro See.
+        fischdaten_pfad (str): Fischdaten_final.csv.
+        spalte (str): Temperaturspalte für den Überlebens-Vergleich.
+        csv_ausgabe (bool): Zusätzlich die CSV-Zwischenstände schreiben.
+        parquet_pfad (str): Ziel für df_merged (None = nicht schreiben).
+        kombiniert_pfad (str): Ziel der kombinierten Tabelle (nur mit csv_ausgabe).
+        transformiert_ordner (str): Ziel der Tabellen pro See (nur mit csv_ausgabe).
+
+    Returns:
+        pd.DataFrame: df_merged über alle Seen; attrs['neu_gebaut'] listet die neu gebauten Seen.
+    """
+    df_fisch_long = fische_pro_see(fischdaten_pfad)
+    dateien = sorted(f for f in os.listdir(json_ordner) if f.endswith(".json"))
+
+    transformiert, merged, neu_gebaut, partitionen = [], [], [], []
+    for datei in dateien:
+        lake = datei.replace(".json", "")
+        json_pfad = os.path.join(json_ordner, datei)
+
+        schluessel_see = _hash(_datei_hash(json_pfad))
+        df_see, neu_see = _gecacht("jahreswerte", lake, schluessel_see, lambda: jahreswerte_see(json_pfad))
+
+        schluessel_trans = _hash(schluessel_see, "surface", spalte)
+        df_trans, neu_trans = _gecacht("transformiert", lake, schluessel_trans, lambda: transformiert_see(df_see, spalte=spalte))
+        trans_pfad = os.path.join(transformiert_ordner, f"{lake}_temperaturen_transformiert.csv")
+        if csv_ausgabe and (neu_trans or not os.path.exists(trans_pfad)):
+            os.makedirs(transformiert_ordner, exist_ok=True)
+            df_trans.to_csv(trans_pfad, index=False)
+        transformiert.append(df_trans)
+
+        # Nur die Fischzeilen dieses Sees fliessen in den Schlüssel ein
+        df_fisch_see = df_fisch_long[df_fisch_long['lake'] == lake]
+        schluessel_merge = _hash(schluessel_see, df_fisch_see.to_csv(index=False), spalte)
+        df_merge, neu_merge = _gecacht("merged", lake, schluessel_merge, lambda: merge_see(df_see, df_fisch_see, spalte))
+        merged.append(df_merge)
+        partitionen.append((lake, schluessel_trans, schluessel_merge))
+
+        if neu_see or neu_trans or neu_merge:
+            neu_gebaut.append(lake)
+
+    # Stufe 3: kombinierte Tabelle
+    df_merged = pd.concat(merged, ignore_index=True)
+    df_merged.attrs["neu_gebaut"] = neu_gebaut
+
+    if csv_ausgabe:
+        schluessel = _hash("kombiniert", *[f"{lake}:{trans}" for lake, trans, _ in partitionen])
+        if not _ausgabe_aktuell(kombiniert_pfad, schluessel):
+            df_kombiniert = pd.concat(transformiert, ignore_index=True)
+            _seen_reihenfolge(df_kombiniert, kombiniert_pfad).to_csv(kombiniert_pfad, index=False)
+            _ausgabe_merken(kombiniert_pfad, schluessel)
+    if parquet_pfad is not None:
+        schluessel = _hash("merged", *[f"{lake}:{merge}" for lake, _, merge in partitionen])
+        if not _ausgabe_aktuell(parquet_pfad, schluessel):
+            schreibe_df_merged(df_merged, parquet_pfad, quelle={"pipeline": schluessel})
+            _ausgabe_merken(parquet_pfad, schluessel)
+    return df_merged
+
+
+if __name__ == "__main__":
+    df_merged = pipeline_ausfuehren()
+    print(f"Pipeline fertig: {len(df_merged.attrs['neu_gebaut'])} Seen neu gebaut {df_merged.attrs['neu_gebaut']}")
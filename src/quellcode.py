@@ -0,0 +1,36 @@
+import ast
+import hashlib
+import os
+
+
+# Nur Standardbibliothek, damit auch cli.py den Hash ohne pandas berechnen kann
+QUELL_ORDNER = os.path.dirname(os.path.abspath(__file__))
+
+
+def lokale_module(*module: str) -> list:
+    """Module aus src/, die module direkt oder über andere Module importieren (inklusive module), sortiert."""
+    gefunden, offen = set(), list(module)
+    while offen:
+        name = offen.pop()
+        pfad = os.path.join(QUELL_ORDNER, f"{name}.py")
+        if name in gefunden or not os.path.exists(pfad):
+            continue
+        gefunden.add(name)
+        with open(pfad, "rb") as f:
+            baum = ast.parse(f.read())
+        for knoten in ast.walk(baum):
+            if isinstance(knoten, ast.Import):
+                offen += [alias.name.split(".")[0] for alias in knoten.names]
+            elif isinstance(knoten, ast.ImportFrom) and knoten.module and not knoten.level:
+                offen.append(knoten.module.split(".")[0])
+    return sorted(gefunden)
+
+
+def quellcode_hash(module, h=None) -> str:
+    """Hash über Namen und Quelltext der angegebenen Module aus src/ (in sortierter Reihenfolge)."""
+    h = h or hashlib.sha256()
+    for name in sorted(module):
+        with open(os.path.join(QUELL_ORDNER, f"{name}.py"), "rb") as f:
+            h.update(f"{name}\0".encode())
+            h.update(f.read())
+    return h.hexdigest()[:16]
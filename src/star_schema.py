@@ -0,0 +1,311 @@
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from merged_store import DATA_DIR, SCHWELLEN_SPALTEN, TEMPERATUR_SPALTEN, typisieren
+from name_registry import Register
+
+
+FISCH_SPALTEN = ['Fisch', 'Name wissenschaftlich', 'Einzugsgebiet', 'Gefährdungsstatus', *SCHWELLEN_SPALTEN]
+FAKTEN_SCHLUESSEL = ['lake', 'scenario', 'depth', 'year']
+SERIEN_SCHLUESSEL = ['lake', 'scenario', 'depth']
+
+# Name der Tiefe, wenn über die kühlste Schicht ausgewertet wird
+REFUGIUM = 'refugium'
+
+# Einzugsgebiet fehlt in Fischdaten
+UNBEKANNT = 'unbekannt'
+# Tippfehler und angehängte Codes in der Spalte Einzugsgebiet
+EINZUGSGEBIET_KORREKTUREN = {'Rhei': 'Rhein', 'Ticiono': 'Ticino', 'Ticino DU': 'Ticino'}
+
+
+@dataclass
+class Sternschema:
+    """
+    Normalisiertes Datenmodell statt des denormalisierten df_merged:
+
+    - temperaturen: Faktentabelle (lake, scenario, depth, year) mit temperature_avg/min/max
+    - fische: Fisch-Dimension mit Metadaten und Schwellenwerten, Index = Fisch
+    - seen: Seen in Spaltenreihenfolge der Vorkommens-Bitmap
+    - anwesenheit: gepackte Bitmap (Fische x Seen), 1 = Fisch kommt im See vor
+
+    Der Speicherbedarf wächst mit Fische + Seen x Jahre statt Fische x Seen x Jahre.
+    Überleben und Sterbejahre werden erst bei der Abfrage berechnet.
+    """
+    temperaturen: pd.DataFrame
+    fische: pd.DataFrame
+    seen: pd.Index
+    anwesenheit: np.ndarray
+
+    @classmethod
+    def aus_vorkommen(cls, temperaturen: pd.DataFrame, fische: pd.DataFrame, seen, vorkommen: np.ndarray) -> 'Sternschema':
+        """Sternschema aus einer bool-Matrix (Fische x Seen), die zur Bitmap gepackt wird."""
+        return cls(temperaturen, fische, pd.Index(seen, name='lake'), np.packbits(np.asarray(vorkommen, dtype=bool), axis=1))
+
+    def vorkommen(self) -> np.ndarray:
+        """Entpackt die Bitmap zu einer bool-Matrix (Fische x Seen)."""
+        return np.unpackbits(self.anwesenheit, axis=1, count=len(self.seen)).astype(bool)
+
+    def paare(self, fisch_namen=None) -> pd.DataFrame:
+        """Alle Fisch-See-Paare, in denen der Fisch vorkommt (optional nur für fisch_namen)."""
+        fisch_idx, see_idx = np.nonzero(self.vorkommen())
+        paare = pd.DataFrame({'Fisch': self.fische.index[fisch_idx], 'lake': self.seen[see_idx]})
+        if fisch_namen is not None:
+            if isinstance(fisch_namen, str):
+                fisch_namen = [fisch_namen]
+            paare = paare[paare['Fisch'].isin(fisch_namen)].reset_index(drop=True)
+        return paare
+
+    def serien(self, spalte: str = 'temperature_max') -> pd.DataFrame:
+        """Temperaturreihen als breite Tabelle: Index (lake, scenario, depth), Spalten = Jahre."""
+        return (
+            self.temperaturen.set_index(FAKTEN_SCHLUESSEL)[spalte]
+            .unstack('year')
+            .sort_index(axis=1)
+        )
+
+    def wuerfel(self, spalte: str = 'temperature_max') -> tuple:
+        """
+        Temperaturen als dichtes Array (lake, scenario, depth, year), fehlende Werte NaN.
+
+        Returns:
+            tuple: (seen, szenarien, tiefen, jahre, cube)
+        """
+        achsen, codes = [], []
+        for schluessel in FAKTEN_SCHLUESSEL:
+            werte, code = np.unique(self.temperaturen[schluessel].to_numpy(), return_inverse=True)
+            achsen.append(pd.Index(werte, name=schluessel))
+            codes.append(code)
+        cube = np.full([len(achse) for achse in achsen], np.nan)
+        cube[tuple(codes)] = self.temperaturen[spalte].to_numpy(dtype=np.float64)
+        return (*achsen, cube)
+
+    def refugium_serien(self, spalte: str = 'temperature_max') -> pd.DataFrame:
+        """
+        Temperatur der kühlsten Tiefe pro See, Szenario und Jahr als breite Tabelle:
+        Index (lake, scenario), Spalten = Jahre.
+        """
+        seen, szenarien, _, jahre, cube = self.wuerfel(spalte)
+        return pd.DataFrame(
+            kuehlste_tiefe(cube).reshape(-1, len(jahre)),
+            index=pd.MultiIndex.from_product([seen, szenarien]),
+            columns=jahre
+        )
+
+    def sterbejahre(self, fisch_namen=None, spalte: str = 'temperature_max', refugium: bool = False) -> pd.DataFrame:
+        """
+        Berechnet das erste Jahr, in dem spalte >= Kritische Temperatur ist, für jedes
+        Fisch-See-Paar und jede Temperaturreihe des Sees, ohne df_merged aufzubauen.
+
+        Mit refugium=True überlebt ein Fisch ein Jahr, solange mindestens eine Tiefe unter der
+        kritischen Temperatur bleibt (Rückzug in kühlere Schichten). Die Tiefen werden dafür vorab
+        in einem Schritt auf die kühlste reduziert, die Spalte depth heisst dann 'refugium'.
+
+        Returns:
+            pd.DataFrame: Gleiche Form wie visualisation.sterbejahre_berechnen, d.h. Index (Fisch, lake),
+                          Spalten (scenario, depth), NaN = stirbt nie.
+        """
+        serien = self.refugium_serien(spalte) if refugium else self.serien(spalte)
+        jahre = serien.columns.to_numpy()
+
+        # Paare mit allen Temperaturreihen ihres Sees verbinden (Fische x Reihen, nicht x Jahre)
+        kombi = self.kombinationen(serien.index, fisch_namen)
+        if refugium:
+            kombi['depth'] = REFUGIUM
+        krit = self.kritische_temperaturen(kombi['Fisch'])
+
+        pos = PraefixMaximum.aus_werten(serien.to_numpy(dtype=np.float64)).erster_index(kombi['reihe'].to_numpy(), krit)
+        sterbejahr = np.where(pos < len(jahre), jahre[np.minimum(pos, len(jahre) - 1)], np.nan)
+        kombi['sterbejahr'] = sterbejahr
+
+        wide = kombi.set_index(['Fisch', 'lake', 'scenario', 'depth'])['sterbejahr'].unstack(['scenario', 'depth'])
+        return wide.reindex(pd.MultiIndex.from_frame(self.paare(fisch_namen)))
+
+    def kombinationen(self, index: pd.MultiIndex, fisch_namen=None) -> pd.DataFrame:
+        """
+        Verbindet jedes Fisch-See-Paar mit allen Temperaturreihen seines Sees.
+        index ist der Index der Reihen (mindestens mit der Stufe lake).
+
+        Returns:
+            pd.DataFrame: Fisch, lake, weitere Stufen von index und reihe (Zeilennummer in index).
+        """
+        reihen = index.to_frame(index=False)
+        reihen['reihe'] = np.arange(len(reihen))
+        return self.paare(fisch_namen).merge(reihen, on='lake', how='inner', sort=False)
+
+    def kritische_temperaturen(self, fische) -> np.ndarray:
+        """Kritische Temperatur als float64-Array für eine Folge von Fischnamen (fehlend = NaN)."""
+        return (
+            pd.to_numeric(self.fische['Kritische Temperatur °C'], errors='coerce')
+            .astype(np.float64)
+            .reindex(fische)
+            .to_numpy()
+        )
+
+    def fisch_daten(self, fisch: str, lake=None) -> pd.DataFrame:
+        """
+        Baut die df_merged-Zeilen für einen Fisch (optional nur bestimmte Seen) zur Abfragezeit auf,
+        z.B. als df_forelle für plot_scenario.
+        """
+        seen = self.paare(fisch)['lake']
+        if lake is not None:
+            seen = seen[seen.isin([lake] if isinstance(lake, str) else lake)]
+
+        df = self.temperaturen[self.temperaturen['lake'].isin(seen)].reset_index(drop=True)
+        info = self.fische.loc[fisch]
+        for spalte in reversed(FISCH_SPALTEN[1:]):
+            # Datentyp der Dimension beibehalten (z.B. Float32 mit <NA>)
+            df.insert(0, spalte, pd.Series(info[spalte], index=df.index, dtype=self.fische[spalte].dtype))
+        df.insert(0, 'Fisch', fisch)
+        df['überlebt'] = (df['temperature_max'] < df['Kritische Temperatur °C']).fillna(False).astype(bool)
+        return df
+
+    def zu_df_merged(self) -> pd.DataFrame:
+        """Erzeugt das denormalisierte df_merged (nur für Export oder Vergleich)."""
+        df = (
+            self.paare()
+            .merge(self.fische.reset_index(), on='Fisch', how='left')
+            .merge(self.temperaturen, on='lake', how='inner')
+        )
+        df['überlebt'] = (df['temperature_max'] < df['Kritische Temperatur °C']).fillna(False).astype(bool)
+        return df
+
+
+def kuehlste_tiefe(cube: np.ndarray) -> np.ndarray:
+    """
+    Reduziert einen Würfel (lake, scenario, depth, year) über die Tiefen auf den kleinsten Wert
+    pro Jahr. Fehlende Tiefen werden ignoriert, fehlen alle, bleibt der Wert NaN.
+    """
+    return np.fmin.reduce(cube, axis=2)
+
+
+@dataclass
+class PraefixMaximum:
+    """
+    Laufende Maxima vieler Reihen, so abgelegt, dass das erste Jahr, das einen Schwellenwert
+    erreicht (>=), für beliebig viele (Reihe, Schwellenwert)-Anfragen mit einer einzigen sortierten Suche gefunden wird.
+    Das laufende Maximum ist monoton; jede Reihe wird um ein Vielfaches der Spannweite verschoben,
+    damit alle Reihen hintereinander eine sortierte Folge bilden.
+    """
+    flach: np.ndarray
+    untergrenze: float
+    spannweite: float
+    anzahl_jahre: int
+
+    @classmethod
+    def aus_werten(cls, werte: np.ndarray) -> 'PraefixMaximum':
+        """werte: Array (Reihen x Jahre); NaN zählt nie als Überschreitung."""
+        werte = np.asarray(werte, dtype=np.float64)
+        untergrenze = np.nanmin(werte) - 1.0
+        werte = np.where(np.isnan(werte), untergrenze, werte) - untergrenze
+        laufendes_max = np.maximum.accumulate(werte, axis=1)
+        spannweite = float(laufendes_max.max()) + 1.0
+        versatz = np.arange(len(werte))[:, None] * spannweite
+        return cls((laufendes_max + versatz).ravel(), untergrenze, spannweite, werte.shape[1])
+
+    def erster_index(self, reihe: np.ndarray, schwelle: np.ndarray) -> np.ndarray:
+        """
+        Index des ersten Jahres mit Wert >= schwelle in der jeweiligen Reihe, anzahl_jahre = nie.
+        Gleichheit zählt als erreicht (searchsorted side='left'), anders als bei
+        visualisation.erste_ueberschreitung (>).
+        reihe und schwelle werden gegeneinander gebroadcastet (z.B. mehrere Schwellen pro Reihe).
+        """
+        reihe, schwelle = np.broadcast_arrays(np.asarray(reihe), np.asarray(schwelle, dtype=np.float64))
+        suchwert = np.clip(schwelle - self.untergrenze, 0.0, self.spannweite - 0.5)
+        # Fehlender Schwellenwert: Vergleich ist nie wahr, der Fisch gilt ab dem ersten Jahr als tot
+        suchwert = np.where(np.isnan(suchwert), 0.0, suchwert)
+        return np.searchsorted(self.flach, suchwert + reihe * self.spannweite, side='left') - reihe * self.anzahl_jahre
+
+
+def einzugsgebiete(wert) -> list:
+    """
+    Zerlegt einen Eintrag der Spalte Einzugsgebiet ('Rhein, Rhone, Doubs, Ticino,') in die einzelnen
+    Gebiete, korrigiert Tippfehler (EINZUGSGEBIET_KORREKTUREN) und entfernt doppelte Einträge.
+    Fehlende Werte ergeben [UNBEKANNT].
+    """
+    if pd.isna(wert) or str(wert).strip() in ('', 'nan'):
+        return [UNBEKANNT]
+    gebiete = []
+    for teil in str(wert).split(','):
+        teil = EINZUGSGEBIET_KORREKTUREN.get(teil.strip(), teil.strip())
+        if teil and teil not in gebiete:
+            gebiete.append(teil)
+    return gebiete or [UNBEKANNT]
+
+
+def _fisch_dimension(df: pd.DataFrame) -> pd.DataFrame:
+    fische = typisieren(df[FISCH_SPALTEN].drop_duplicates('Fisch'))
+    for spalte in ['Fisch', 'Name wissenschaftlich', 'Einzugsgebiet', 'Gefährdungsstatus']:
+        fische[spalte] = fische[spalte].astype(str)
+    return fische.set_index('Fisch')
+
+
+def _temperatur_fakten(df: pd.DataFrame) -> pd.DataFrame:
+    fakten = df[FAKTEN_SCHLUESSEL + TEMPERATUR_SPALTEN].drop_duplicates(FAKTEN_SCHLUESSEL)
+    return typisieren(fakten).sort_values(FAKTEN_SCHLUESSEL).reset_index(drop=True)
+
+
+def sternschema_aus_df_merged(df_merged: pd.DataFrame) -> Sternschema:
+    """
+    Zerlegt ein bestehendes df_merged (Spalte 'See' oder 'lake') in das Sternschema.
+    """
+    df = df_merged.rename(columns={'See': 'lake'})
+    fische = _fisch_dimension(df)
+    seen = pd.Index(pd.unique(df['lake'].astype(str)), name='lake')
+
+    paare = df[['Fisch', 'lake']].astype(str).drop_duplicates()
+    vorkommen = np.zeros((len(fische), len(seen)), dtype=bool)
+    vorkommen[fische.index.get_indexer(paare['Fisch']), seen.get_indexer(paare['lake'])] = True
+
+    return Sternschema.aus_vorkommen(_temperatur_fakten(df), fische, seen, vorkommen)
+
+
+def lade_jahreswerte_json(ordner: str = os.path.join(DATA_DIR, "see_data_json")) -> pd.DataFrame:
+    """
+    Liest die Jahreswerte (yearly) aller Seen aus den JSON-Dateien als lange Tabelle.
+    """
+    dfs = []
+    for datei in sorted(os.listdir(ordner)):
+        if not datei.endswith(".json"):
+            continue
+        with open(os.path.join(ordner, datei), "r") as f:
+            data = json.load(f)
+        for depth, szenarien in data['yearly'].items():
+            for scenario, d in szenarien.items():
+                dfs.append(pd.DataFrame({
+                    "lake": datei.replace(".json", ""),
+                    "scenario": scenario,
+                    "depth": depth,
+                    "year": d["x"],
+                    "temperature_avg": d["y_ave"],
+                    "temperature_min": d["y_min"],
+                    "temperature_max": d["y_max"],
+                }))
+    return pd.concat(dfs, ignore_index=True)
+
+
+def sternschema_aus_dateien(
+    fischdaten_pfad: str = os.path.join(DATA_DIR, "Fischdaten_final.csv"),
+    json_ordner: str = os.path.join(DATA_DIR, "see_data_json")
+    ) -> Sternschema:
+    """
+    Baut das Sternschema direkt aus Fischdaten_final.csv (JA/NEIN-Spalten pro See)
+    und den JSON-Dateien der Seen, ohne den Cross-Join. Die Seespalten dürfen auch
+    anders heissen (z.B. 'L. Maggiore' in kritische_temperaturen.csv), siehe name_registry.
+    """
+    df_fisch = pd.read_csv(fischdaten_pfad).rename(columns={'Name deutsch/lokal': 'Fisch'})
+    fische = _fisch_dimension(df_fisch)
+
+    temperaturen = _temperatur_fakten(lade_jahreswerte_json(json_ordner))
+
+    # Nur Seen, für die es Temperaturdaten gibt, in der Spaltenreihenfolge der Fischdaten
+    register = Register.aus_fischdaten(fischdaten_pfad, seen=pd.unique(temperaturen['lake']))
+    spalten = [register.seen.ids([spalte])[0] for spalte in df_fisch.columns if spalte not in FISCH_SPALTEN]
+    seen = pd.Index(register.seen.namen[[i for i in spalten if i >= 0]], name='lake')
+    vorkommen = np.unpackbits(register.fisch_bits, axis=1, count=len(register.seen)).astype(bool)
+    vorkommen = vorkommen[register.fische.ids(fische.index)][:, register.seen.ids(seen)]
+
+    return Sternschema.aus_vorkommen(temperaturen, fische, seen, vorkommen)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Die Module in src/ importieren sich gegenseitig über den Modulnamen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
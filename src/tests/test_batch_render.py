@@ -0,0 +1,49 @@
+import json
+import re
+
+import pytest
+
+from batch_render import FARBEN, LABELS, _render_fisch, lokale_module
+from star_schema import sternschema_aus_dateien
+from visualisation import plot_forelle_scenario_animated_lines
+
+
+@pytest.fixture(scope="module")
+def paar():
+    schema = sternschema_aus_dateien()
+    fisch, see = schema.paare().iloc[0]
+    return schema.fisch_daten(fisch), fisch, see
+
+
+def test_code_version_umfasst_importierte_module():
+    module = lokale_module("batch_render")
+    assert {"batch_render", "visualisation", "star_schema", "merged_store", "name_registry"} <= set(module)
+    assert "figure_cache" not in module
+
+
+def test_animiert_json_gleich_html(paar, tmp_path):
+    df, fisch, see = paar
+    _render_fisch(fisch, df, [see], str(tmp_path), ("html", "json"), 10, True)
+    (html,) = tmp_path.glob("*.html")
+    (json_datei,) = tmp_path.glob("*.json")
+
+    aus_json = json.loads(json_datei.read_text(encoding="utf-8"))
+    # Plotly.newPlot("<id>", [daten], {layout}, {config}) im HTML
+    aufruf = re.search(r'Plotly\.newPlot\(\s*"[^"]+",\s*(\[.*?\]),\s*(\{.*?\}),\s*\{"responsive"', html.read_text(encoding="utf-8"), re.S)
+    assert json.loads(aufruf.group(1)) == aus_json["data"]
+    assert json.loads(aufruf.group(2)) == aus_json["layout"]
+    assert aus_json["layout"]["meta"]["animation"]["traces"] == [0, 1, 2]
+
+
+def test_client_waechst_linear(paar):
+    df, fisch, see = paar
+    kurz = df[df["year"] < 2040]
+    groessen = {}
+    for modus in ("client", "frames"):
+        groessen[modus] = [
+            len(plot_forelle_scenario_animated_lines(d, see, fisch, FARBEN, LABELS, modus=modus).to_json())
+            for d in (kurz, df)
+        ]
+    jahre = df["year"].nunique() / kurz["year"].nunique()
+    assert groessen["client"][1] / groessen["client"][0] < jahre
+    assert groessen["frames"][1] / groessen["frames"][0] > jahre
@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from benchmark_suite import TIEFEN_VERSATZ, faelle, synthetisches_schema
+from star_schema import sternschema_aus_dateien
+
+
+@pytest.fixture(scope="module")
+def basis():
+    return sternschema_aus_dateien()
+
+
+def test_tiefen_versatz_nach_name(basis):
+    schema = synthetisches_schema(8, basis)
+    mittel = schema.temperaturen.groupby('depth', observed=True)['temperature_avg'].mean()
+    erwartet = TIEFEN_VERSATZ['bottom'] - TIEFEN_VERSATZ['surface']
+    assert mittel['bottom'] - mittel['surface'] == pytest.approx(erwartet, abs=0.5)
+    assert schema.vorkommen().shape == (len(schema.fische), len(schema.seen))
+
+
+def test_df_merged_und_sternschema_gleiche_arbeit(basis, tmp_path):
+    fall = faelle(basis, 1, str(tmp_path))
+    stern = fall["seen_mit_sterbejahr"]()
+    merged = fall["seen_mit_sterbejahr (df_merged)"]()
+    assert len(stern) == len(basis.paare())
+    pd.testing.assert_frame_equal(
+        merged.sort_values(['Fisch', 'lake']).reset_index(drop=True),
+        stern.sort_values(['Fisch', 'lake']).reset_index(drop=True),
+        check_dtype=False,
+    )
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import cli
+import quellcode
+from cli import main
+from star_schema import sternschema_aus_dateien
+from visualisation import seen_mit_sterbejahr
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return sternschema_aus_dateien()
+
+
+@pytest.fixture(scope="module")
+def cache(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("cache") / "sterbejahre.npz")
+
+
+def _tabelle(capsys, *argumente) -> list:
+    assert main(["extinction-table", *argumente]) == 0
+    return list(csv.reader(io.StringIO(capsys.readouterr().out)))
+
+
+@pytest.mark.parametrize("refugium", [False, True])
+def test_alle_paare_wie_seen_mit_sterbejahr(schema, cache, capsys, refugium):
+    zeilen = _tabelle(capsys, "--cache", cache, *(["--refugium"] if refugium else []))
+    fische = schema.fische.index
+    erwartet = seen_mit_sterbejahr(None, fische, sterbejahre=schema.sterbejahre(refugium=refugium))
+
+    assert zeilen[0] == erwartet.columns.tolist()
+    assert len(zeilen) - 1 == len(erwartet) == 658
+    assert sorted(zeilen[1:]) == sorted(erwartet.astype(str).values.tolist())
+
+
+def test_aliase_und_json(schema, cache, capsys):
+    zeilen = _tabelle(capsys, "--cache", cache, "--lake", "L. Maggiore")
+    assert {z[1] for z in zeilen[1:]} == {"Maggiore"}
+    assert len(zeilen) - 1 == schema.vorkommen()[:, schema.seen.get_loc("Maggiore")].sum()
+
+    fisch = zeilen[1][0]
+    wissenschaftlich = schema.fische.loc[schema.fische.index.str.strip() == fisch, 'Name wissenschaftlich'].iloc[0]
+    assert main(["extinction-table", "--cache", cache, "--fish", wissenschaftlich.upper(),
+                 "--lake", "maggiore", "--scenario", "RCP85", "--format", "json"]) == 0
+    (eintrag,) = json.loads(capsys.readouterr().out)
+    assert eintrag["Fisch"] == fisch and eintrag["lake"] == "Maggiore"
+    assert str(eintrag["Aussterbejahr bei RCP85"]) == zeilen[1][-1]
+
+
+def test_warme_abfrage_ohne_pandas(cache):
+    # Der Cache existiert aus den Tests oben; nur numpy wird geladen
+    skript = (
+        "import sys; from cli import main; main(['extinction-table', '--cache', sys.argv[1], '--lake', 'Biel']);"
+        "print(sorted(m for m in ('numpy', 'pandas', 'plotly', 'selenium') if m in sys.modules), file=sys.stderr)"
+    )
+    ergebnis = subprocess.run([sys.executable, "-c", skript, cache], cwd=SRC, capture_output=True, text=True, check=True)
+    assert ergebnis.stderr.strip() == "['numpy']"
+    assert ergebnis.stdout.startswith("Fisch,lake,")
+
+
+def test_stempel_haengt_am_code(tmp_path, monkeypatch):
+    for datei in os.listdir(SRC):
+        if datei.endswith(".py"):
+            shutil.copy(os.path.join(SRC, datei), tmp_path / datei)
+    monkeypatch.setattr(quellcode, "QUELL_ORDNER", str(tmp_path))
+    vorher = cli.quellen_stempel()
+
+    # Nicht vom Cache benutzt: Stempel bleibt
+    with open(tmp_path / "z_image_scraper.py", "a", encoding="utf-8") as f:
+        f.write("\n# geändert\n")
+    assert cli.quellen_stempel() == vorher
+
+    # Von visualisation über star_schema importiert: Stempel ändert sich
+    with open(tmp_path / "merged_store.py", "a", encoding="utf-8") as f:
+        f.write("\n# geändert\n")
+    assert cli.quellen_stempel() != vorher
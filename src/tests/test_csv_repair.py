@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+
+from csv_repair import erkenne_format, repariere_csv
+from merged_store import DATA_DIR
+
+
+def test_semikolon_mit_gequotetem_feld(tmp_path):
+    eingabe, ausgabe = tmp_path / "ein.csv", tmp_path / "aus.csv"
+    eingabe.write_text('name;wert;text\n"a;b";1;X\nc;2;y\nname;wert;text\nd;3;z;extra\ne;4;w\n')
+
+    bericht = repariere_csv(str(eingabe), str(ausgabe))
+    assert bericht["trennzeichen"] == ";" and not bericht["verschachtelt"]
+    assert bericht["kopfzeilen_entfernt"] == 1
+    assert [v["zeile"] for v in bericht["verworfen"]] == [5]
+
+    df = pd.read_csv(ausgabe)
+    assert df.columns.tolist() == ["name", "wert", "text"]
+    assert df["name"].tolist() == ["a;b", "c", "e"]
+    assert df["wert"].tolist() == [1, 2, 4]
+
+
+def test_ganze_zeile_gequotet(tmp_path):
+    eingabe, ausgabe = tmp_path / "ein.csv", tmp_path / "aus.csv"
+    eingabe.write_text('"See,""Lat"""\n"Biel,""47.14"""\n"See,""Lat"""\n"Rot,""X"""\n"Brienz,""46.75"",""1"""\n')
+
+    bericht = repariere_csv(str(eingabe), str(ausgabe))
+    assert bericht["verschachtelt"] and bericht["kopf"] == ["See", "Lat"]
+    assert [v["zeile"] for v in bericht["verworfen"]] == [5]
+    df = pd.read_csv(ausgabe)
+    assert df["See"].tolist() == ["Biel", "Rot"]
+    assert df["Lat"].isna().tolist() == [False, True]
+
+
+def test_see_lat_lon_wie_bisher(tmp_path):
+    ausgabe = tmp_path / "see_lat_lon.csv"
+    repariere_csv(os.path.join(DATA_DIR, "working_files", "see_lat_lon.csv"), str(ausgabe))
+    with open(os.path.join(DATA_DIR, "see_lat_lon_final.csv"), "rb") as f:
+        assert ausgabe.read_bytes() == f.read()
+
+
+def test_tabulator(tmp_path):
+    pfad = tmp_path / "tab.csv"
+    pfad.write_text('a\tb\n"x\ty"\t1\n')
+    assert erkenne_format(str(pfad)) == {"trennzeichen": "\t", "verschachtelt": False, "kopf": ["a", "b"]}
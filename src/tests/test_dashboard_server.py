@@ -0,0 +1,38 @@
+import json
+
+import pytest
+from aiohttp.test_utils import make_mocked_request
+
+from dashboard_server import Antwort, DashboardDaten, etag_passt
+from visualisation import seen_mit_sterbejahr_single
+
+
+@pytest.mark.parametrize("kopf, passt", [
+    ('"abc"', True),
+    ('"xyz", "abc"', True),
+    ('W/"abc"', True),
+    ('*', True),
+    ('"ab"', False),
+    ('"abcd"', False),
+    ('"xabcx"', False),
+    ('', False),
+])
+def test_etag_passt(kopf, passt):
+    assert etag_passt(kopf, '"abc"') is passt
+
+
+def test_antwort_304_nur_bei_exaktem_etag():
+    antwort = Antwort({"a": 1})
+    teil = antwort.etag[:-3] + '"'
+    nicht = antwort.senden(make_mocked_request("GET", "/", headers={"If-None-Match": teil}))
+    assert nicht.status == 200
+    liste = f'"0", {antwort.etag}'
+    assert antwort.senden(make_mocked_request("GET", "/", headers={"If-None-Match": liste})).status == 304
+
+
+def test_tabellen_gleich_pro_fisch():
+    daten = DashboardDaten(vorberechnen=False)
+    for fisch in daten.fisch_namen:
+        tabelle = seen_mit_sterbejahr_single(None, fisch, daten.szenarien, sterbejahre=daten.schema.sterbejahre([fisch]))
+        erwartet = {"spalten": tabelle.columns.tolist(), "zeilen": tabelle.values.tolist()}
+        assert json.loads(daten.tabellen[fisch].roh) == json.loads(json.dumps(erwartet))
@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+
+from export_tiles import _dump, fisch_kacheln, kacheln_exportieren, see_kacheln
+from star_schema import sternschema_aus_dateien
+from visualisation import glaetten
+
+
+def test_runden_erst_beim_schreiben():
+    kachel = {"mittel": np.array([20.004, np.nan, 1.0 / 3])}
+    assert json.loads(_dump(kachel)) == {"mittel": [20.0, None, 0.33]}
+
+
+def test_ueberschreitung_aus_ungerundeten_werten():
+    schema = sternschema_aus_dateien()
+    seen = see_kacheln(schema.temperaturen)
+    index, jahre, mean, _ = glaetten(schema.temperaturen)
+    zeilen = {schluessel: i for i, schluessel in enumerate(index)}
+
+    # Eine Reihe, deren Maximum abgerundet wird: knapp darunter liegt die Schwelle über dem gerundeten Wert
+    i = next(i for i, reihe in enumerate(mean) if np.round(np.nanmax(reihe), 2) < np.nanmax(reihe) - 1e-6)
+    see, szenario = index[i]
+    fisch = schema.paare().query("lake == @see")["Fisch"].iloc[0]
+    schema.fische = schema.fische.copy()
+    schema.fische.loc[fisch, "Kritische Temperatur °C"] = np.nanmax(mean[i]) - 1e-9
+
+    kachel = fisch_kacheln(schema, seen)[fisch]
+    assert kachel["ueberschreitung"][see][szenario] == int(jahre[np.nanargmax(mean[i])])
+    for see, pro_szenario in kachel["ueberschreitung"].items():
+        for szenario, jahr in pro_szenario.items():
+            ueber = mean[zeilen[see, szenario]] > kachel["kritische_temperatur"]
+            assert jahr == (int(jahre[ueber.argmax()]) if ueber.any() else None)
+
+
+def test_loescht_nur_fruehere_version(tmp_path):
+    for name in ("img", "css", "aaaaaaaaaaaa", "bbbbbbbbbbbb"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "datei").write_text("x")
+    alt = {"version": "bbbbbbbbbbbb", "karte": "bbbbbbbbbbbb/karte.json", "seen": {}, "fische": {}}
+    (tmp_path / "index.json").write_text(json.dumps(alt))
+
+    version = kacheln_exportieren(str(tmp_path))
+    # Nicht im bisherigen index.json genannte Ordner bleiben, auch wenn sie wie eine Version aussehen
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_dir()) == sorted(["img", "css", "aaaaaaaaaaaa", version])
+    assert json.loads((tmp_path / "index.json").read_text())["version"] == version
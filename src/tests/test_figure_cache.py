@@ -0,0 +1,43 @@
+import pytest
+
+import figure_cache
+from figure_cache import FigurenCache
+from star_schema import sternschema_aus_dateien
+from visualisation import plot_scenario
+
+
+@pytest.fixture(scope="module")
+def daten():
+    schema = sternschema_aus_dateien()
+    paar = schema.paare().iloc[0]
+    return schema.fisch_daten(paar["Fisch"]), paar["lake"], paar["Fisch"]
+
+
+def test_kopie_schuetzt_den_cache(daten):
+    df, see, fisch = daten
+    cache = FigurenCache()
+    erste = cache.abrufen(plot_scenario, df, see, fisch, 10)
+    erste.update_layout(title_text="verändert")
+    zweite = cache.abrufen(plot_scenario, df, see, fisch, 10)
+
+    assert zweite.layout.title.text != "verändert"
+    assert cache.statistik()["treffer"] == 1
+
+
+def test_daten_hash_einmal_pro_dataframe(daten, monkeypatch):
+    df, see, fisch = daten
+    aufrufe = []
+    original = figure_cache.daten_fingerprint
+    monkeypatch.setattr(figure_cache, "daten_fingerprint", lambda d: aufrufe.append(1) or original(d))
+
+    cache = FigurenCache(kopie=False)
+    for window in (5, 10, 5, 10):
+        cache.abrufen(plot_scenario, df, see, fisch, window)
+    assert len(aufrufe) == 1
+    assert cache.statistik()["fehlschlaege"] == 2
+
+    # Ein neuer DataFrame mit anderen Werten ergibt einen anderen Schlüssel
+    anders = df.assign(temperature_avg=df["temperature_avg"] + 1)
+    cache.abrufen(plot_scenario, anders, see, fisch, 10)
+    assert len(aufrufe) == 2
+    assert cache.statistik()["fehlschlaege"] == 3
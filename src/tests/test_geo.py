@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from geo import SeenIndex, einzugsgebiet_aggregate
+from star_schema import UNBEKANNT, einzugsgebiete
+
+
+@pytest.mark.parametrize("wert, erwartet", [
+    ("Rhein, Rhone, Doubs, Ticino,", ["Rhein", "Rhone", "Doubs", "Ticino"]),
+    ("Rhei", ["Rhein"]),
+    ("Ticino DU,", ["Ticino"]),
+    ("Rhein, Rhone, Doubs, Ticiono", ["Rhein", "Rhone", "Doubs", "Ticino"]),
+    (float("nan"), [UNBEKANNT]),
+    ("nan", [UNBEKANNT]),
+])
+def test_einzugsgebiete(wert, erwartet):
+    assert einzugsgebiete(wert) == erwartet
+
+
+def test_aggregat_zaehlt_jedes_gebiet():
+    tabelle = pd.DataFrame({
+        "Fisch": ["A", "B", "C"],
+        "lake": ["Biel", "Biel", "Maggiore"],
+        "Aussterbejahr bei RCP85": [2050, 0, 2080],
+    })
+    fische = pd.DataFrame({"Einzugsgebiet": ["Rhein, Rhone,", "Rhei", None]}, index=["A", "B", "C"])
+    ergebnis = einzugsgebiet_aggregate(tabelle, fische).set_index("Einzugsgebiet")
+
+    assert sorted(ergebnis.index) == ["Rhein", "Rhone", UNBEKANNT]
+    assert ergebnis.loc["Rhein", "anzahl_paare"] == 2
+    assert ergebnis.loc["Rhein", "Anteil ausgestorben RCP85"] == 0.5
+    assert ergebnis.loc["Rhone", "Frühestes Aussterbejahr RCP85"] == 2050
+
+
+def test_nachbarn_mit_alias():
+    index = SeenIndex()
+    assert index.nachbarn("L. Maggiore", 60).equals(index.nachbarn("Maggiore", 60))
+    assert "Maggiore" not in index.nachbarn("Maggiore", 60)["lake"].tolist()
+    with pytest.raises(KeyError):
+        index.nachbarn("Atlantis", 10)
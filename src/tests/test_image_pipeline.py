@@ -0,0 +1,61 @@
+import os
+
+from PIL import Image
+
+import image_pipeline
+from image_pipeline import varianten_erzeugen
+
+
+def _hochformat_mit_exif(pfad):
+    """Querformat-Pixel, die laut EXIF (Orientation 6) um 90° gedreht angezeigt werden."""
+    bild = Image.new("RGB", (200, 100), "red")
+    exif = bild.getexif()
+    exif[0x0112] = 6
+    bild.save(pfad, exif=exif)
+
+
+def test_exif_ausrichtung_vor_dem_verkleinern(tmp_path):
+    quelle = tmp_path / "foto.jpg"
+    _hochformat_mit_exif(quelle)
+    ergebnis = varianten_erzeugen(str(quelle), str(tmp_path), breiten=(50,), formate=("webp",))
+
+    assert (ergebnis["breite"], ergebnis["hoehe"]) == (100, 200)
+    for liste in ergebnis["varianten"].values():
+        for breite, name in liste:
+            with Image.open(tmp_path / name) as variante:
+                assert variante.size == (50, 100)
+
+
+def test_ohne_avif_nur_webp(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_pipeline.features, "check", lambda fmt: fmt != "avif")
+    quelle = tmp_path / "foto.jpg"
+    Image.new("RGB", (100, 50), "blue").save(quelle)
+    ergebnis = varianten_erzeugen(str(quelle), str(tmp_path), breiten=(50,))
+
+    assert sorted(ergebnis["varianten"]) == ["jpg", "webp"]
+    assert not any(name.endswith(".avif") for name in os.listdir(tmp_path))
+
+
+def test_sizes_pro_bild_und_wiederholbar(tmp_path):
+    manifest = {
+        name: {"varianten": {"webp": [(480, f"{name}-480.webp"), (800, f"{name}-800.webp")],
+                             "jpg": [(480, f"{name}-480.jpg"), (800, f"{name}-800.jpg")]}}
+        for name in ("logo.jpg", "hg.jpg", "eigen.jpg", "karte.jpg")
+    }
+    index = tmp_path / "index.html"
+    index.write_text(
+        '<img src="img/logo.jpg" class="banner-logo">'
+        '<img src="img/hg.jpg" style="width:100vw">'
+        '<img src="img/eigen.jpg" sizes="(max-width: 500px) 100vw, 500px" alt="x">'
+        '<img src="img/karte.jpg">',
+        encoding="utf-8"
+    )
+    assert image_pipeline.index_umschreiben(manifest, str(index)) == 4
+    erster_lauf = index.read_text(encoding="utf-8")
+    image_pipeline.index_umschreiben(manifest, str(index))
+    assert index.read_text(encoding="utf-8") == erster_lauf
+
+    bilder = erster_lauf.split("</picture>")[:4]
+    erwartet = ["71px", "100vw", "(max-width: 500px) 100vw, 500px", "(max-width: 800px) 100vw, 800px"]
+    for bild, sizes in zip(bilder, erwartet):
+        assert bild.count(f' sizes="{sizes}"') == 2
@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from impact_cube import ALLE, ALLE_TIEFEN, ARTEN_IRGENDWO, ARTEN_UEBERALL, Wirkungswuerfel, wirkungswuerfel
+from star_schema import einzugsgebiete, sternschema_aus_dateien
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return sternschema_aus_dateien()
+
+
+@pytest.fixture(scope="module")
+def wuerfel(schema):
+    return wirkungswuerfel(schema)
+
+
+def _lang(schema):
+    """Brute Force: eine Zeile pro Fisch, See, Szenario, Tiefe und Einzugsgebiet."""
+    sterbejahre = schema.sterbejahre()
+    lang = sterbejahre.stack(['scenario', 'depth'], future_stack=True).rename('jahr').reset_index()
+    alle = sterbejahre.T.groupby(level='scenario').min().T.stack(future_stack=True).rename('jahr').reset_index()
+    alle['depth'] = ALLE_TIEFEN
+    lang = pd.concat([lang, alle], ignore_index=True)
+    info = schema.fische.reindex(lang['Fisch'])
+    lang['status'] = info['Gefährdungsstatus'].astype(str).str.strip().to_numpy()
+    lang['einzugsgebiet'] = [einzugsgebiete(w) for w in info['Einzugsgebiet']]
+    return lang
+
+
+def test_wie_brute_force(schema, wuerfel):
+    lang = _lang(schema)
+    gebiete = lang.explode('einzugsgebiet')
+    zufall = random.Random(1)
+    for _ in range(300):
+        szenario, tiefe = zufall.choice(wuerfel.szenarien), zufall.choice(wuerfel.tiefen)
+        jahr = zufall.randint(1975, 2105)
+        see, status = zufall.choice([*wuerfel.seen, ALLE]), zufall.choice([*wuerfel.status, ALLE])
+        gebiet = zufall.choice([*wuerfel.einzugsgebiete, ALLE])
+
+        tabelle = lang if gebiet == ALLE else gebiete[gebiete['einzugsgebiet'] == gebiet]
+        maske = (tabelle['scenario'] == szenario) & (tabelle['depth'] == tiefe)
+        if see != ALLE:
+            maske &= tabelle['lake'] == see
+        if status != ALLE:
+            maske &= tabelle['status'] == status
+
+        assert wuerfel.verloren(szenario, jahr, see, tiefe, status, gebiet) == int((tabelle['jahr'][maske] <= jahr).sum())
+        assert wuerfel.bestand(see, status, gebiet) == int(maske.sum())
+
+
+def test_arten_statt_vorkommen(schema, wuerfel):
+    lang = _lang(schema)
+    gebiete = lang.explode('einzugsgebiet')
+    zufall = random.Random(2)
+    for _ in range(200):
+        szenario, tiefe = zufall.choice(wuerfel.szenarien), zufall.choice(wuerfel.tiefen)
+        jahr = zufall.randint(1975, 2105)
+        status, gebiet = zufall.choice([*wuerfel.status, ALLE]), zufall.choice([*wuerfel.einzugsgebiete, ALLE])
+
+        tabelle = lang if gebiet == ALLE else gebiete[gebiete['einzugsgebiet'] == gebiet]
+        maske = (tabelle['scenario'] == szenario) & (tabelle['depth'] == tiefe)
+        if status != ALLE:
+            maske &= tabelle['status'] == status
+        verloren = (tabelle['jahr'][maske] <= jahr).groupby(tabelle['Fisch'][maske], observed=True)
+
+        assert wuerfel.verloren(szenario, jahr, ARTEN_UEBERALL, tiefe, status, gebiet) == int(verloren.all().sum())
+        assert wuerfel.verloren(szenario, jahr, ARTEN_IRGENDWO, tiefe, status, gebiet) == int(verloren.any().sum())
+        for art in (ARTEN_UEBERALL, ARTEN_IRGENDWO):
+            assert wuerfel.bestand(art, status, gebiet) == tabelle['Fisch'][maske].nunique()
+
+    assert wuerfel.bestand(ARTEN_UEBERALL) == len(schema.paare()['Fisch'].unique()) < wuerfel.bestand()
+
+
+def test_arten_zaehlen_in_jedem_einzugsgebiet(schema, wuerfel):
+    assert "Rhei" not in wuerfel.einzugsgebiete
+    assert not any("," in g for g in wuerfel.einzugsgebiete)
+
+    # Arten wie 'Rhein, Rhone, Doubs, Ticino' zählen im Rhein mit
+    im_rhein = [f for f, w in schema.fische['Einzugsgebiet'].items() if "Rhein" in einzugsgebiete(w)]
+    assert any(len(einzugsgebiete(schema.fische.loc[f, 'Einzugsgebiet'])) > 1 for f in im_rhein)
+    paare = schema.paare()
+    assert wuerfel.bestand(einzugsgebiet="Rhein") == int(paare['Fisch'].isin(im_rhein).sum())
+
+    # ALLE zählt jedes Vorkommen einmal, die Summe über die Gebiete mehrfach
+    assert wuerfel.bestand() == len(paare)
+    assert wuerfel.bestand(einzugsgebiet=wuerfel.einzugsgebiete) > len(paare)
+
+
+def test_speichern_und_laden(tmp_path, wuerfel):
+    pfad = tmp_path / "wuerfel.npz"
+    wuerfel.speichern(str(pfad))
+    for kopie in (Wirkungswuerfel.laden(str(pfad)), Wirkungswuerfel.aus_json(wuerfel.als_json())):
+        assert np.array_equal(kopie._verloren, wuerfel._verloren)
+        assert np.array_equal(kopie._bestand, wuerfel._bestand)
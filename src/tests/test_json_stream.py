@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+import pytest
+
+from json_stream import jahreswerte_cube, lese_arrays, saisonwerte_cube
+
+
+def _datei(tmp_path, text: str) -> str:
+    pfad = tmp_path / "see.json"
+    pfad.write_text(text)
+    return str(pfad)
+
+
+def test_liest_flache_arrays(tmp_path):
+    daten = {"yearly": {"bottom": {"RCP85": {"x": [1981, 1982], "y_ave": [4.5, None]}}}, "name": "a\\"}
+    arrays = lese_arrays(_datei(tmp_path, json.dumps(daten)))
+    assert arrays["yearly.bottom.RCP85.x"].tolist() == [1981, 1982]
+    assert np.isnan(arrays["yearly.bottom.RCP85.y_ave"][1])
+
+
+@pytest.mark.parametrize("text", [
+    '{"a": [1, 2, 3',
+    '{"a": "abc',
+    '{"a": {"b": [1]}',
+    '{"a": [[1, 2], [3',
+    '{"a": 1}}',
+])
+def test_abgeschnittene_datei(tmp_path, text):
+    with pytest.raises(ValueError):
+        lese_arrays(_datei(tmp_path, text))
+
+
+def test_saisonwerte_tagesachse_aus_laengster_reihe(tmp_path):
+    # Der erste See hat die kürzere Reihe, die Tagesachse richtet sich nach der längsten
+    for see, tage in (("a", 365), ("b", 366)):
+        daten = {"seasonal": {"surface": {"p1": {"RCP85": {"ave": list(range(tage))}}}}}
+        (tmp_path / f"{see}.json").write_text(json.dumps(daten))
+    seen, cube = saisonwerte_cube(str(tmp_path), ("surface",), ("RCP85",), ("p1",), ("ave",))
+    assert seen == ["a", "b"]
+    assert cube.shape == (2, 1, 1, 1, 1, 366)
+    assert cube[1, 0, 0, 0, 0, 365] == 365
+    assert cube[0, 0, 0, 0, 0, 364] == 364 and np.isnan(cube[0, 0, 0, 0, 0, 365])
+
+
+def _jahreswerte(tmp_path, see, x, y_ave):
+    daten = {"yearly": {"surface": {"RCP85": {"x": x, "y_ave": y_ave}}}}
+    (tmp_path / f"{see}.json").write_text(json.dumps(daten))
+
+
+def test_jahreswerte_nach_jahr_eingeordnet(tmp_path):
+    # Der erste See hat ein Jahr weniger
+    _jahreswerte(tmp_path, "a", [2001, 2002], [1.0, 2.0])
+    _jahreswerte(tmp_path, "b", [2000, 2001, 2002], [3.0, 4.0, 5.0])
+    seen, jahre, cube = jahreswerte_cube(str(tmp_path), ("surface",), ("RCP85",), ("y_ave",))
+    assert seen == ["a", "b"]
+    assert jahre.tolist() == [2000, 2001, 2002]
+    assert np.isnan(cube[0, 0, 0, 0, 0]) and cube[0, 0, 0, 0, 1:].tolist() == [1.0, 2.0]
+    assert cube[1, 0, 0, 0].tolist() == [3.0, 4.0, 5.0]
+
+
+def test_jahreswerte_laenge_wie_x(tmp_path):
+    _jahreswerte(tmp_path, "a", [2000, 2001], [1.0, 2.0, 3.0])
+    with pytest.raises(ValueError, match="a.json"):
+        jahreswerte_cube(str(tmp_path), ("surface",), ("RCP85",), ("y_ave",))
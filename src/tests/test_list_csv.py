@@ -0,0 +1,62 @@
+import csv
+
+import numpy as np
+import pytest
+
+from list_csv import lese_jahreswerte_csv, lese_listen_csv
+from star_schema import lade_jahreswerte_json
+
+
+def test_leere_zellen_verschieben_keine_spalten(tmp_path):
+    pfad = tmp_path / "see.csv"
+    pfad.write_text('a,b,c,d,e\n"[1, 2]",,"x, y",3.5,"[]"\n', encoding="utf-8")
+    spalten = lese_listen_csv(str(pfad))
+
+    assert list(spalten) == ["a", "b", "c", "d", "e"]
+    assert spalten["a"].tolist() == [1.0, 2.0]
+    assert np.isnan(spalten["b"])
+    assert spalten["c"] == "x, y"
+    assert spalten["d"] == 3.5
+    assert spalten["e"].size == 0
+
+
+def test_jahreswerte_wie_json():
+    aus_csv = lese_jahreswerte_csv(seen=["Biel", "Maggiore"])
+    breit = aus_csv.pivot_table(index=["lake", "depth", "scenario", "year"], columns="stat", values="value", observed=True)
+
+    aus_json = lade_jahreswerte_json()
+    aus_json = aus_json[aus_json["lake"].isin(["Biel", "Maggiore"])].set_index(["lake", "depth", "scenario", "year"])
+    aus_json = aus_json.rename(columns={"temperature_avg": "y_ave", "temperature_min": "y_min", "temperature_max": "y_max"})
+    erwartet = aus_json[["y_ave", "y_max", "y_min"]].reindex(breit.index)
+    np.testing.assert_allclose(breit[["y_ave", "y_max", "y_min"]].to_numpy(), erwartet.to_numpy(), rtol=1e-6)
+    assert len(breit) == len(aus_json)
+
+
+def test_feldgrenze_nur_waehrend_des_lesens(tmp_path):
+    pfad = tmp_path / "see.csv"
+    pfad.write_text(f'a\n"[{", ".join(["1.5"] * 40_000)}]"\n', encoding="utf-8")
+    vorher = csv.field_size_limit()
+    assert lese_listen_csv(str(pfad))["a"].size == 40_000
+    assert csv.field_size_limit() == vorher
+
+
+def _see(ordner, name, zeile):
+    kopf = "yearly.surface.RCP85.x,yearly.surface.RCP85.y_ave,yearly.bottom.RCP85.x,yearly.bottom.RCP85.y_ave"
+    (ordner / f"{name}.csv").write_text(f"{kopf}\n{zeile}\n", encoding="utf-8")
+
+
+def test_leere_jahreswerte_werden_uebersprungen(tmp_path):
+    _see(tmp_path, "a", '"[2000, 2001]","[1, 2]",,')
+    df = lese_jahreswerte_csv(str(tmp_path))
+    assert df["depth"].astype(str).unique().tolist() == ["surface"]
+    assert df["year"].tolist() == [2000, 2001]
+
+
+@pytest.mark.parametrize("zeile", [
+    '"[2000, 2001]","[1, 2]","[2000, 2001]","[1, 2, 3]"',
+    '"[2000, 2001]","[1, 2]",,"[1, 2]"',
+])
+def test_jahre_und_werte_muessen_passen(tmp_path, zeile):
+    _see(tmp_path, "a", zeile)
+    with pytest.raises(ValueError, match="a.csv"):
+        lese_jahreswerte_csv(str(tmp_path))
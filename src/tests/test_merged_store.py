@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from merged_store import (SORTIERUNG, _filter, _row_groups, gespeicherte_quelle, lade_df_merged, parquet_aus_csv,
+                          schreibe_df_merged, typisieren)
+from star_schema import sternschema_aus_dateien
+
+
+@pytest.fixture(scope="module")
+def datei(tmp_path_factory):
+    df = sternschema_aus_dateien().zu_df_merged()
+    pfad = str(tmp_path_factory.mktemp("parquet") / "df_merged.parquet")
+    schreibe_df_merged(df, pfad)
+    return typisieren(df), pfad
+
+
+def _erwartet(df, maske, spalten):
+    erwartet = df[maske].sort_values(SORTIERUNG, kind='stable').reset_index(drop=True)[spalten]
+    for spalte in erwartet.select_dtypes('category').columns:
+        erwartet[spalte] = erwartet[spalte].cat.remove_unused_categories()
+    return erwartet
+
+
+def test_eine_row_group_pro_fisch(datei):
+    df, pfad = datei
+    metadata = pq.ParquetFile(pfad).metadata
+    assert metadata.num_row_groups == df['Fisch'].nunique()
+    fisch = df['Fisch'].iloc[len(df) // 2]
+    # Nur die Row Group dieses Fischs wird gelesen
+    assert len(_row_groups(metadata, _filter(Fisch=fisch))) == 1
+    assert len(_row_groups(metadata, _filter(Fisch=[fisch, df['Fisch'].iloc[0]]))) == 2
+    assert _row_groups(metadata, _filter(Fisch="Kein Fisch")) == []
+
+
+def test_gefiltert_wie_pandas(datei):
+    df, pfad = datei
+    fisch = df['Fisch'].iloc[len(df) // 2]
+    seen = list(df.loc[df['Fisch'] == fisch, 'lake'].unique()[:2])
+
+    geladen = lade_df_merged(pfad, fisch=fisch, lake=seen, scenario="RCP45")
+    maske = (df['Fisch'] == fisch) & df['lake'].isin(seen) & (df['scenario'] == "RCP45")
+    pd.testing.assert_frame_equal(geladen, _erwartet(df, maske, geladen.columns))
+
+    # Filterspalten werden auch gelesen, wenn sie nicht in spalten stehen
+    geladen = lade_df_merged(pfad, fisch=fisch, spalten=['year', 'temperature_avg'])
+    pd.testing.assert_frame_equal(geladen, _erwartet(df, df['Fisch'] == fisch, ['year', 'temperature_avg']))
+
+
+def test_parquet_folgt_der_csv(datei, tmp_path):
+    df, _ = datei
+    csv_pfad = tmp_path / "df_merged.csv"
+    pfad = str(tmp_path / "df_merged.parquet")
+    fische = df['Fisch'].unique()[:2]
+    df[df['Fisch'] == fische[0]].to_csv(csv_pfad, index=False)
+
+    assert parquet_aus_csv(pfad, str(csv_pfad))
+    assert not parquet_aus_csv(pfad, str(csv_pfad))
+    assert gespeicherte_quelle(pfad)["groesse"] == os.path.getsize(csv_pfad)
+
+    # Neuer Inhalt (andere Grösse) wird übernommen
+    df[df['Fisch'].isin(fische)].to_csv(csv_pfad, index=False)
+    assert parquet_aus_csv(pfad, str(csv_pfad))
+    assert lade_df_merged(pfad)['Fisch'].nunique() == 2
+
+    # Gleiche Grösse, nur die Änderungszeit weicht ab
+    info = os.stat(csv_pfad)
+    os.utime(csv_pfad, ns=(info.st_atime_ns, info.st_mtime_ns + 1_000_000_000))
+    assert parquet_aus_csv(pfad, str(csv_pfad))
+
+    # Von der Pipeline geschrieben: nicht durch die CSV ersetzen
+    schreibe_df_merged(df[df['Fisch'] == fische[0]], pfad, quelle={"pipeline": "abc"})
+    assert not parquet_aus_csv(pfad, str(csv_pfad))
+    assert gespeicherte_quelle(pfad) == {"pipeline": "abc"}
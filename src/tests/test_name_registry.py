@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from merged_store import DATA_DIR
+from name_registry import SEE_ALIASE, Register
+from star_schema import sternschema_aus_dateien
+
+QUELLEN = ["Fischdaten_final.csv", "Fischdaten.csv", "Fischdaten_gemappt.csv", "kritische_temperaturen.csv"]
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return sternschema_aus_dateien()
+
+
+@pytest.fixture(scope="module")
+def register(schema):
+    return Register.aus_sternschema(schema)
+
+
+def test_aliase(schema, register):
+    for see, aliase in SEE_ALIASE.items():
+        for alias in [see, *aliase, *(a.upper() for a in aliase)]:
+            assert register.see(alias) == see
+    assert register.see("l. neuchatel") == "Neuchatel"
+    assert register.see("Lac de l’Hongrin") == "LacdelHongrin"
+    wissenschaftlich = schema.fische['Name wissenschaftlich'].str.strip()
+    eindeutig = ~wissenschaftlich.duplicated(keep=False)
+    assert eindeutig.sum() > 40
+    for fisch, name in wissenschaftlich[eindeutig].items():
+        assert register.fisch(name) == register.fisch(fisch.upper()) == fisch
+
+
+@pytest.mark.parametrize("datei", QUELLEN)
+def test_alle_quellen_gleiches_vorkommen(schema, datei):
+    register = Register.aus_fischdaten(os.path.join(DATA_DIR, datei), seen=schema.seen)
+    assert register.seen.namen.tolist() == schema.seen.tolist()
+    # Die Quelldateien haben Namen mit Leerzeichen am Ende, das Register entfernt sie
+    assert register.fische.namen.tolist() == schema.fische.index.str.strip().tolist()
+    np.testing.assert_array_equal(np.unpackbits(register.fisch_bits, axis=1, count=len(schema.seen)), schema.vorkommen())
+
+
+def test_bitsets_wie_brute_force(schema, register):
+    vorkommen = schema.vorkommen()
+    fische, seen = schema.fische.index, schema.seen
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        s = rng.choice(len(seen), size=rng.integers(1, 4), replace=False)
+        f = rng.choice(len(fische), size=rng.integers(1, 3), replace=False)
+        assert register.gemeinsame_fische(seen[s]) == fische[vorkommen[:, s].all(axis=1)].tolist()
+        assert register.fische_in_einem(seen[s]) == fische[vorkommen[:, s].any(axis=1)].tolist()
+        assert register.gemeinsame_seen(fische[f]) == seen[vorkommen[f].all(axis=0)].tolist()
+        assert register.fische_in(seen[s[0]]) == fische[vorkommen[:, s[0]]].tolist()
+        assert register.seen_fuer(fische[f[0]]) == seen[vorkommen[f[0]]].tolist()
+        assert register.kommt_vor(fische[f[0]], seen[s[0]]) == vorkommen[f[0], s[0]]
+    np.testing.assert_array_equal(register.anzahl_fische().to_numpy(), vorkommen.sum(axis=0))
+    fisch_ids, see_ids = register.paar_ids()
+    assert len(fisch_ids) == vorkommen.sum() == 658
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import pipeline
+from pipeline import JSON_ORDNER, _gecacht, pipeline_ausfuehren
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "CACHE_ORDNER", str(tmp_path / "cache"))
+    monkeypatch.setattr(pipeline, "AUSGABEN_PFAD", str(tmp_path / "cache" / "ausgaben.json"))
+    return tmp_path
+
+
+def test_aufraeumen_trifft_nur_die_eigene_partition(cache):
+    leer = pd.DataFrame({"a": [1]})
+    _gecacht("stufe", "Lucerne-Urnersee", "0" * 16, lambda: leer)
+    _gecacht("stufe", "Lucerne", "0" * 16, lambda: leer)
+    _gecacht("stufe", "Lucerne", "1" * 16, lambda: leer)
+    assert sorted(os.listdir(cache / "cache" / "stufe")) == [
+        f"Lucerne-{'1' * 16}.parquet", f"Lucerne-Urnersee-{'0' * 16}.parquet"
+    ]
+
+
+def test_geloeschter_see_baut_ausgaben_neu(cache):
+    ordner = cache / "json"
+    ordner.mkdir()
+    for see in ("Biel", "Brienz"):
+        shutil.copy(os.path.join(JSON_ORDNER, f"{see}.json"), ordner)
+    parquet = cache / "df_merged.parquet"
+    argumente = dict(json_ordner=str(ordner), csv_ausgabe=False, parquet_pfad=str(parquet))
+
+    df = pipeline_ausfuehren(**argumente)
+    assert set(pd.read_parquet(parquet)["lake"]) == {"Biel", "Brienz"}
+    assert df.attrs["neu_gebaut"] == ["Biel", "Brienz"]
+
+    os.remove(ordner / "Brienz.json")
+    df = pipeline_ausfuehren(**argumente)
+    assert df.attrs["neu_gebaut"] == []
+    assert set(pd.read_parquet(parquet)["lake"]) == {"Biel"}
+
+
+def test_kombinierte_csv_bleibt_gleich(cache):
+    eingecheckt = os.path.join(pipeline.DATA_DIR, "temperaturdaten_kombiniert.csv")
+    ziel = cache / "kombiniert.csv"
+    shutil.copy(eingecheckt, ziel)
+    pipeline_ausfuehren(
+        parquet_pfad=None, kombiniert_pfad=str(ziel), transformiert_ordner=str(cache / "transformiert")
+    )
+    with open(eingecheckt, "rb") as a, open(ziel, "rb") as b:
+        assert a.read() == b.read()
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from merged_store import CSV_PFAD, typisieren
+from star_schema import sternschema_aus_dateien, sternschema_aus_df_merged
+from visualisation import seen_mit_sterbejahr, sterbejahre_berechnen
+
+
+def _gleich(stern: pd.DataFrame, merged: pd.DataFrame):
+    """Gleiche Paare in gleicher Reihenfolge, gleiche Sterbejahre (Spaltenreihenfolge egal)."""
+    assert stern.index.tolist() == merged.index.tolist()
+    assert sorted(stern.columns) == sorted(merged.columns)
+    np.testing.assert_array_equal(stern[merged.columns].to_numpy(dtype=float), merged.to_numpy(dtype=float))
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return sternschema_aus_dateien()
+
+
+def test_sterbejahre_wie_df_merged_aus_csv():
+    df_merged = pd.read_csv(CSV_PFAD, na_values=['X'])
+    schema = sternschema_aus_df_merged(df_merged)
+    _gleich(schema.sterbejahre(), sterbejahre_berechnen(typisieren(df_merged)))
+
+
+def test_sterbejahre_wie_df_merged_alle_paare(schema):
+    stern = schema.sterbejahre()
+    assert len(stern) == 658
+    _gleich(stern, sterbejahre_berechnen(schema.zu_df_merged()))
+
+
+def test_fisch_daten_wie_df_merged(schema):
+    df_merged = schema.zu_df_merged()
+    fisch, see = schema.paare().iloc[-1]
+    erwartet = df_merged[(df_merged['Fisch'] == fisch) & (df_merged['lake'] == see)].reset_index(drop=True)
+    geladen = schema.fisch_daten(fisch, see)
+    pd.testing.assert_frame_equal(geladen[erwartet.columns], erwartet, check_dtype=False, check_categorical=False)
+
+
+def _refugium_brute_force(schema) -> pd.DataFrame:
+    """Pro Paar, Szenario und Jahr die kühlste Tiefe (groupby/min), dann erstes Jahr >= kritische Temperatur."""
+    kuehlste = (
+        schema.temperaturen.groupby(['lake', 'scenario', 'year'], observed=True)['temperature_max'].min()
+        .reset_index()
+    )
+    df = schema.paare().merge(kuehlste, on='lake')
+    df['krit'] = schema.kritische_temperaturen(df['Fisch'])
+    df['jahr'] = df['year'].where(~(df['temperature_max'] < df['krit']))
+    erwartet = df.groupby(['Fisch', 'lake', 'scenario'], sort=False, observed=True)['jahr'].min().unstack('scenario')
+    return erwartet.reindex(pd.MultiIndex.from_frame(schema.paare()))
+
+
+def test_refugium_wie_brute_force(schema):
+    erwartet = _refugium_brute_force(schema)
+    stern = schema.sterbejahre(refugium=True).xs('refugium', axis=1, level='depth')
+    merged = sterbejahre_berechnen(schema.zu_df_merged(), refugium=True).xs('refugium', axis=1, level='depth')
+    assert len(erwartet) == 658
+    assert erwartet.notna().any().any() and erwartet.isna().any().any()
+    for tabelle in (stern, merged):
+        _gleich(tabelle, erwartet)
+    # Mit Rückzug stirbt ein Fisch nie früher als ohne
+    ohne = schema.sterbejahre().T.groupby(level='scenario').min().T
+    assert (ohne.fillna(9999) <= erwartet[ohne.columns].fillna(9999)).all().all()
+
+
+def test_seen_mit_sterbejahr_refugium_aus_df_merged(schema):
+    fische = list(schema.fische.index)
+    aus_df = seen_mit_sterbejahr(schema.zu_df_merged(), fische, refugium=True)
+    aus_schema = seen_mit_sterbejahr(None, fische, sterbejahre=schema.sterbejahre(refugium=True))
+    pd.testing.assert_frame_equal(aus_df, aus_schema)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from json_stream import saisonwerte_cube
+from star_schema import sternschema_aus_dateien
+from thermal_stress import KENNZAHLEN, PERIODEN, STATISTIKEN, SZENARIEN, TIEFEN, stress_kennzahlen, stress_tabelle
+
+
+def _schleife(reihe, schwelle) -> dict:
+    """Kennzahlen einer Reihe Tag für Tag (NaN-Tage und NaN-Schwelle zählen nie)."""
+    gradtage, tage, serie, laengste, erster, letzter = 0.0, 0, 0, 0, 0, 0
+    for tag, wert in enumerate(reihe, start=1):
+        if not np.isnan(wert) and not np.isnan(schwelle) and wert > schwelle:
+            gradtage += wert - schwelle
+            tage += 1
+            serie += 1
+            laengste = max(laengste, serie)
+            erster = erster or tag
+            letzter = tag
+        else:
+            serie = 0
+    return {"gradtage": gradtage, "tage_ueber": tage, "laengste_serie": laengste,
+            "erster_tag": erster, "letzter_tag": letzter}
+
+
+def _vergleichen(kennzahlen, reihen, schwellen):
+    for i, (reihe, schwelle) in enumerate(zip(reihen, schwellen)):
+        erwartet = _schleife(reihe, schwelle)
+        for name in KENNZAHLEN:
+            assert kennzahlen[name][i] == pytest.approx(erwartet[name], abs=1e-3), (i, name)
+
+
+def test_kennzahlen_wie_schleife():
+    rng = np.random.default_rng(0)
+    reihen = (rng.normal(18, 3, (40, 60))).astype(np.float32)
+    reihen[rng.random(reihen.shape) < 0.1] = np.nan
+    reihen[0] = np.nan  # nur NaN
+    reihen[1, :] = 30.0  # immer über der Schwelle
+    schwellen = rng.normal(19, 2, 40).astype(np.float32)
+    schwellen[2] = np.nan
+    _vergleichen(stress_kennzahlen(reihen, schwellen), reihen, schwellen)
+    assert stress_kennzahlen(reihen, schwellen)["laengste_serie"][1] == 60
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return sternschema_aus_dateien()
+
+
+def test_tabelle_wie_schleife(schema):
+    tabelle = stress_tabelle(schema)
+    seen, cube = saisonwerte_cube(tiefen=TIEFEN, szenarien=SZENARIEN, perioden=PERIODEN, statistiken=STATISTIKEN)
+    krit = schema.kritische_temperaturen(tabelle["Fisch"])
+    assert np.isnan(krit).any()
+
+    stichprobe = tabelle.sample(300, random_state=0)
+    for i, zeile in stichprobe.iterrows():
+        reihe = cube[seen.index(zeile["lake"]), SZENARIEN.index(zeile["scenario"]), TIEFEN.index(zeile["depth"]),
+                     PERIODEN.index(zeile["period"]), STATISTIKEN.index("max")]
+        if np.isnan(krit[i]):
+            # Fehlende kritische Temperatur: keine Aussage
+            assert zeile[KENNZAHLEN].isna().all()
+            continue
+        erwartet = _schleife(reihe, np.float32(krit[i]))
+        for name in KENNZAHLEN:
+            assert zeile[name] == pytest.approx(erwartet[name], abs=1e-3), (i, name)
+
+    # Alle Paare mit fehlender kritischer Temperatur sind NaN
+    assert tabelle.loc[np.isnan(krit), KENNZAHLEN].isna().all().all()
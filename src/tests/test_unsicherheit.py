@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from star_schema import Sternschema, sternschema_aus_dateien
+from unsicherheit import Unsicherheit, trajektorien
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return sternschema_aus_dateien()
+
+
+@pytest.fixture(scope="module")
+def ohne_huelle(schema):
+    """Hülle der Breite 0: temperature_min = temperature_max = temperature_avg."""
+    temperaturen = schema.temperaturen.copy()
+    temperaturen['temperature_min'] = temperaturen['temperature_avg']
+    temperaturen['temperature_max'] = temperaturen['temperature_avg']
+    return Sternschema.aus_vorkommen(temperaturen, schema.fische, schema.seen, schema.vorkommen())
+
+
+@pytest.mark.parametrize("refugium", [False, True])
+def test_ohne_huelle_wie_deterministisch(ohne_huelle, refugium):
+    df = Unsicherheit(ohne_huelle, refugium=refugium).verteilungen(stichproben=20, block=10)
+    erwartet = (
+        ohne_huelle.sterbejahre(spalte='temperature_avg', refugium=refugium)
+        .T.groupby(level='scenario').min().T
+        .stack().rename('erwartet').reset_index()
+    )
+    df = df.merge(erwartet, on=['Fisch', 'lake', 'scenario'], how='left', validate='one_to_one')
+    assert len(df) == 658 * 3
+    for spalte in ('q05', 'q50', 'q95'):
+        np.testing.assert_array_equal(df[spalte].to_numpy(), df['erwartet'].to_numpy())
+    np.testing.assert_array_equal(df['P nie'].to_numpy(), df['erwartet'].isna().to_numpy(dtype=float))
+
+
+def test_wie_schleife_mit_gleichen_seeds(schema):
+    u = Unsicherheit(schema)
+    stichproben, block, seed = 12, 5, 3
+    anzahl = u.haeufigkeiten(stichproben, block=block, seed=seed)
+
+    erwartet = np.zeros_like(anzahl)
+    groessen = [min(block, stichproben - start) for start in range(0, stichproben, block)]
+    for groesse, s in zip(groessen, np.random.SeedSequence(seed).spawn(len(groessen))):
+        werte = trajektorien(u.avg, u.tmin, u.tmax, groesse, np.random.default_rng(s)).astype(np.float64)
+        flach = werte.reshape(groesse, -1, werte.shape[-1])
+        for k in range(groesse):
+            for p, krit in enumerate(u.krit):
+                for sz in range(len(u.szenarien)):
+                    # Erstes Jahr, in dem eine Tiefe nicht unter der kritischen Temperatur bleibt
+                    # (wie überlebt in df_merged: unbekannte kritische Temperatur = stirbt sofort)
+                    ueber = ~(flach[k, u.reihe[p, sz]] < krit).all(axis=0)
+                    erwartet[p, sz, np.argmax(ueber) if ueber.any() else len(u.jahre)] += 1
+    np.testing.assert_array_equal(anzahl, erwartet)
+
+
+def test_unabhaengig_von_max_workers(schema):
+    u = Unsicherheit(schema)
+    einzeln = u.haeufigkeiten(40, block=10, seed=1)
+    parallel = u.haeufigkeiten(40, block=10, seed=1, max_workers=2)
+    np.testing.assert_array_equal(einzeln, parallel)
+    assert einzeln.sum(axis=-1).min() == 40
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark_sterbejahr import seen_mit_sterbejahr_alt, synthetisches_df_merged
+from merged_store import CSV_PFAD
+from star_schema import sternschema_aus_dateien
+from visualisation import rolling_mean_std, seen_mit_sterbejahr, seen_mit_sterbejahr_single
+
+
+@pytest.fixture(scope="module")
+def df_merged():
+    return sternschema_aus_dateien().zu_df_merged()
+
+
+def test_wie_alte_schleife_alle_paare(df_merged):
+    fische = list(pd.unique(df_merged['Fisch']))
+    alt = seen_mit_sterbejahr_alt(df_merged, fische)
+    assert len(alt) == 658
+    pd.testing.assert_frame_equal(seen_mit_sterbejahr(df_merged, fische), alt)
+
+
+def test_wie_alte_schleife_csv():
+    df = synthetisches_df_merged(pd.read_csv(CSV_PFAD).rename(columns={'See': 'lake'}), 3)
+    fische = list(df['Fisch'].unique())
+    pd.testing.assert_frame_equal(seen_mit_sterbejahr(df, fische), seen_mit_sterbejahr_alt(df, fische))
+
+
+def test_single_wie_gesamttabelle(df_merged):
+    fisch = df_merged['Fisch'].iloc[0]
+    gesamt = seen_mit_sterbejahr(df_merged, [fisch])
+    single = seen_mit_sterbejahr_single(df_merged, fisch)
+    assert single.iloc[:, 0].tolist() == gesamt['lake'].tolist()
+    assert single.iloc[:, 1:].to_numpy().tolist() == gesamt.iloc[:, 2:].to_numpy().tolist()
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 30])
+def test_rolling_mean_std_wie_pandas(window):
+    rng = np.random.default_rng(0)
+    werte = rng.normal(15, 3, size=(4, 20)) + 1000  # grosser Offset prüft die Zentrierung
+    werte[0, [0, 3, 4, 5, 19]] = np.nan  # Lücken am Rand und länger als window 2
+    werte[1, :] = np.nan
+    werte[2, 10] = np.nan
+
+    mean, std = rolling_mean_std(werte, window)
+    for zeile, m, s in zip(werte, mean, std):
+        rolling = pd.Series(zeile).rolling(window, min_periods=1)
+        np.testing.assert_allclose(m, rolling.mean().to_numpy(), rtol=1e-12, atol=1e-9)
+        np.testing.assert_allclose(s, rolling.std().to_numpy(), rtol=1e-9, atol=1e-9)
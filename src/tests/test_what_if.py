@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from star_schema import PraefixMaximum, sternschema_aus_dateien
+from visualisation import erste_ueberschreitung
+from what_if import WasWaere
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return sternschema_aus_dateien()
+
+
+def test_gleichheit_zaehlt_als_erreicht():
+    werte = np.array([[1.0, 2.0, 3.0, 2.0]])
+    struktur = PraefixMaximum.aus_werten(werte)
+    assert struktur.erster_index(np.array([0, 0, 0]), np.array([2.0, 2.5, 3.5])).tolist() == [1, 2, 4]
+    # erste_ueberschreitung verlangt einen Wert echt über der Schwelle
+    assert erste_ueberschreitung(werte, 2.0).tolist() == [2]
+
+
+def test_praefix_maximum_wie_brute_force():
+    zufall = np.random.default_rng(3)
+    werte = np.round(zufall.normal(15, 3, size=(40, 60)), 1)
+    werte[5, 10:20] = np.nan
+    reihe = zufall.integers(0, len(werte), size=2000)
+    schwelle = np.round(zufall.normal(17, 4, size=2000), 1)
+
+    erreicht = np.nan_to_num(werte[reihe], nan=-np.inf) >= schwelle[:, None]
+    erwartet = np.where(erreicht.any(axis=1), erreicht.argmax(axis=1), werte.shape[1])
+    assert np.array_equal(PraefixMaximum.aus_werten(werte).erster_index(reihe, schwelle), erwartet)
+
+
+def test_jahreswerte_wie_df_merged(schema):
+    """window=1 und temperature_max: dieselben Aussterbejahre wie überlebt in df_merged."""
+    was = WasWaere(schema, spalte="temperature_max").sterbejahre(delta=0.0, window=1)
+
+    df = schema.zu_df_merged()
+    tot = df[~df['überlebt']].groupby(['Fisch', 'lake', 'scenario', 'depth'], observed=True)['year'].min()
+    erwartet = tot.unstack(['scenario', 'depth']).reindex(index=was.index, columns=was.columns)
+    pd.testing.assert_frame_equal(was, erwartet, check_dtype=False, check_names=False)
+    pd.testing.assert_frame_equal(
+        was, schema.sterbejahre().reindex(index=was.index, columns=was.columns), check_dtype=False
+    )
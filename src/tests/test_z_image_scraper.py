@@ -0,0 +1,77 @@
+import functools
+import os
+import shutil
+import threading
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+import pytest
+
+import z_image_scraper
+from z_image_scraper import scrape_and_save_images
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "scraper_suche.html")
+
+
+class _StillerHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Lokaler Server mit der Testseite und den Bildern, die sie einbindet (fehlt.jpg gibt 404)."""
+    wurzel = tmp_path / "www"
+    wurzel.mkdir()
+    shutil.copy(FIXTURE, wurzel / "suche.html")
+    (wurzel / "bild1.jpg").write_bytes(b"\xff\xd8bild1")
+    (wurzel / "bild2.jpg").write_bytes(b"\xff\xd8bild2")
+    (wurzel / "kopie.jpg").write_bytes(b"\xff\xd8bild1")
+    (wurzel / "klein.png").write_bytes(b"\x89PNG")
+
+    httpd = HTTPServer(("127.0.0.1", 0), functools.partial(_StillerHandler, directory=str(wurzel)))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def _chrome_vorhanden():
+    return any(shutil.which(name) for name in ("google-chrome", "chromium", "chromium-browser", "chrome"))
+
+
+@pytest.mark.skipif(not _chrome_vorhanden(), reason="Chrome ist nicht installiert")
+def test_scrape_mit_lokaler_seite(server, tmp_path):
+    manifest = scrape_and_save_images(
+        ["Salmo trutta"], base_folder=str(tmp_path), num_images=5, drivers=1,
+        search_url=f"{server}/suche.html?q={{}}"
+    )
+    eintraege = manifest["Salmo trutta"]
+    assert [e["status"] for e in eintraege] == ["saved", "saved", "duplicate", "error"]
+    assert eintraege[2]["file"] == eintraege[0]["file"]
+    assert sorted(os.listdir(tmp_path / "img_scraper")) == ["Salmo_trutta_1.jpg", "Salmo_trutta_2.jpg", "manifest.json"]
+
+
+def test_fehler_werden_wiederholt_und_nie_none(server, tmp_path, monkeypatch):
+    # Ohne Browser: die Suche liefert direkt die Bild-URLs der Testseite
+    urls = [f"{server}/bild1.jpg", f"{server}/fehlt.jpg", f"{server}/bild2.jpg"]
+    monkeypatch.setattr(z_image_scraper, "find_image_urls", lambda pool, term, n, url: urls[:n])
+    original = z_image_scraper.save_image
+
+    def save_image(session, image_url, *args):
+        if image_url.endswith("bild2.jpg"):
+            raise OSError("Datenträger voll")
+        return original(session, image_url, *args)
+
+    monkeypatch.setattr(z_image_scraper, "save_image", save_image)
+    manifest = scrape_and_save_images(["Esox lucius"], base_folder=str(tmp_path), num_images=3, pool=object())
+    eintraege = manifest["Esox lucius"]
+    assert None not in eintraege
+    assert [e["status"] for e in eintraege] == ["saved", "error", "error"]
+    assert "Datenträger voll" in eintraege[2]["error"]
+
+    # Der zweite Lauf sucht den Begriff erneut, weil er Fehler hat
+    urls[1:] = [f"{server}/bild2.jpg"]
+    monkeypatch.setattr(z_image_scraper, "save_image", original)
+    manifest = scrape_and_save_images(["Esox lucius"], base_folder=str(tmp_path), num_images=3, pool=object())
+    # bild1.jpg liegt schon im Ordner und wird nicht noch einmal geschrieben
+    assert [e["status"] for e in manifest["Esox lucius"]] == ["duplicate", "saved"]
+    assert z_image_scraper.is_complete(manifest["Esox lucius"], str(tmp_path / "img_scraper"))
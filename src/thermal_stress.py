@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from json_stream import JSON_ORDNER, saisonwerte_cube
+from star_schema import Sternschema, kuehlste_tiefe, sternschema_aus_dateien
+
+
+SZENARIEN = ("RCP26", "RCP45", "RCP85")
+TIEFEN = ("surface", "bottom")
+PERIODEN = ("p1", "p2", "p3", "p4")
+STATISTIKEN = ("ave", "min", "max")
+
+KENNZAHLEN = ["gradtage", "tage_ueber", "laengste_serie", "erster_tag", "letzter_tag"]
+KENNZAHL_NAMEN = {
+    "gradtage": "Gradtage über krit. Temp.",
+    "tage_ueber": "Tage über krit. Temp.",
+    "laengste_serie": "Längste Hitzeperiode (Tage)",
+}
+
+
+def stress_kennzahlen(temperaturen: np.ndarray, schwellen: np.ndarray) -> dict:
+    """
+    Hitzestress-Kennzahlen über die letzte Achse (Tage) für beliebig viele Reihen auf einmal.
+
+    Parameters:
+        temperaturen (np.ndarray): Array (..., Tag); NaN zählt nie als Überschreitung.
+        schwellen (np.ndarray): Schwellenwert pro Reihe, broadcastbar auf temperaturen.shape[:-1].
+
+    Returns:
+        dict: Arrays der Form temperaturen.shape[:-1] mit
+              gradtage (Summe der °C über der Schwelle), tage_ueber, laengste_serie (zusammenhängende Tage),
+              erster_tag / letzter_tag (1-basiert, 0 = nie).
+    """
+    temperaturen = np.asarray(temperaturen, dtype=np.float32)
+    schwellen = np.asarray(schwellen, dtype=np.float32)[..., None]
+
+    with np.errstate(invalid='ignore'):
+        ueber = temperaturen > schwellen
+    differenz = np.where(ueber, temperaturen - schwellen, 0.0)
+
+    # Länge der aktuellen Serie: kumulierte Anzahl minus Stand beim letzten Tag unter der Schwelle
+    kumuliert = np.cumsum(ueber, axis=-1, dtype=np.int32)
+    zurueckgesetzt = np.maximum.accumulate(np.where(ueber, 0, kumuliert), axis=-1)
+    serie = kumuliert - zurueckgesetzt
+
+    irgendwann = ueber.any(axis=-1)
+    tage = ueber.shape[-1]
+    return {
+        "gradtage": differenz.sum(axis=-1),
+        "tage_ueber": kumuliert[..., -1],
+        "laengste_serie": serie.max(axis=-1),
+        "erster_tag": np.where(irgendwann, ueber.argmax(axis=-1) + 1, 0),
+        "letzter_tag": np.where(irgendwann, tage - ueber[..., ::-1].argmax(axis=-1), 0),
+    }
+
+
+def stress_tabelle(
+    schema: Sternschema = None,
+    ordner: str = JSON_ORDNER,
+    statistik: str = "max",
+    refugium: bool = False
+    ) -> pd.DataFrame:
+    """
+    Berechnet die Kennzahlen aus stress_kennzahlen für alle Fisch-See-Paare, Szenarien, Tiefen
+    und Perioden aus den täglichen Klimatologien (seasonal) in einer einzigen Array-Operation
+    über den Würfel (Paar, Szenario, Tiefe, Periode, Tag).
+
+    Parameters:
+        schema (Sternschema): Fische, Vorkommen und kritische Temperaturen (Standard: aus den Dateien).
+        ordner (str): Ordner mit den JSON-Dateien pro See.
+        statistik (str): Tageswert 'ave', 'min' oder 'max'.
+        refugium (bool): Pro Tag nur die kühlste Tiefe auswerten (depth = 'refugium').
+
+    Returns:
+        pd.DataFrame: Fisch, lake, scenario, depth, period und eine Spalte pro Kennzahl.
+    """
+    if schema is None:
+        schema = sternschema_aus_dateien()
+
+    seen, cube = saisonwerte_cube(ordner, TIEFEN, SZENARIEN, PERIODEN, STATISTIKEN)
+    # (See, Szenario, Tiefe, Periode, Tag)
+    cube = cube[:, :, :, :, STATISTIKEN.index(statistik)]
+    tiefen = list(TIEFEN)
+    if refugium:
+        cube = kuehlste_tiefe(cube)[:, :, None]
+        tiefen = ["refugium"]
+
+    paare = schema.paare()
+    paare = paare[paare['lake'].isin(seen)].reset_index(drop=True)
+    see_idx = pd.Index(seen).get_indexer(paare['lake'])
+    krit = schema.kritische_temperaturen(paare['Fisch'])
+
+    kennzahlen = stress_kennzahlen(cube[see_idx], krit[:, None, None, None])
+    form = kennzahlen["gradtage"].shape
+
+    index = pd.MultiIndex.from_product(
+        [range(len(paare)), SZENARIEN, tiefen, PERIODEN], names=['paar', 'scenario', 'depth', 'period']
+    ).to_frame(index=False)
+    df = pd.concat([paare.iloc[index.pop('paar')].reset_index(drop=True), index], axis=1)
+    for name in KENNZAHLEN:
+        df[name] = kennzahlen[name].reshape(-1)
+    # Fehlende kritische Temperatur: keine Aussage möglich
+    df.loc[np.repeat(np.isnan(krit), np.prod(form[1:])), KENNZAHLEN] = np.nan
+    return df
+
+
+def stress_pro_szenario(tabelle: pd.DataFrame, kennzahl: str = "tage_ueber", periode: str = "p4") -> pd.DataFrame:
+    """
+    Reduziert stress_tabelle für eine Periode auf einen Wert pro Fisch, See und Szenario
+    (ungünstigste Tiefe), z.B. für visualisation.seen_mit_sterbejahr(stress=...).
+
+    Returns:
+        pd.DataFrame: Index (Fisch, lake), eine Spalte pro Szenario.
+    """
+    auswahl = tabelle[tabelle['period'] == periode]
+    wide = auswahl.pivot_table(index=['Fisch', 'lake'], columns='scenario', values=kennzahl, aggfunc='max', sort=False)
+    wide = wide.reindex(columns=list(SZENARIEN))
+    wide.columns = [f"{KENNZAHL_NAMEN.get(kennzahl, kennzahl)} ({periode}) bei {szenario}" for szenario in wide.columns]
+    return wide
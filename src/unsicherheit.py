@@ -0,0 +1,191 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from scipy.special import ndtr
+
+from star_schema import PraefixMaximum, Sternschema, kuehlste_tiefe, sternschema_aus_dateien
+
+
+QUANTILE = (0.05, 0.5, 0.95)
+STICHJAHRE = (2050, 2100)
+
+
+def trajektorien(
+    avg: np.ndarray,
+    tmin: np.ndarray,
+    tmax: np.ndarray,
+    anzahl: int,
+    rng: np.random.Generator,
+    rho: float = 0.8
+    ) -> np.ndarray:
+    """
+    Zieht anzahl Temperaturverläufe innerhalb der Hülle [tmin, tmax] um avg.
+
+    Pro See und Szenario läuft ein AR(1)-Prozess über die Jahre (Korrelation rho von Jahr zu Jahr),
+    der über die Normalverteilung auf eine Lage u in (0, 1) abgebildet wird. u = 0.5 ist der
+    Mittelwert, u -> 0 bzw. 1 der untere bzw. obere Rand; jede Hälfte der Hülle wird linear gefüllt.
+    Alle Tiefen eines Sees teilen sich u (dieselbe Lage im Modellspektrum).
+
+    Parameters:
+        avg, tmin, tmax (np.ndarray): Würfel (lake, scenario, depth, year).
+
+    Returns:
+        np.ndarray: (anzahl, lake, scenario, depth, year), float32.
+    """
+    seen, szenarien, _, jahre = avg.shape
+    rauschen = rng.standard_normal((anzahl, seen, szenarien, 1, jahre), dtype=np.float32)
+    # Erster Wert mit Varianz 1, danach stationär
+    rauschen[..., 0] /= np.sqrt(1 - rho ** 2)
+    z = lfilter([np.sqrt(1 - rho ** 2)], [1, -rho], rauschen, axis=-1)
+    # s = 2u - 1 in (-1, 1): Anteil der unteren bzw. oberen Hälfte der Hülle
+    s = (2 * ndtr(z) - 1).astype(np.float32)
+
+    unten = (avg - tmin).astype(np.float32)
+    oben = (tmax - avg).astype(np.float32)
+    return avg.astype(np.float32) + s * np.where(s < 0, unten, oben)
+
+
+def _histogramm_block(
+    avg: np.ndarray,
+    tmin: np.ndarray,
+    tmax: np.ndarray,
+    reihe: np.ndarray,
+    krit: np.ndarray,
+    anzahl: int,
+    seed,
+    rho: float,
+    refugium: bool
+    ) -> np.ndarray:
+    """
+    Ein Block Stichproben (läuft auch im Worker-Prozess).
+
+    reihe hat die Form (Paar, Szenario, Tiefe) und zeigt auf die Reihen des (ggf. reduzierten) Würfels.
+    Returns:
+        np.ndarray: Häufigkeiten (Paar * Szenario, Jahre + 1), letzte Spalte = stirbt nie.
+    """
+    rng = np.random.default_rng(seed)
+    werte = trajektorien(avg, tmin, tmax, anzahl, rng, rho)
+    if refugium:
+        werte = kuehlste_tiefe(werte.reshape(-1, *werte.shape[2:])).reshape(anzahl, werte.shape[1], werte.shape[2], 1, -1)
+    anzahl_jahre = werte.shape[-1]
+    werte = werte.reshape(-1, anzahl_jahre)
+    reihen_pro_stichprobe = len(werte) // anzahl
+
+    # Erstes Jahr >= kritische Temperatur für alle Stichproben und Kombinationen in einer Suche
+    versatz = (np.arange(anzahl) * reihen_pro_stichprobe)[:, None, None, None]
+    pos = PraefixMaximum.aus_werten(werte).erster_index(reihe[None] + versatz, krit[None, :, None, None])
+    # Frühestes Jahr über alle Tiefen
+    pos = pos.min(axis=-1).reshape(anzahl, -1)
+
+    bins = anzahl_jahre + 1
+    flach = (np.arange(pos.shape[1]) * bins)[None, :] + pos
+    return np.bincount(flach.ravel(), minlength=pos.shape[1] * bins).reshape(pos.shape[1], bins)
+
+
+class Unsicherheit:
+    """
+    Monte-Carlo-Schätzung der Aussterbejahre aus den Hüllen temperature_min/temperature_max
+    (y_min/y_max) um temperature_avg.
+
+    Für jede Stichprobe wird pro See und Szenario ein Temperaturverlauf innerhalb der Hülle gezogen
+    (siehe trajektorien). Ein Fisch stirbt im ersten Jahr, in dem der Verlauf in einer seiner Tiefen
+    die kritische Temperatur erreicht (mit refugium=True: in der kühlsten Tiefe). Die bisherige
+    Regel temperature_max >= kritische Temperatur entspricht dem oberen Rand der Hülle.
+
+    Die Stichproben werden blockweise als Array (Stichprobe, Reihe, Jahr) ausgewertet und nur als
+    Häufigkeiten pro Paar, Szenario und Jahr gesammelt. Blöcke sind unabhängig und können auf
+    mehrere Prozesse verteilt werden; das Ergebnis hängt nur von seed ab, nicht von max_workers.
+    """
+
+    def __init__(self, schema: Sternschema = None, refugium: bool = False):
+        self.schema = schema if schema is not None else sternschema_aus_dateien()
+        self.refugium = refugium
+
+        seen, self.szenarien, self.tiefen, jahre, self.avg = self.schema.wuerfel('temperature_avg')
+        self.tmin = self.schema.wuerfel('temperature_min')[-1]
+        self.tmax = self.schema.wuerfel('temperature_max')[-1]
+        self.jahre = np.asarray(jahre)
+
+        self.paare = self.schema.paare()
+        self.paare = self.paare[self.paare['lake'].isin(seen)].reset_index(drop=True)
+        see_idx = seen.get_indexer(self.paare['lake'])
+        n_sz, n_t = len(self.szenarien), 1 if refugium else len(self.tiefen)
+        # Reihe im flachen Würfel (lake, scenario, depth) für jedes Paar, Szenario und jede Tiefe
+        self.reihe = (
+            see_idx[:, None, None] * n_sz * n_t
+            + np.arange(n_sz)[None, :, None] * n_t
+            + np.arange(n_t)[None, None, :]
+        )
+        self.krit = self.schema.kritische_temperaturen(self.paare['Fisch'])
+
+    def haeufigkeiten(
+        self,
+        stichproben: int = 10_000,
+        block: int = 250,
+        seed: int = 0,
+        rho: float = 0.8,
+        max_workers: int = 1
+        ) -> np.ndarray:
+        """
+        Häufigkeit jedes Aussterbejahres über alle Stichproben.
+
+        Returns:
+            np.ndarray: (Paar, Szenario, Jahre + 1), letzte Stelle = stirbt nie.
+        """
+        groessen = [min(block, stichproben - start) for start in range(0, stichproben, block)]
+        seeds = np.random.SeedSequence(seed).spawn(len(groessen))
+        argumente = [
+            (self.avg, self.tmin, self.tmax, self.reihe, self.krit, groesse, s, rho, self.refugium)
+            for groesse, s in zip(groessen, seeds)
+        ]
+
+        summe = np.zeros((len(self.paare) * len(self.szenarien), len(self.jahre) + 1), dtype=np.int64)
+        if max_workers == 1:
+            for arg in argumente:
+                summe += _histogramm_block(*arg)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                for teil in pool.map(_histogramm_block, *zip(*argumente)):
+                    summe += teil
+        return summe.reshape(len(self.paare), len(self.szenarien), -1)
+
+    def verteilungen(
+        self,
+        stichproben: int = 10_000,
+        quantile=QUANTILE,
+        stichjahre=STICHJAHRE,
+        **optionen
+        ) -> pd.DataFrame:
+        """
+        Verteilung des Aussterbejahres für alle Fisch-See-Paare und Szenarien.
+
+        Parameters:
+            stichproben (int): Anzahl gezogener Verläufe.
+            quantile (tuple): Gewünschte Quantile des Aussterbejahres.
+            stichjahre (tuple): Jahre, für die P(ausgestorben bis Jahr) ausgegeben wird.
+            **optionen: block, seed, rho, max_workers für haeufigkeiten.
+
+        Returns:
+            pd.DataFrame: Fisch, lake, scenario, Spalten 'q05', 'q50', 'q95' (NaN = stirbt
+                          mit dieser Wahrscheinlichkeit nicht bis zum letzten Jahr),
+                          'P bis 2050', 'P bis 2100' und 'P nie'.
+        """
+        anzahl = self.haeufigkeiten(stichproben, **optionen)
+        kumuliert = np.cumsum(anzahl, axis=-1) / stichproben
+
+        df = self.paare.loc[np.repeat(np.arange(len(self.paare)), len(self.szenarien))].reset_index(drop=True)
+        df['scenario'] = np.tile(np.asarray(self.szenarien), len(self.paare))
+        kumuliert = kumuliert.reshape(len(df), -1)
+
+        for q in quantile:
+            pos = (kumuliert < q).sum(axis=1)
+            df[f"q{round(q * 100):02d}"] = np.where(
+                pos < len(self.jahre), self.jahre[np.minimum(pos, len(self.jahre) - 1)], np.nan
+            )
+        for jahr in stichjahre:
+            bis = np.searchsorted(self.jahre, jahr, side='right')
+            df[f"P bis {jahr}"] = kumuliert[:, bis - 1] if bis > 0 else 0.0
+        df['P nie'] = 1.0 - kumuliert[:, len(self.jahre) - 1]
+        return df
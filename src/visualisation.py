@@ -5,6 +5,8 @@ import plotly.graph_objects as go
 import re
 from typing import Dict
 
+from star_schema import REFUGIUM
+
 
 
 
@@ -14,7 +16,63 @@ def get_death_year(group):
 
 
 
-def seen_mit_sterbejahr(df_merged: pd.DataFrame, fisch_namen, szenarien=None) -> pd.DataFrame:
+def sterbejahre_berechnen(df_merged: pd.DataFrame, refugium: bool = False) -> pd.DataFrame:
+    """
+    Berechnet in einem einzigen vektorisierten Durchlauf das erste Jahr, in dem ein Fisch
+    nicht mehr überlebt, für jede Kombination aus Fisch, See, Szenario und Tiefe.
+
+    Parameters:
+        df_merged (pd.DataFrame): Gesamtdaten mit den Spalten Fisch, lake, scenario, depth, year, überlebt.
+        refugium (bool): Ein Jahr gilt als überlebt, solange mindestens eine Tiefe überlebt
+                         (Rückzug in kühlere Schichten, wie Sternschema.sterbejahre(refugium=True));
+                         die Spalte depth heisst dann 'refugium'.
+
+    Returns:
+        pd.DataFrame: Breite Tabelle mit Index (Fisch, lake) und Spalten (scenario, depth).
+                      NaN bedeutet, dass der Fisch in dieser Serie nie ausstirbt.
+    """
+    if refugium:
+        schluessel = [df_merged[spalte] for spalte in ['Fisch', 'lake', 'scenario', 'year']]
+        df_merged = (
+            df_merged['überlebt'].astype(bool)
+            .groupby(schluessel, sort=False, observed=True).any()
+            .reset_index()
+            .assign(depth=REFUGIUM)
+        )
+
+    # Jahre, in denen der Fisch überlebt, ausblenden -> groupby.min liefert das erste Sterbejahr
+    sterbejahr = df_merged['year'].where(~df_merged['überlebt'].astype(bool))
+    schluessel = [df_merged[spalte] for spalte in ['Fisch', 'lake', 'scenario', 'depth']]
+    wide = (
+        sterbejahr.groupby(schluessel, sort=False, observed=True).min()
+        .unstack(['scenario', 'depth'])
+    )
+
+    # Alle Fisch-See-Paare in Reihenfolge des Auftretens, auch wenn ein Fisch überall überlebt
+    paare = pd.MultiIndex.from_frame(df_merged[['Fisch', 'lake']].drop_duplicates())
+    return wide.reindex(paare)
+
+
+def sterbejahre_pro_szenario(sterbejahre: pd.DataFrame, szenarien) -> pd.DataFrame:
+    """
+    Reduziert die breite Tabelle aus sterbejahre_berechnen über alle Tiefen auf ein Sterbejahr
+    pro Szenario (frühestes Jahr über alle Tiefen, 0 = stirbt nie).
+    Für den Rückzug in kühlere Schichten Sternschema.sterbejahre(refugium=True) übergeben,
+    dort gibt es pro Szenario nur die Tiefe 'refugium'.
+    """
+    pro_szenario = sterbejahre.T.groupby(level='scenario', sort=False).min().T
+    return pro_szenario.reindex(columns=szenarien).fillna(0).astype(int)
+
+
+
+def seen_mit_sterbejahr(
+    df_merged: pd.DataFrame,
+    fisch_namen,
+    szenarien=None,
+    sterbejahre=None,
+    stress=None,
+    refugium: bool = False
+    ) -> pd.DataFrame:
     """
     Gibt für jede Fischart in fisch_namen alle Seen aus, in denen sie vorkommt, und für jedes Szenario das Jahr, 
     in dem der Fisch stirbt.
@@ -23,6 +81,12 @@ def seen_mit_sterbejahr(df_merged: pd.DataFrame, fisch_namen, szenarien=None) ->
         df_merged (pd.DataFrame): Gesamtdaten.
         fisch_namen (list): Liste von Fisch-Namen.
         szenarien (list): Liste der Szenarien (z.B. ['RCP26', 'RCP45', 'RCP85'])
+        sterbejahre (pd.DataFrame): Optional bereits berechnete Tabelle aus sterbejahre_berechnen
+                                    oder Sternschema.sterbejahre; df_merged wird dann nicht gebraucht.
+        refugium (bool): Rückzug in kühlere Schichten erlauben (siehe sterbejahre_berechnen);
+                         nur ohne sterbejahre, eine übergebene Tabelle wird unverändert verwendet.
+        stress (pd.DataFrame): Optional zusätzliche Spalten mit Index (Fisch, lake),
+                               z.B. aus thermal_stress.stress_pro_szenario.
 
     Returns:
         pd.DataFrame: DataFrame mit Fischname, See und den Sterbejahren pro Szenario.
@@ -31,75 +95,57 @@ def seen_mit_sterbejahr(df_merged: pd.DataFrame, fisch_namen, szenarien=None) ->
         szenarien = ['RCP26', 'RCP45', 'RCP85']
     if isinstance(fisch_namen, str):  # Falls nur ein Name als String übergeben wird
         fisch_namen = [fisch_namen]
-    
-    results = []
-    for fisch_name in fisch_namen:
-        # Filter für den angegebenen Fisch (nur EIN Name!)
-        df_fisch = df_merged[df_merged['Fisch'] == fisch_name]
-
-        # Gruppieren nach lake und scenario, frühestes Sterbejahr mit get_death_year ermitteln
-        df_sterbejahr = (
-            df_fisch.groupby(['lake', 'scenario']).apply(get_death_year).unstack(fill_value=0)
-        )
-
-        # Alle Seen, in denen der Fisch vorkommt
-        alle_seen = df_fisch['lake'].unique()
+    fisch_namen = list(pd.unique(pd.Series(fisch_namen)))
 
-        # DataFrame erstellen mit allen Seen
-        result = pd.DataFrame({'Fisch': fisch_name, 'lake': alle_seen})
+    if sterbejahre is None:
+        sterbejahre = sterbejahre_berechnen(df_merged[df_merged['Fisch'].isin(fisch_namen)], refugium)
 
-        # Szenarien-Spalten mit gewünschtem Namen hinzufügen
-        for szenario in szenarien:
-            colname = f"Aussterbejahr bei {szenario}"
-            if szenario in df_sterbejahr.columns:
-                result[colname] = result['lake'].map(df_sterbejahr[szenario])
-            else:
-                result[colname] = 0  # oder np.nan
+    # Nur die gewünschten Fische, in der Reihenfolge von fisch_namen
+    fische = sterbejahre.index.get_level_values('Fisch')
+    sterbejahre = sterbejahre[fische.isin(fisch_namen)]
+    reihenfolge = pd.Categorical(sterbejahre.index.get_level_values('Fisch'), categories=fisch_namen)
+    sterbejahre = sterbejahre.iloc[np.argsort(reihenfolge.codes, kind='stable')]
 
-        results.append(result)
+    # Szenarien-Spalten mit gewünschtem Namen
+    result = sterbejahre_pro_szenario(sterbejahre, szenarien)
+    result.columns = [f"Aussterbejahr bei {szenario}" for szenario in szenarien]
+    if stress is not None:
+        result = result.join(stress)
 
-    # Alle Ergebnisse zusammenfügen
-    return pd.concat(results, ignore_index=True)
+    return result.reset_index()
 
 
 
-def seen_mit_sterbejahr_single(df_merged: pd.DataFrame, fisch_name, szenarien=None) -> pd.DataFrame:
+def seen_mit_sterbejahr_single(
+    df_merged: pd.DataFrame,
+    fisch_name,
+    szenarien=None,
+    sterbejahre=None,
+    refugium: bool = False
+    ) -> pd.DataFrame:
     """
     Gibt für einen Fisch alle Seen aus, in denen er vorkommt, und für jedes Szenario das Jahr,
     in dem der Fisch stirbt. Die Spaltennamen verwenden das Label statt des Szenario-Codes.
     Die Seen werden so sortiert, dass die mit den meisten 0en (d.h. nie Aussterben) unten stehen.
+    Optional kann eine bereits berechnete Tabelle aus sterbejahre_berechnen übergeben werden;
+    ohne Tabelle wird sie mit refugium (Rückzug in kühlere Schichten) aus df_merged berechnet.
     """
     labels = {"RCP26": "Optimistisches Szenario", "RCP45": "Mittleres Szenario", "RCP85": "Pessimistisches Szenario"}
 
     if szenarien is None:
         szenarien = ['RCP26', 'RCP45', 'RCP85']
 
-    # Filter für den angegebenen Fisch
-    df_fisch = df_merged[df_merged['Fisch'] == fisch_name]
-
-    # Gruppieren nach lake und scenario, frühestes Sterbejahr mit get_death_year ermitteln
-    df_sterbejahr = (
-        df_fisch.groupby(['lake', 'scenario'])
-        .apply(get_death_year, include_groups=False)
-        .unstack(fill_value=0)
-    )
+    if sterbejahre is None:
+        sterbejahre = sterbejahre_berechnen(df_merged[df_merged['Fisch'] == fisch_name], refugium)
 
     # Alle Seen, in denen der Fisch vorkommt
-    alle_seen = df_fisch['lake'].unique()
-
-    # DataFrame erstellen mit allen Seen
-    result = pd.DataFrame({'lake': alle_seen})
-
-    # Szenarien-Spalten mit Label als Namen hinzufügen
-    label_colnames = []
-    for szenario in szenarien:
-        label = labels.get(szenario, szenario)
-        colname = label
-        label_colnames.append(colname)
-        if szenario in df_sterbejahr.columns:
-            result[colname] = result['lake'].map(df_sterbejahr[szenario])
-        else:
-            result[colname] = 0  # oder np.nan
+    sterbejahre = sterbejahre[sterbejahre.index.get_level_values('Fisch') == fisch_name]
+
+    # Szenarien-Spalten mit Label als Namen
+    result = sterbejahre_pro_szenario(sterbejahre, szenarien)
+    label_colnames = [labels.get(szenario, szenario) for szenario in szenarien]
+    result.columns = label_colnames
+    result = result.reset_index(level='Fisch', drop=True).reset_index()
 
     # Sortieren: Je mehr 0en pro See (über alle Label-Spalten), desto weiter unten
     result['anzahl_0'] = (result[label_colnames] == 0).sum(axis=1)
@@ -137,6 +183,69 @@ def to_rgba(color: str, alpha: float = 0.3) -> str:
     
 
 
+def rolling_mean_std(werte: np.ndarray, window: int) -> tuple:
+    """
+    Rolling mean and standard deviation (like pandas rolling(window, min_periods=1).mean()/.std())
+    for many series at once, computed from cumulative sums in a single pass.
+
+    Args:
+        werte (np.ndarray): Array of shape (series, years); NaN values are ignored.
+        window (int): Window size in years.
+
+    Returns:
+        tuple: (mean, std), both with the same shape as werte.
+    """
+    werte = np.asarray(werte, dtype=np.float64)
+    gueltig = ~np.isnan(werte)
+
+    # Center each series for numerical stability of the sum of squares
+    anzahl_gueltig = gueltig.sum(axis=-1, keepdims=True)
+    zentrum = np.where(gueltig, werte, 0.0).sum(axis=-1, keepdims=True) / np.maximum(anzahl_gueltig, 1)
+    x = np.where(gueltig, werte - zentrum, 0.0)
+
+    def fenster_summe(a: np.ndarray) -> np.ndarray:
+        kumuliert = np.cumsum(a, axis=-1)
+        kumuliert[..., window:] = kumuliert[..., window:] - kumuliert[..., :-window]
+        return kumuliert
+
+    n = fenster_summe(gueltig.astype(np.float64))
+    s1 = fenster_summe(x)
+    s2 = fenster_summe(x * x)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s1 / n
+        var = np.maximum(s2 - s1 * mean, 0.0) / (n - 1)
+    mean = np.where(n >= 1, mean + zentrum, np.nan)
+    std = np.where(n >= 2, np.sqrt(var), np.nan)
+    return mean, std
+
+
+def erste_ueberschreitung(werte: np.ndarray, schwelle) -> np.ndarray:
+    """
+    Index of the first value above schwelle for each series (row), -1 if never exceeded.
+    """
+    ueber = np.asarray(werte) > np.asarray(schwelle)
+    return np.where(ueber.any(axis=-1), ueber.argmax(axis=-1), -1)
+
+
+def glaetten(
+    df: pd.DataFrame,
+    window: int = 10,
+    spalte: str = "temperature_avg",
+    schluessel=("lake", "scenario")
+    ) -> tuple:
+    """
+    Smooths all series defined by schluessel (e.g. lake, scenario, depth) in one pass.
+    Rows with the same key and year are averaged first.
+
+    Returns:
+        tuple: (index, years, mean, std) where index holds the keys of each row of mean/std.
+    """
+    tabelle = df.groupby(list(schluessel) + ["year"], observed=True)[spalte].mean().unstack("year")
+    mean, std = rolling_mean_std(tabelle.to_numpy(dtype=np.float64), window)
+    return tabelle.index, tabelle.columns.to_numpy(), mean, std
+
+
 # interactive graph for Dashboard
 def plot_scenario(
     df_forelle: pd.DataFrame,
@@ -149,60 +258,99 @@ def plot_scenario(
     Plots the scenario temperature development for a given lake and fish as an interactive Plotly figure.
     All text except the subtitle is black.
     The legend is always visible.
+    All rows of the lake are averaged per year, i.e. surface and bottom are mixed. The plot does not
+    show the depth refuge (sterbejahre_berechnen(refugium=True)); to plot a single depth, filter
+    df_forelle by 'depth' first.
+    """
+    df_plot = df_forelle[df_forelle["lake"] == see]
+    krit_werte = df_plot["Kritische Temperatur °C"].dropna()
+    krit_temp = krit_werte.iloc[0] if len(krit_werte) else np.nan
+
+    # Rolling mean/std for all scenarios at once
+    szenarien, years_all, mean_all, std_all = glaetten(df_plot, window, schluessel=("scenario",))
+    return plot_scenario_reihen(see, fisch, krit_temp, szenarien, years_all, mean_all, std_all)
+
+
+def plot_scenario_reihen(
+    see: str,
+    fisch: str,
+    krit_temp: float,
+    szenarien,
+    years_all: np.ndarray,
+    mean_all: np.ndarray,
+    std_all: np.ndarray
+    ) -> go.Figure:
+    """
+    Builds the plot_scenario figure from already smoothed series (one row per scenario,
+    NaN = no value for that year), e.g. taken from a precomputed glaetten result for all lakes.
+    """
+    return go.Figure(plot_scenario_spec(see, fisch, krit_temp, szenarien, years_all, mean_all, std_all))
+
+
+def plot_scenario_spec(
+    see: str,
+    fisch: str,
+    krit_temp: float,
+    szenarien,
+    years_all: np.ndarray,
+    mean_all: np.ndarray,
+    std_all: np.ndarray
+    ) -> dict:
+    """
+    Figure of plot_scenario_reihen as a plain dict {"data": [...], "layout": {...}} without
+    Plotly validation. The template is only referenced by name ("plotly_white"), so a server
+    can serialize the dict directly (see dashboard_server) instead of building a go.Figure.
     """
-    
     # Farben und Labels für Szenarien
     farben = {"RCP26": "#2ca02c", "RCP45": "#ff9900", "RCP85": "#e41a1c"}
     labels = {"RCP26": "Optimistisches Szenario", "RCP45": "Mittleres Szenario", "RCP85": "Pessimistisches Szenario"}
 
-    df_plot = df_forelle[df_forelle["lake"] == see]
-    df_plot_grouped = df_plot.groupby(["year", "scenario"]).agg({
-        "temperature_avg": "mean",
-        "Kritische Temperatur °C": "first"
-    }).reset_index()
+    exceed_all = erste_ueberschreitung(mean_all, krit_temp)
 
-    fig = go.Figure()
-    krit_temp = df_plot_grouped["Kritische Temperatur °C"].iloc[0]
+    data = []
 
-    for i, scenario in enumerate(df_plot_grouped["scenario"].unique()):
-        gruppe = df_plot_grouped[df_plot_grouped["scenario"] == scenario].sort_values("year")
-        years = gruppe["year"].to_numpy()
+    for i, scenario in enumerate(szenarien):
+        vorhanden = ~np.isnan(mean_all[i])
+        years = years_all[vorhanden]
         farbe = farben.get(scenario, "gray")
 
-        rolling_avg = gruppe["temperature_avg"].rolling(window=window, min_periods=1).mean().to_numpy()
-        rolling_std = gruppe["temperature_avg"].rolling(window=window, min_periods=1).std().to_numpy()
+        rolling_avg = mean_all[i][vorhanden]
+        rolling_std = std_all[i][vorhanden]
         upper = rolling_avg + rolling_std
         lower = rolling_avg - rolling_std
 
         # Gray area for noise (1 std) - always
-        fig.add_traces([
-            go.Scatter(
-                x=years,
-                y=upper,
-                mode='lines',
-                line=dict(width=0),
-                showlegend=False,
-                hoverinfo='skip'
-            ),
-            go.Scatter(
-                x=years,
-                y=lower,
-                mode='lines',
-                fill='tonexty',
-                fillcolor='rgba(128,128,128,0.15)',
-                line=dict(width=0),
-                name='Noise (1 Std)' if i == 0 else None,
-                legendgroup='noise',
-                hoverinfo='skip',
-                showlegend=True if i == 0 else False
-            )
-        ])
+        data.append(dict(
+            type='scatter',
+            x=years,
+            y=upper,
+            mode='lines',
+            line=dict(width=0),
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+        noise = dict(
+            type='scatter',
+            x=years,
+            y=lower,
+            mode='lines',
+            fill='tonexty',
+            fillcolor='rgba(128,128,128,0.15)',
+            line=dict(width=0),
+            legendgroup='noise',
+            hoverinfo='skip',
+            showlegend=True if i == 0 else False
+        )
+        if i == 0:
+            noise['name'] = 'Noise (1 Std)'
+        data.append(noise)
 
         # Area for noise (1 std) - only above critical value, in line color with alpha 0.3
         mask = upper > krit_temp
         upper_noise = np.where(mask, upper, np.nan)
         lower_noise = np.where(mask, np.maximum(lower, krit_temp), np.nan)
-        fig.add_trace(go.Scatter(
+        data.append(dict(
+            type='scatter',
             x=years,
             y=upper_noise,
             mode='lines',
@@ -210,20 +358,21 @@ def plot_scenario(
             showlegend=False,
             hoverinfo='skip'
         ))
-        fig.add_trace(go.Scatter(
+        data.append(dict(
+            type='scatter',
             x=years,
             y=lower_noise,
             mode='lines',
             fill='tonexty',
             fillcolor=to_rgba(farbe, 0.3),  # line color with alpha 0.3
             line=dict(width=0),
-            name=None,
             showlegend=False,
             hoverinfo='skip'
         ))
 
         # Main rolling average line
-        fig.add_trace(go.Scatter(
+        data.append(dict(
+            type='scatter',
             x=years,
             y=rolling_avg,
             mode='lines',
@@ -234,12 +383,12 @@ def plot_scenario(
         ))
 
         # Exceedance year
-        exceed = np.where(rolling_avg > krit_temp)[0]
-        if len(exceed) > 0:
-            exceed_index = exceed[0]
-            year_dead = years[exceed_index]
-            temp_dead = rolling_avg[exceed_index]
-            fig.add_trace(go.Scatter(
+        if exceed_all[i] >= 0:
+            exceed_index = exceed_all[i]
+            year_dead = years_all[exceed_index]
+            temp_dead = mean_all[i][exceed_index]
+            data.append(dict(
+                type='scatter',
                 x=[year_dead],
                 y=[temp_dead],
                 mode='markers+text',
@@ -256,7 +405,8 @@ def plot_scenario(
             ))
 
     # Critical temperature line
-    fig.add_trace(go.Scatter(
+    data.append(dict(
+        type='scatter',
         x=years,
         y=[krit_temp]*len(years),
         mode='lines',
@@ -266,7 +416,7 @@ def plot_scenario(
         showlegend=True  # <--- Legende immer sichtbar!
     ))
 
-    fig.update_layout(
+    layout = dict(
         font=dict(color='black'),  # Alle Schrift schwarz
         title=dict(
             text=f"{fisch} in {see}",
@@ -278,8 +428,8 @@ def plot_scenario(
                 font=dict(size=14, color="gray")
             )
         ),
-        xaxis_title="Jahr",
-        yaxis_title="Ø Temperatur [°C]",
+        xaxis=dict(title=dict(text="Jahr"), showgrid=False),  # Remove gridlines
+        yaxis=dict(title=dict(text="Ø Temperatur [°C]"), showgrid=False),
         legend=dict(
             orientation="h",
             yanchor="bottom",
@@ -294,11 +444,7 @@ def plot_scenario(
         paper_bgcolor='rgba(0,0,0,0)',  # Gesamter Hintergrund transparent
     )
 
-    # Remove gridlines
-    fig.update_xaxes(showgrid=False)
-    fig.update_yaxes(showgrid=False)
-
-    return fig
+    return {"data": data, "layout": layout}
 
 
 
@@ -312,36 +458,32 @@ def plot_forelle_scenario_animated_lines(
     fisch: str,
     farben: dict,
     labels: dict,
-    window: int = 10
+    window: int = 10,
+    modus: str = "client"
 ) -> 'go.Figure':
     """
     Animated line plot for scenarios, animating lines from bottom to top.
     All text except the subtitle is black. Subtitle is gray.
-    Animation starts automatically when exported to HTML with auto_play=True.
-    """
-    import numpy as np
-    import plotly.graph_objects as go
 
-    # Prepare data
+    modus="client" (default): no frames; the traces hold the complete smoothed series once
+    and layout.meta lists the traces to animate. Only write_animated_html animates them in the
+    browser; fig.write_html(auto_play=True), fig.show() or the JSON show the complete lines
+    without animation. Use write_animated_html to export this mode.
+    modus="frames" (legacy): one plotly frame per year, played by fig.write_html(auto_play=True).
+    Every frame has to carry all points up to its year, so the output grows quadratically with
+    the number of years.
+    """
+    # Prepare data: smooth every scenario once
     df_plot = df_forelle[df_forelle["lake"] == see]
-    df_plot_grouped = df_plot.groupby(["year", "scenario"]).agg({
-        "temperature_avg": "mean",
-        "Kritische Temperatur °C": "first"
-    }).reset_index()
-    years_all = sorted(df_plot_grouped["year"].unique())
+    szenarien, years_all, rolling_all, _ = glaetten(df_plot, window, schluessel=("scenario",))
+    krit_werte = df_plot["Kritische Temperatur °C"].dropna()
+    krit_temp = krit_werte.iloc[0] if len(krit_werte) else np.nan
 
     # Calculate global x and y ranges for all traces
-    x_min = df_plot_grouped["year"].min()
-    x_max = df_plot_grouped["year"].max()
-
-    y_values = []
-    for scenario in df_plot_grouped["scenario"].unique():
-        gruppe = df_plot_grouped[df_plot_grouped["scenario"] == scenario].sort_values("year")
-        rolling_avg = gruppe["temperature_avg"].rolling(window=window, min_periods=1).mean()
-        y_values.extend(rolling_avg)
-    y_values.extend(df_plot_grouped["Kritische Temperatur °C"].unique())
-    y_min = float(np.nanmin(y_values))
-    y_max = float(np.nanmax(y_values))
+    x_min = years_all.min()
+    x_max = years_all.max()
+    y_min = float(np.nanmin([np.nanmin(rolling_all), krit_temp]))
+    y_max = float(np.nanmax([np.nanmax(rolling_all), krit_temp]))
 
     fig = go.Figure()
 
@@ -371,23 +513,26 @@ def plot_forelle_scenario_animated_lines(
         template="plotly_white",
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
-        updatemenus=[{
-            "type": "buttons",
-            "showactive": False,
-            "buttons": [{
-                "label": "Play",
-                "method": "animate",
-                "args": [
-                    None,
-                    {
-                        "frame": {"duration": 60, "redraw": True},
-                        "fromcurrent": True,
-                        "autoplay": True  # This is ignored except in HTML export with auto_play
-                    }
-                ]
-            }]
-        }]
     )
+    if modus == "frames":
+        fig.update_layout(
+            updatemenus=[{
+                "type": "buttons",
+                "showactive": False,
+                "buttons": [{
+                    "label": "Play",
+                    "method": "animate",
+                    "args": [
+                        None,
+                        {
+                            "frame": {"duration": 60, "redraw": True},
+                            "fromcurrent": True,
+                            "autoplay": True  # This is ignored except in HTML export with auto_play
+                        }
+                    ]
+                }]
+            }]
+        )
     
     # Set x and y axis ranges and black color for axis lines/ticks
     fig.update_xaxes(
@@ -401,45 +546,77 @@ def plot_forelle_scenario_animated_lines(
         showgrid=False
     )
 
-    # Build frames
-    frames = []
-    for frame_year in years_all:
-        frame_data = []
-        for i, scenario in enumerate(df_plot_grouped["scenario"].unique()):
-            gruppe = df_plot_grouped[df_plot_grouped["scenario"] == scenario].sort_values("year")
-            years = gruppe["year"].to_numpy()
-            mask_frame = years <= frame_year
-            years_visible = years[mask_frame]
-            if len(years_visible) == 0:
-                continue
-            farbe = farben.get(scenario, "gray")
-            rolling_avg = gruppe["temperature_avg"].rolling(window=window, min_periods=1).mean().to_numpy()[mask_frame]
-            # Animated main line
-            frame_data.append(go.Scatter(
-                x=years_visible,
-                y=rolling_avg,
-                mode='lines',
-                name=labels.get(scenario, scenario),
-                line=dict(color=farbe, width=2.5),
-                legendgroup=scenario,
-                showlegend=True
-
-            ))
-        # Critical temperature line (fixed)
-        krit_temp = gruppe["Kritische Temperatur °C"].iloc[0]
-        frame_data.append(go.Scatter(
-            x=years_all,
-            y=[krit_temp]*len(years_all),
+    # Animated main lines (trace 0..n-1); frames start with the first year only
+    vorhanden = ~np.isnan(rolling_all)
+    bis = years_all[-1] if modus == "client" else years_all[0]
+    for i, scenario in enumerate(szenarien):
+        erste = vorhanden[i] & (years_all <= bis)
+        fig.add_trace(go.Scatter(
+            x=years_all[erste],
+            y=rolling_all[i][erste],
             mode='lines',
-            line=dict(color='red', dash='dot', width=1.5),
-            name=f"Krit. Temp. ({krit_temp:.1f} °C)",
-            legendgroup='krit',
+            name=labels.get(scenario, scenario),
+            line=dict(color=farben.get(scenario, "gray"), width=2.5),
+            legendgroup=scenario,
             showlegend=True
-
         ))
-        frames.append(go.Frame(data=frame_data, name=str(frame_year)))
 
-    fig.add_traces(frames[0].data)
+    # Critical temperature line (fixed, never part of a frame)
+    fig.add_trace(go.Scatter(
+        x=years_all,
+        y=[krit_temp]*len(years_all),
+        mode='lines',
+        line=dict(color='red', dash='dot', width=1.5),
+        name=f"Krit. Temp. ({krit_temp:.1f} °C)",
+        legendgroup='krit',
+        showlegend=True
+    ))
+
+    animierte_traces = list(range(len(szenarien)))
+    if modus == "client":
+        # Every series is shipped once in the traces; the browser reveals them year by year
+        fig.update_layout(meta={"animation": {"traces": animierte_traces, "dauer": 60}})
+        return fig
+
+    # Build frames: only x/y of the scenario lines, styling stays on the base traces
+    frames = []
+    for frame_year in years_all:
+        sichtbar = vorhanden & (years_all <= frame_year)
+        frames.append(go.Frame(
+            data=[go.Scatter(x=years_all[sichtbar[i]], y=rolling_all[i][sichtbar[i]]) for i in animierte_traces],
+            traces=animierte_traces,
+            name=str(frame_year)
+        ))
     fig.frames = frames
 
     return fig
+
+
+# JavaScript for modus="client": keeps the complete series of the traces listed in
+# layout.meta, cuts them to the first point and reveals them step by step
+_ANIMATIONS_SKRIPT = """
+var gd = document.getElementById('{plot_id}');
+var anim = gd.layout.meta.animation;
+var x = anim.traces.map(function (t) { return Array.from(gd.data[t].x); });
+var y = anim.traces.map(function (t) { return Array.from(gd.data[t].y); });
+var n = Math.max.apply(null, x.map(function (werte) { return werte.length; }));
+var k = 0;
+function zeigen() {
+    k += 1;
+    Plotly.restyle(gd, {
+        x: x.map(function (werte) { return werte.slice(0, k); }),
+        y: y.map(function (werte) { return werte.slice(0, k); })
+    }, anim.traces);
+    if (k >= n) { clearInterval(timer); }
+}
+zeigen();
+var timer = setInterval(zeigen, anim.dauer);
+"""
+
+
+def write_animated_html(fig: 'go.Figure', pfad: str, include_plotlyjs="cdn") -> None:
+    """
+    Writes a figure from plot_forelle_scenario_animated_lines(..., modus="client") to HTML.
+    The figure is embedded unchanged (the same as its JSON) and the lines are revealed in the browser.
+    """
+    fig.write_html(pfad, include_plotlyjs=include_plotlyjs, post_script=_ANIMATIONS_SKRIPT)
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from star_schema import REFUGIUM, PraefixMaximum, Sternschema, kuehlste_tiefe, sternschema_aus_dateien
+from visualisation import rolling_mean_std
+
+
+class WasWaere:
+    """
+    Was-wäre-wenn-Abfragen zum Aussterbejahr: Ein Fisch stirbt im ersten Jahr, in dem das
+    gleitende Mittel (Fenster window) von spalte die kritische Temperatur + delta erreicht.
+
+    "Erreicht" heisst >= (wie überlebt = spalte < Kritische Temperatur in df_merged und
+    Sternschema.sterbejahre): Mit window=1 und spalte='temperature_max' ergibt das genau die
+    Aussterbejahre aus df_merged. plot_scenario (visualisation.erste_ueberschreitung) zählt
+    dagegen erst Werte echt über der Schwelle und mittelt über die Tiefen; bei window=10 und
+    spalte='temperature_avg' weicht es ab, wo das Mittel die Schwelle genau trifft.
+
+    Mit refugium=True zählt pro Jahr die kühlste Tiefe (nach dem Glätten), der Fisch überlebt
+    also, solange sich eine Schicht unter der Schwelle hält; depth heisst dann 'refugium'.
+
+    Die Temperaturreihen werden nur einmal pro Fenster geglättet und als PraefixMaximum abgelegt.
+    Jede Abfrage (beliebiges delta, depth) ist danach nur noch eine sortierte Suche über alle
+    Fisch x See x Szenario x Tiefe-Kombinationen, ohne df_merged neu zu verbinden oder zu gruppieren.
+    """
+
+    def __init__(self, schema: Sternschema = None, spalte: str = "temperature_avg", refugium: bool = False):
+        self.schema = schema if schema is not None else sternschema_aus_dateien()
+        self.spalte = spalte
+        self.refugium = refugium
+        if refugium:
+            # Würfel (lake, scenario, depth, year); die Tiefen werden erst nach dem Glätten reduziert
+            seen, szenarien, _, jahre, self._werte = self.schema.wuerfel(spalte)
+            index = pd.MultiIndex.from_product([seen, szenarien])
+        else:
+            serien = self.schema.serien(spalte)
+            jahre, self._werte, index = serien.columns, serien.to_numpy(dtype=np.float64), serien.index
+        self.jahre = np.asarray(jahre)
+        self.kombi = self.schema.kombinationen(index)
+        if refugium:
+            self.kombi['depth'] = REFUGIUM
+        self.krit = self.schema.kritische_temperaturen(self.kombi['Fisch'])
+        self._strukturen = {}
+
+    def struktur(self, window: int) -> PraefixMaximum:
+        """Laufende Maxima der geglätteten Reihen für ein Fenster (wird zwischengespeichert)."""
+        if window not in self._strukturen:
+            werte = self._werte
+            if window > 1:
+                werte = rolling_mean_std(werte, window)[0]
+            if self.refugium:
+                werte = kuehlste_tiefe(werte).reshape(-1, len(self.jahre))
+            self._strukturen[window] = PraefixMaximum.aus_werten(werte)
+        return self._strukturen[window]
+
+    def _auswahl(self, depth=None, fisch_namen=None) -> np.ndarray:
+        """Maske über kombi für eine Tiefe und/oder bestimmte Fische."""
+        maske = np.ones(len(self.kombi), dtype=bool)
+        if depth is not None:
+            maske &= self.kombi['depth'].isin([depth] if isinstance(depth, str) else depth).to_numpy()
+        if fisch_namen is not None:
+            maske &= self.kombi['Fisch'].isin([fisch_namen] if isinstance(fisch_namen, str) else fisch_namen).to_numpy()
+        return maske
+
+    def _jahre(self, pos: np.ndarray) -> np.ndarray:
+        """Index -> Jahr, NaN wenn die Schwelle nie erreicht wird."""
+        return np.where(pos < len(self.jahre), self.jahre[np.minimum(pos, len(self.jahre) - 1)], np.nan)
+
+    def sterbejahre(self, delta: float = 0.0, window: int = 10, depth=None, fisch_namen=None) -> pd.DataFrame:
+        """
+        Aussterbejahr für jedes Fisch-See-Paar unter den gegebenen Parametern.
+
+        Parameters:
+            delta (float): Verschiebung der kritischen Temperatur in °C.
+            window (int): Fenster des gleitenden Mittels in Jahren (1 = Jahreswerte).
+            depth (str/list): Optional nur diese Tiefe(n).
+            fisch_namen (str/list): Optional nur diese Fische.
+
+        Returns:
+            pd.DataFrame: Wie visualisation.sterbejahre_berechnen, Index (Fisch, lake),
+                          Spalten (scenario, depth), NaN = stirbt nie.
+        """
+        maske = self._auswahl(depth, fisch_namen)
+        kombi = self.kombi[maske]
+        pos = self.struktur(window).erster_index(kombi['reihe'].to_numpy(), self.krit[maske] + delta)
+        return (
+            kombi.assign(sterbejahr=self._jahre(pos))
+            .set_index(['Fisch', 'lake', 'scenario', 'depth'])['sterbejahr']
+            .unstack(['scenario', 'depth'])
+        )
+
+    def sensitivitaet(
+        self,
+        deltas=np.arange(-3.0, 3.01, 0.5),
+        windows=(1, 5, 10),
+        depth=None,
+        fisch_namen=None
+        ) -> pd.DataFrame:
+        """
+        Aussterbejahre für alle Kombinationen von deltas und windows in einem Durchgang
+        (pro Fenster eine Suche über alle deltas gleichzeitig).
+
+        Returns:
+            pd.DataFrame: Lange Tabelle mit delta, window, Fisch, lake, scenario, depth, sterbejahr.
+        """
+        deltas = np.asarray(deltas, dtype=np.float64)
+        maske = self._auswahl(depth, fisch_namen)
+        kombi = self.kombi[maske].drop(columns='reihe').reset_index(drop=True)
+        reihe = self.kombi['reihe'].to_numpy()[maske]
+        schwellen = self.krit[maske][None, :] + deltas[:, None]
+
+        dfs = []
+        for window in windows:
+            pos = self.struktur(window).erster_index(reihe[None, :], schwellen)
+            df = pd.concat([kombi] * len(deltas), ignore_index=True)
+            df.insert(0, 'window', window)
+            df.insert(0, 'delta', np.repeat(deltas, len(kombi)))
+            df['sterbejahr'] = self._jahre(pos.ravel())
+            dfs.append(df)
+        return pd.concat(dfs, ignore_index=True)
@@ -1,42 +1,158 @@
-import pandas as pd
+import csv
 import os
 import requests
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import base64
-import time
+import hashlib
+import json
+import queue
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
 
 # Suppress TensorFlow Lite logs
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+BASE_FOLDER = os.path.join(DATA_DIR, "img_webscrape")
+MANIFEST_NAME = "manifest.json"
+GOOGLE_BILDER_URL = "https://www.google.com/search?q={}&tbm=isch"
+
+
+def fish_names(path=os.path.join(DATA_DIR, "Fischdaten.csv"), column="Name wissenschaftlich"):
+    """Search terms from the fish table, read without pandas."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row[column].strip() for row in csv.DictReader(f)]
+
+
+# ChromeDriver only needs to be resolved once per process
+# (selenium and webdriver_manager are imported only when a browser is really needed)
+@lru_cache(maxsize=1)
+def driver_path():
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+
 # Setup Selenium WebDriver with suppressed DevTools messages
-def create_driver():
+def create_driver(headless=True):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
     options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_experimental_option("excludeSwitches", ["enable-logging"])
-    service = Service(ChromeDriverManager().install())
-    service.creationflags = subprocess.CREATE_NO_WINDOW  # Suppress console window on Windows
+    service = Service(driver_path())
+    # Suppress console window on Windows (flag does not exist elsewhere)
+    service.creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
     driver = webdriver.Chrome(service=service, options=options)
     return driver
 
-# Scroll down to load more images
+
+class DriverPool:
+    """
+    Fixed number of long-lived browsers that are lent out per search instead of starting
+    a new Chrome for every species.
+    """
+
+    def __init__(self, size=2, factory=create_driver):
+        self.size = size
+        self.factory = factory
+        self._free = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def driver(self):
+        # Start drivers lazily, at most size of them
+        with self._lock:
+            if self._free.empty() and len(self._all) < self.size:
+                driver = self.factory()
+                self._all.append(driver)
+                self._free.put(driver)
+        driver = self._free.get()
+        try:
+            yield driver
+        finally:
+            self._free.put(driver)
+
+    def close(self):
+        for driver in self._all:
+            try:
+                driver.quit()  # Ensure browser is closed
+            except Exception as e:
+                print(f"Error closing driver: {e}")
+        self._all.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def create_session(pool_size=8, retries=3, backoff=0.5):
+    """
+    One HTTP session for all downloads: keeps connections alive and retries
+    transient errors (429/5xx, connection problems) with exponential backoff.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0 (fish image collector)"
+    return session
+
+
+# Wait until the page shows images instead of sleeping a fixed time
+def wait_for_images(driver, timeout=10, min_count=1):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+            lambda d: len(d.find_elements(By.TAG_NAME, 'img')) >= min_count
+        )
+        return True
+    except TimeoutException:
+        return False
+
+
+# Scroll down to load more images, continue as soon as the page has grown
 def scroll_down(driver, scroll_pause_time=2, scroll_limit=5):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
     last_height = driver.execute_script("return document.body.scrollHeight")
     for i in range(scroll_limit):
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(scroll_pause_time)
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
+        try:
+            WebDriverWait(driver, scroll_pause_time, poll_frequency=0.2).until(
+                lambda d: d.execute_script("return document.body.scrollHeight") != last_height
+            )
+        except TimeoutException:
             break
-        last_height = new_height
+        last_height = driver.execute_script("return document.body.scrollHeight")
+
 
 # Scrape all images from the page
 def scrape_all_images(driver):
+    from selenium.webdriver.common.by import By
+
     try:
         images = driver.find_elements(By.TAG_NAME, 'img')
         image_urls = []
@@ -52,32 +168,123 @@ def scrape_all_images(driver):
         print(f"Error scraping images: {e}")
         return []
 
-# Save the image to the specified folder
-def save_image(image_url, folder_name, file_name, retry_count=3):
+
+def find_image_urls(pool, search_term, num_images=1, search_url=GOOGLE_BILDER_URL, scroll=True):
+    """Loads the search page in a pooled browser and returns up to num_images image URLs."""
+    with pool.driver() as driver:
+        driver.get(search_url.format(requests.utils.quote(search_term)))
+        wait_for_images(driver)
+        if scroll:
+            scroll_down(driver)  # Scroll down to load more images
+        return scrape_all_images(driver)[:num_images]  # Limit to specified number of images
+
+
+def fetch_image(session, image_url, timeout=10):
+    """Returns the image bytes (data: URLs are decoded, HTTP via the pooled session)."""
+    if image_url.startswith('data:image/'):  # Handle base64 images
+        header, encoded = image_url.split(',', 1)
+        return base64.b64decode(encoded)
+    response = session.get(image_url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def existing_hashes(folder_path):
+    """Content hashes of all images already in the folder -> file name."""
+    hashes = {}
+    if os.path.isdir(folder_path):
+        for name in sorted(os.listdir(folder_path)):
+            if name == MANIFEST_NAME:
+                continue
+            with open(os.path.join(folder_path, name), 'rb') as f:
+                hashes.setdefault(content_hash(f.read()), name)
+    return hashes
+
+
+def load_manifest(folder_path):
+    path = os.path.join(folder_path, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def is_complete(entries, folder_path):
+    """True if a search term has images and none of them failed (errors are retried on the next run)."""
+    return bool(entries) and all(
+        e.get("status") in ("saved", "duplicate") and e.get("file") and os.path.exists(os.path.join(folder_path, e["file"]))
+        for e in entries
+    )
+
+
+def manifest_url(image_url):
+    """data: URLs are not stored in the manifest, only their scheme."""
+    return "data:" if image_url and image_url.startswith("data:") else image_url
+
+
+def error_entry(image_url, error):
+    return {"url": manifest_url(image_url), "file": None, "sha256": None, "status": "error", "error": str(error)}
+
+
+def save_manifest(folder_path, manifest):
+    with open(os.path.join(folder_path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+
+# Save the image to the specified folder, unless the same content is already there
+def save_image(session, image_url, folder_path, file_name, hashes, lock):
+    entry = {"url": manifest_url(image_url), "file": None, "sha256": None}
     try:
-        file_path = os.path.join(folder_name, f"{file_name}.jpg")
-
-        if image_url.startswith('data:image/'):  # Handle base64 images
-            header, encoded = image_url.split(',', 1)
-            image_data = base64.b64decode(encoded)
-            with open(file_path, 'wb') as f:
-                f.write(image_data)
-
-        else:  # Handle standard HTTP/HTTPS images
-            for attempt in range(retry_count):
-                response = requests.get(image_url, timeout=5)
-                if response.status_code == 200:
-                    with open(file_path, 'wb') as f:
-                        f.write(response.content)
-                    break
-                else:
-                    print(f"Failed attempt {attempt + 1} for image: {image_url}")
-                    time.sleep(2)
+        data = fetch_image(session, image_url)
     except Exception as e:
         print(f"Error saving image {file_name}: {e}")
+        return error_entry(image_url, e)
+
+    digest = content_hash(data)
+    entry["sha256"] = digest
+    with lock:
+        if digest in hashes:
+            entry["file"] = hashes[digest]
+            entry["status"] = "duplicate"
+            return entry
+        hashes[digest] = f"{file_name}.jpg"
+
+    with open(os.path.join(folder_path, f"{file_name}.jpg"), 'wb') as f:
+        f.write(data)
+    entry["file"] = f"{file_name}.jpg"
+    entry["status"] = "saved"
+    return entry
+
+
+def scrape_and_save_images(
+    search_terms,
+    base_folder=BASE_FOLDER,
+    num_images=1,
+    drivers=2,
+    downloads=8,
+    search_url=GOOGLE_BILDER_URL,
+    pool=None,
+    session=None,
+    force=False,
+):
+    """
+    Collects images for many search terms: the browser pool finds the URLs (drivers in parallel),
+    the downloads run concurrently on one pooled HTTP session as soon as URLs are known.
+    Search terms whose images are all saved are skipped (unless force=True); terms with failed
+    or missing entries are searched again. Downloaded images whose content hash is already in
+    the folder are not written again.
+
+    search_url can point to a local test server, e.g. "http://127.0.0.1:8000/fixture.html?q={}".
 
-# Main scraping function
-def scrape_and_save_images(base_folder, search_term: str, num_images=1):
+    Returns:
+        dict: manifest {search_term: [{url, file, sha256, status}, ...]}
+    """
+    if isinstance(search_terms, str):
+        search_terms = [search_terms]
     folder_path = os.path.join(base_folder, "img_scraper")
 
     # Ensure folder exists with proper permissions
@@ -85,40 +292,63 @@ def scrape_and_save_images(base_folder, search_term: str, num_images=1):
         os.makedirs(folder_path, exist_ok=True)
     except PermissionError as e:
         print(f"Permission denied: {e}")
-        return
+        return {}
 
-    driver = create_driver()
-    
-    try:
-        driver.get(f"https://www.google.com/search?q={search_term}&tbm=isch")
-        time.sleep(5)  # Wait for page to load fully
-
-        scroll_down(driver)  # Scroll down to load more images
+    manifest = load_manifest(folder_path)
+    hashes = existing_hashes(folder_path)
+    lock = threading.Lock()
 
-        image_urls = scrape_all_images(driver)[:num_images]  # Limit to specified number of images
+    todo = [term for term in search_terms if force or not is_complete(manifest.get(term, []), folder_path)]
 
-        for index, image_url in enumerate(image_urls, start=1):
-            file_name = f'{search_term.replace(" ", "_")}_{index}'  # Replace spaces in file name with underscores
-            save_image(image_url, folder_path, file_name)
+    own_pool = pool is None
+    own_session = session is None
+    pool = pool or DriverPool(drivers)
+    session = session or create_session(downloads)
+    try:
+        with ThreadPoolExecutor(max_workers=drivers) as search_executor, \
+                ThreadPoolExecutor(max_workers=downloads) as download_executor:
+            searches = {
+                search_executor.submit(find_image_urls, pool, term, num_images, search_url): term for term in todo
+            }
+            download_futures = {}
+            for future in as_completed(searches):
+                term = searches[future]
+                try:
+                    image_urls = future.result()
+                except Exception as e:
+                    print(f"Error during scraping '{term}': {e}")
+                    manifest[term] = [error_entry(None, e)]
+                    continue
+                for index, image_url in enumerate(image_urls, start=1):
+                    file_name = f'{term.replace(" ", "_")}_{index}'  # Replace spaces in file name with underscores
+                    f = download_executor.submit(save_image, session, image_url, folder_path, file_name, hashes, lock)
+                    download_futures[f] = (term, index, image_url)
+                manifest[term] = [None] * len(image_urls)
 
-        print(f"Finished scraping {len(image_urls)} images for '{search_term}'")
-    
-    except Exception as e:
-        print(f"Error during scraping: {e}")
-    
+            for future in as_completed(download_futures):
+                term, index, image_url = download_futures[future]
+                try:
+                    manifest[term][index - 1] = future.result()
+                except Exception as e:
+                    print(f"Error saving image {index} for '{term}': {e}")
+                    manifest[term][index - 1] = error_entry(image_url, e)
     finally:
-        driver.quit()  # Ensure browser is closed
-
+        # Downloads that never finished (e.g. interrupted run) are not written to the manifest
+        for term in todo:
+            if term in manifest:
+                manifest[term] = [e for e in manifest[term] if e is not None]
+        save_manifest(folder_path, manifest)
+        if own_pool:
+            pool.close()
+        if own_session:
+            session.close()
 
+    for term in todo:
+        saved = sum(e.get("status") == "saved" for e in manifest.get(term, []))
+        print(f"Finished scraping {saved} images for '{term}'")
+    return manifest
 
 
 # Read fish names from CSV and run the script
 if __name__ == "__main__":
-    data = pd.read_csv("../data/Fischdaten.csv")
-    fish_list = data["Name wissenschaftlich"]
-    
-    base_folder = "img_webscrape"
-    
-    for fish_name in fish_list:  # Iterate over fish names correctly
-        scrape_and_save_images(base_folder, search_term=fish_name.strip(), num_images=1)
-
+    scrape_and_save_images(fish_names(), num_images=1)
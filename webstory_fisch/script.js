@@ -1,5 +1,8 @@
 window.addEventListener("scroll", function () {
     const hero = document.querySelector(".hero-container");
+    if (!hero) {
+      return;
+    }
     if (window.scrollY > 50) {
       hero.classList.add("scrolled");
     } else {
@@ -7,9 +10,10 @@ window.addEventListener("scroll", function () {
     }
   });
 
-const scroller = scrollama();
+if (typeof scrollama !== "undefined") {
+  const scroller = scrollama();
 
-scroller
+  scroller
   .setup({
     step: ".step",
     offset: 0.5,
@@ -20,6 +24,7 @@ scroller
       drawChart();
     }
   });
+}
 
 function drawChart() {
   const ctx = document.getElementById("tempChart").getContext("2d");
@@ -43,4 +48,162 @@ function drawChart() {
       }
     }
   });
-}
\ No newline at end of file
+}
+
+// Temperaturdiagramme aus den Datenkacheln (src/export_tiles.py).
+// Ein Element <div class="kachel-chart" data-fisch="..." data-see="..."> wird erst geladen,
+// wenn es in die Nähe des sichtbaren Bereichs kommt. Plotly wird nur einmal pro Seite eingebunden.
+const KACHEL_ORDNER = "data/";
+const FARBEN = { RCP26: "#2ca02c", RCP45: "#ff9900", RCP85: "#e41a1c" };
+const LABELS = { RCP26: "Optimistisches Szenario", RCP45: "Mittleres Szenario", RCP85: "Pessimistisches Szenario" };
+
+const kachelCache = {};
+
+function ladeKachel(pfad) {
+  if (!kachelCache[pfad]) {
+    kachelCache[pfad] = fetch(KACHEL_ORDNER + pfad)
+      .then((antwort) => {
+        if (!antwort.ok) {
+          throw new Error(pfad + ": HTTP " + antwort.status);
+        }
+        return antwort.json();
+      })
+      .catch((fehler) => {
+        // Fehlschläge nicht merken, damit ein späterer Aufruf es erneut versucht
+        delete kachelCache[pfad];
+        throw fehler;
+      });
+  }
+  return kachelCache[pfad];
+}
+
+// Sichtbarer Hinweis statt einer leeren Fläche; über file:// blockiert der Browser fetch
+function zeigeFehler(element, fehler) {
+  console.error(fehler);
+  element.querySelectorAll(".kachel-fehler").forEach((hinweis) => hinweis.remove());
+  const hinweis = document.createElement("p");
+  hinweis.className = "kachel-fehler";
+  hinweis.textContent = window.location.protocol === "file:"
+    ? "Daten können nicht geladen werden: Seite über einen lokalen Server öffnen (siehe README)."
+    : "Daten konnten nicht geladen werden (" + fehler.message + ").";
+  element.appendChild(hinweis);
+}
+
+function zeichneKachel(element, fischKachel, seeKachel) {
+  const jahre = seeKachel.jahre;
+  const krit = fischKachel.kritische_temperatur;
+  const traces = [];
+
+  Object.entries(seeKachel.szenarien).forEach(([szenario, reihe], i) => {
+    const oben = reihe.mittel.map((m, k) => (m === null || reihe.std[k] === null ? null : m + reihe.std[k]));
+    const unten = reihe.mittel.map((m, k) => (m === null || reihe.std[k] === null ? null : m - reihe.std[k]));
+    traces.push(
+      { x: jahre, y: oben, mode: "lines", line: { width: 0 }, showlegend: false, hoverinfo: "skip" },
+      {
+        x: jahre, y: unten, mode: "lines", fill: "tonexty", fillcolor: "rgba(128,128,128,0.15)",
+        line: { width: 0 }, name: "Noise (1 Std)", legendgroup: "noise", showlegend: i === 0, hoverinfo: "skip"
+      },
+      {
+        x: jahre, y: reihe.mittel, mode: "lines", name: LABELS[szenario] || szenario,
+        line: { color: FARBEN[szenario] || "gray", width: 2.5 }, legendgroup: szenario
+      }
+    );
+    const jahr = (fischKachel.ueberschreitung[seeKachel.see] || {})[szenario];
+    if (jahr) {
+      traces.push({
+        x: [jahr], y: [reihe.mittel[jahre.indexOf(jahr)]], mode: "markers+text",
+        marker: { color: FARBEN[szenario] || "gray", size: 10 }, text: ["ab " + jahr],
+        textposition: "top right", showlegend: false, hoverinfo: "text",
+        textfont: { color: "black", size: 12, family: "Arial Black" }
+      });
+    }
+  });
+
+  if (krit !== null) {
+    traces.push({
+      x: jahre, y: jahre.map(() => krit), mode: "lines", line: { color: "red", dash: "dot", width: 1.5 },
+      name: "Krit. Temp. (" + krit.toFixed(1) + " °C)", legendgroup: "krit"
+    });
+  }
+
+  Plotly.newPlot(element, traces, {
+    font: { color: "black" },
+    title: {
+      text: fischKachel.fisch + " in " + seeKachel.see,
+      font: { size: 18, color: "black" }, x: 0.5, xanchor: "center",
+      subtitle: {
+        text: "Temperaturverlauf der Klimaszenarien, geglättet über " + seeKachel.window + " Jahre",
+        font: { size: 14, color: "gray" }
+      }
+    },
+    xaxis: { title: { text: "Jahr" }, showgrid: false },
+    yaxis: { title: { text: "Ø Temperatur [°C]" }, showgrid: false },
+    legend: { orientation: "h", yanchor: "bottom", y: 1, xanchor: "right", x: 1 },
+    hovermode: "x unified",
+    plot_bgcolor: "rgba(0,0,0,0)",
+    paper_bgcolor: "rgba(0,0,0,0)"
+  }, { responsive: true });
+}
+
+function ladeDiagramm(element) {
+  ladeKachel("index.json").then((index) => {
+    const fisch = element.dataset.fisch;
+    const see = element.dataset.see;
+    return Promise.all([ladeKachel(index.fische[fisch]), ladeKachel(index.seen[see])]);
+  }).then(([fischKachel, seeKachel]) => zeichneKachel(element, fischKachel, seeKachel))
+    .catch((fehler) => zeigeFehler(element, fehler));
+}
+
+// Kartenebene: Seen als Punkte über Karte_Schweiz_ohne_hintergrund.png.
+// x/y in karte.json sind Pixel im Originalbild (KARTE_BREITE x KARTE_HOEHE, src/geo.py kartenpunkte).
+const KARTE_BREITE = 1359;
+const KARTE_HOEHE = 922;
+
+function zeichneKarte(element, karte, szenario) {
+  element.querySelectorAll(".karten-punkt").forEach((punkt) => punkt.remove());
+  const maxArten = Math.max(...karte.seen.map((see) => see.arten), 1);
+  karte.seen.forEach((see) => {
+    const anteil = see.arten ? see.ausgestorben[szenario] / see.arten : 0;
+    const groesse = 8 + 16 * Math.sqrt(see.arten / maxArten);
+    const punkt = document.createElement("span");
+    punkt.className = "karten-punkt";
+    punkt.style.left = (100 * see.x / KARTE_BREITE) + "%";
+    punkt.style.top = (100 * see.y / KARTE_HOEHE) + "%";
+    punkt.style.width = groesse + "px";
+    punkt.style.height = groesse + "px";
+    punkt.style.background = "rgba(" + Math.round(255 * anteil) + ", 60, " + Math.round(200 * (1 - anteil)) + ", 0.8)";
+    punkt.title = see.see + ": " + see.ausgestorben[szenario] + " von " + see.arten + " Arten (" + (LABELS[szenario] || szenario) + ")";
+    element.appendChild(punkt);
+  });
+}
+
+function ladeKarte(abschnitt) {
+  const element = abschnitt.querySelector("[data-karte]");
+  ladeKachel("index.json").then((index) => ladeKachel(index.karte)).then((karte) => {
+    const knoepfe = abschnitt.querySelectorAll("[data-szenario]");
+    knoepfe.forEach((knopf) => knopf.addEventListener("click", () => {
+      knoepfe.forEach((k) => k.classList.toggle("active", k === knopf));
+      zeichneKarte(element, karte, knopf.dataset.szenario);
+    }));
+    const aktiv = abschnitt.querySelector("[data-szenario].active");
+    zeichneKarte(element, karte, aktiv ? aktiv.dataset.szenario : "RCP85");
+  }).catch((fehler) => zeigeFehler(element, fehler));
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+  document.querySelectorAll(".karten-section").forEach(ladeKarte);
+  const diagramme = document.querySelectorAll(".kachel-chart");
+  if (!("IntersectionObserver" in window)) {
+    diagramme.forEach(ladeDiagramm);
+    return;
+  }
+  const beobachter = new IntersectionObserver((eintraege) => {
+    eintraege.forEach((eintrag) => {
+      if (eintrag.isIntersecting) {
+        beobachter.unobserve(eintrag.target);
+        ladeDiagramm(eintrag.target);
+      }
+    });
+  }, { rootMargin: "200px" });
+  diagramme.forEach((element) => beobachter.observe(element));
+});